@@ -101,6 +101,10 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Default and largest page (?page_size=) for the cursor-paginated list endpoints
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 20))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 100))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -122,6 +126,7 @@ if DEBUG:
         'user-agent',
         'x-csrftoken',
         'x-requested-with',
+        'idempotency-key',
     ]
     CORS_ALLOW_METHODS = [
         'DELETE',
@@ -160,6 +165,43 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared cache. Every worker process and management command must see the same one: the
+# dashboard metrics and their recomputation locks, the search and autocomplete change logs
+# and menu versions (ETags) all live here, and a per-process cache would leave other workers
+# serving stale data. (Idempotency-Key claims are IdempotencyKey rows, not cache entries.) Set REDIS_URL to use Redis; otherwise entries are kept in the
+# database (create the table once with `python manage.py createcachetable`).
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+# Idempotency-Key handling for checkout, reorder and withdrawal POSTs
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 60 * 60 * 24))  # seconds a response is replayed for
+
+# Cart items hold stock for this long (seconds); run release_expired_reservations to sweep expired holds
+CART_RESERVATION_TTL = int(os.environ.get('CART_RESERVATION_TTL', 15 * 60))
+
+# Rows fetched per round trip by the streaming CSV exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Amount (৳) paid to a rider for each delivered order
+RIDER_PAYOUT_PER_DELIVERY = os.environ.get('RIDER_PAYOUT_PER_DELIVERY', '50.00')
+
+# Radius (km) of the home screen's nearby restaurants, and the largest ?radius_km= a search may use
+NEARBY_RADIUS_KM = float(os.environ.get('NEARBY_RADIUS_KM', 10))
+MAX_NEARBY_RADIUS_KM = 50
+
 # AI Configuration
 GROK_API_KEY = os.environ.get('GROK_API_KEY', 'xai-TIhI3cRaNOockERNemFsxqf3dNpsqKAW5XiTWY20tLb1DRQtz5Ohg0KNMAtoOT9TRueXzNdi2ecNePRe')  # Keep for backward compatibility
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', None)  # Keep for backward compatibility
@@ -7,7 +7,10 @@ from rest_framework.routers import DefaultRouter
 from core.views import *
 from django.urls import path
 from core.views import RegisterView, LoginView, TestView
-from core.search_views import SearchView
+from core.search_views import AutocompleteView, SearchView
+from core.export_views import (
+    AdminOrdersExportView, LoginLogExportView, RestaurantEarningsExportView, RestaurantOrdersExportView
+)
 from rest_framework_simplejwt.views import TokenRefreshView
 
 router = DefaultRouter()
@@ -45,11 +48,17 @@ urlpatterns = [
     path('api/v1/auth/profile/', ProfileView.as_view()),
     path('api/v1/customer/home/', HomeView.as_view({'get': 'list'})),
     path('api/v1/customer/search/', SearchView.as_view(), name='search'),
+    path('api/v1/customer/search/autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
     path('api/v1/customer/checkout/', CheckoutView.as_view({'post': 'create'})),
     path('api/v1/restaurant/profile/', RestaurantProfileView.as_view()),
     path('api/v1/restaurant/analytics/', RestaurantAnalyticsView.as_view()),
+    path('api/v1/restaurant/analytics/top-sellers/', RestaurantTopSellersView.as_view()),
+    path('api/v1/restaurant/analytics/category-mix/', RestaurantCategoryMixView.as_view()),
+    path('api/v1/restaurant/analytics/item-velocity/', RestaurantItemVelocityView.as_view()),
     path('api/v1/restaurant/earnings/', RestaurantEarningsView.as_view()),
     path('api/v1/restaurant/withdrawals/', RestaurantWithdrawalsView.as_view()),
+    path('api/v1/restaurant/export/orders/', RestaurantOrdersExportView.as_view()),
+    path('api/v1/restaurant/export/earnings/', RestaurantEarningsExportView.as_view()),
     path('api/v1/rider/profile/', RiderProfileView.as_view()),
     path('api/v1/rider/availability/', RiderAvailabilityView.as_view()),
     path('api/v1/rider/location/', RiderLocationView.as_view()),
@@ -60,6 +69,8 @@ urlpatterns = [
     path('api/v1/rider/orders/<int:order_id>/update-status/', RiderOrderUpdateView.as_view()),
     path('api/v1/admin/dashboard/', AdminDashboardView.as_view()),
     path('api/v1/admin/revenue/', AdminRevenueView.as_view()),
+    path('api/v1/admin/export/orders/', AdminOrdersExportView.as_view()),
+    path('api/v1/admin/export/login-logs/', LoginLogExportView.as_view()),
     path('api/v1/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/v1/docs/', SpectacularSwaggerView.as_view(url_name='schema')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -1,6 +1,7 @@
 # core/admin.py
 from django.contrib import admin
 from .models import *
+from .menu_service import invalidate_on_commit
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -9,6 +10,8 @@ class UserAdmin(admin.ModelAdmin):
 @admin.register(Restaurant)
 class RestaurantAdmin(admin.ModelAdmin):
     list_display = ('name', 'owner', 'cuisine', 'get_rating_display', 'is_approved')
+    # Maintained by review signals; saving the form must not write them back
+    readonly_fields = Restaurant.RATING_FIELDS
     
     def get_rating_display(self, obj):
         """Display calculated rating in admin"""
@@ -56,18 +59,21 @@ class FoodAdmin(admin.ModelAdmin):
     def mark_as_available(self, request, queryset):
         """Mark selected items as available"""
         updated = queryset.update(is_available=True)
+        invalidate_on_commit(queryset.values_list('restaurant_id', flat=True))
         self.message_user(request, f'{updated} items marked as available.')
     mark_as_available.short_description = "Mark selected items as available"
     
     def mark_as_unavailable(self, request, queryset):
         """Mark selected items as unavailable"""
         updated = queryset.update(is_available=False)
+        invalidate_on_commit(queryset.values_list('restaurant_id', flat=True))
         self.message_user(request, f'{updated} items marked as unavailable.')
     mark_as_unavailable.short_description = "Mark selected items as unavailable"
     
     def set_low_stock_alert(self, request, queryset):
         """Set stock to 3 for low stock testing"""
         updated = queryset.update(stock_quantity=3)
+        invalidate_on_commit(queryset.values_list('restaurant_id', flat=True))
         self.message_user(request, f'{updated} items set to low stock (3 units).')
     set_low_stock_alert.short_description = "Set to low stock (3 units)"
 
@@ -83,6 +89,40 @@ class CartAdmin(admin.ModelAdmin):
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ('cart', 'food', 'quantity')
 
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('food', 'quantity', 'cart_item', 'expires_at', 'created_at')
+    list_filter = ('expires_at',)
+    search_fields = ('food__name', 'cart_item__cart__user__email')
+    raw_id_fields = ('cart_item', 'food')
+
+@admin.register(RestaurantDailyStats)
+class RestaurantDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('restaurant', 'date', 'total_orders', 'delivered_orders', 'cancelled_orders', 'gross_revenue', 'net_revenue')
+    list_filter = ('restaurant',)
+    date_hierarchy = 'date'
+
+@admin.register(PlatformDailyStats)
+class PlatformDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('date', 'total_orders', 'delivered_orders', 'cancelled_orders', 'gross_revenue', 'commission')
+    date_hierarchy = 'date'
+
+@admin.register(PlatformTotals)
+class PlatformTotalsAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'total_orders', 'delivered_orders', 'cancelled_orders', 'gross_revenue', 'commission', 'updated_at')
+
+@admin.register(RiderPayout)
+class RiderPayoutAdmin(admin.ModelAdmin):
+    list_display = ('order', 'rider', 'amount', 'delivered_at')
+    search_fields = ('rider__email',)
+    raw_id_fields = ('order', 'rider')
+
+@admin.register(RiderDailyStats)
+class RiderDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('rider', 'date', 'trips', 'earnings', 'ratings')
+    search_fields = ('rider__email',)
+    date_hierarchy = 'date'
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'restaurant', 'get_delivery_address', 'status', 'total', 'created_at')
@@ -93,6 +133,13 @@ class OrderAdmin(admin.ModelAdmin):
         return obj.get_delivery_address_display()
     get_delivery_address.short_description = 'Delivery Address'
 
+@admin.register(OrderLine)
+class OrderLineAdmin(admin.ModelAdmin):
+    list_display = ('order', 'name', 'quantity', 'unit_price', 'line_total', 'restaurant', 'created_at')
+    list_filter = ('restaurant', 'category')
+    search_fields = ('name',)
+    raw_id_fields = ('order', 'food')
+
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'message', 'is_read')
@@ -311,4 +358,12 @@ class LoginLogAdmin(admin.ModelAdmin):
             'fields': ('ip_address', 'user_agent', 'session_key'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'endpoint', 'status', 'response_status', 'created_at', 'expires_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('user__email', 'key', 'endpoint')
+    readonly_fields = ('created_at',)
+    raw_id_fields = ('user',)
@@ -0,0 +1,192 @@
+# core/analytics_service.py
+"""
+Restaurant reporting queries.
+
+Everything here is a grouped aggregate over indexed columns, so the cost
+depends on the number of rows in the reporting window rather than on
+loading orders into Python.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, DateTimeField, Max, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import OrderLine
+
+# Orders in these states never turned into a sale
+UNSOLD_STATUSES = ['cancelled']
+
+GRANULARITIES = ('day', 'week', 'month', 'year')
+
+
+def bucket_start(moment, granularity):
+    """Start of the day/week (Monday)/month/year containing `moment`, in local time"""
+    local = timezone.localtime(moment).replace(tzinfo=None)
+    start = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'week':
+        start -= timedelta(days=start.weekday())
+    elif granularity == 'month':
+        start = start.replace(day=1)
+    elif granularity == 'year':
+        start = start.replace(month=1, day=1)
+    return timezone.make_aware(start)
+
+
+def next_bucket(start, granularity):
+    naive = timezone.localtime(start).replace(tzinfo=None)
+    if granularity == 'day':
+        naive += timedelta(days=1)
+    elif granularity == 'week':
+        naive += timedelta(weeks=1)
+    elif granularity == 'month':
+        naive = naive.replace(year=naive.year + naive.month // 12, month=naive.month % 12 + 1)
+    else:
+        naive = naive.replace(year=naive.year + 1)
+    return timezone.make_aware(naive)
+
+
+def last_buckets(granularity, count, now=None):
+    """(start, end) covering the current bucket and the `count - 1` before it"""
+    now = now or timezone.now()
+    start = bucket_start(now, granularity)
+    for _ in range(count - 1):
+        start = bucket_start(start - timedelta(microseconds=1), granularity)
+    return start, now
+
+
+def time_series(queryset, granularity, start, end, date_field='created_at', **aggregates):
+    """
+    Aggregates per bucket of `granularity` from `start` up to `end`, in one
+    grouped query. By default that's revenue (sum of `total`) and order
+    count; pass keyword aggregates (e.g. revenue=Sum('gross_revenue')) to
+    choose others. `date_field` may be a DateTimeField or a DateField.
+    Buckets with no rows are filled with zeros so the series is always
+    contiguous.
+
+    Returns a list of {'start', <aggregate names>...} dicts, oldest first.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Unknown granularity: {granularity}')
+    aggregates = aggregates or {'revenue': Sum('total'), 'orders': Count('pk')}
+
+    if isinstance(queryset.model._meta.get_field(date_field), DateTimeField):
+        bounds = {f'{date_field}__gte': start, f'{date_field}__lt': end}
+        output_field = DateTimeField()
+        key = lambda bucket: bucket
+    else:
+        last_day = timezone.localdate(end - timedelta(microseconds=1))
+        bounds = {f'{date_field}__gte': timezone.localdate(start), f'{date_field}__lte': last_day}
+        output_field = DateField()
+        key = lambda bucket: timezone.localdate(bucket)
+
+    rows = (
+        queryset.filter(**bounds)
+        .annotate(bucket=Trunc(date_field, granularity, output_field=output_field))
+        .values('bucket')
+        .annotate(**aggregates)
+        .order_by()
+    )
+    totals = {row['bucket']: row for row in rows}
+
+    series = []
+    bucket = bucket_start(start, granularity)
+    while bucket < end:
+        row = totals.get(key(bucket), {})
+        series.append({'start': bucket, **{name: row.get(name) or 0 for name in aggregates}})
+        bucket = next_bucket(bucket, granularity)
+    return series
+
+
+def sold_lines(restaurant, since, until=None):
+    lines = OrderLine.objects.filter(restaurant=restaurant, created_at__gte=since)
+    if until is not None:
+        lines = lines.filter(created_at__lt=until)
+    return lines.exclude(order__status__in=UNSOLD_STATUSES)
+
+
+def top_sellers(restaurant, days=7, limit=10):
+    """Best-selling items by units sold over the last `days` days"""
+    since = timezone.now() - timedelta(days=days)
+    rows = (
+        sold_lines(restaurant, since)
+        .values('food_id')
+        .annotate(
+            name=Max('name'),
+            quantity=Sum('quantity'),
+            revenue=Sum('line_total'),
+            orders=Count('order', distinct=True)
+        )
+        .order_by('-quantity', '-revenue')[:limit]
+    )
+    return [
+        {
+            'food_id': row['food_id'],
+            'name': row['name'],
+            'quantity': row['quantity'],
+            'revenue': float(row['revenue']),
+            'orders': row['orders']
+        }
+        for row in rows
+    ]
+
+
+def category_mix(restaurant, days=30):
+    """Units and revenue per category over the last `days` days, with revenue share"""
+    since = timezone.now() - timedelta(days=days)
+    rows = list(
+        sold_lines(restaurant, since)
+        .values('category_id', 'category__name')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('line_total'))
+        .order_by('-revenue')
+    )
+    total_revenue = sum(row['revenue'] for row in rows)
+    return [
+        {
+            'category_id': row['category_id'],
+            'category': row['category__name'] or 'Uncategorized',
+            'quantity': row['quantity'],
+            'revenue': float(row['revenue']),
+            'share': round(float(row['revenue'] / total_revenue * 100), 1) if total_revenue else 0
+        }
+        for row in rows
+    ]
+
+
+def item_velocity(restaurant, days=7):
+    """
+    Units per day for every item sold in the last `days` days, compared with
+    the window before it, and how many days the current stock would last.
+    Both windows come from one grouped query.
+    """
+    now = timezone.now()
+    since = now - timedelta(days=days)
+    rows = (
+        sold_lines(restaurant, since - timedelta(days=days))
+        .values('food_id')
+        .annotate(
+            name=Max('name'),
+            current=Sum('quantity', filter=Q(created_at__gte=since)),
+            previous=Sum('quantity', filter=Q(created_at__lt=since)),
+            stock=Max('food__stock_quantity')
+        )
+        .filter(current__gt=0)
+        .order_by('-current')
+    )
+
+    items = []
+    for row in rows:
+        per_day = row['current'] / days
+        previous = row['previous'] or 0
+        items.append({
+            'food_id': row['food_id'],
+            'name': row['name'],
+            'units_sold': row['current'],
+            'units_per_day': round(per_day, 2),
+            'previous_units_sold': previous,
+            'change_percent': round((row['current'] - previous) / previous * 100, 1) if previous else None,
+            'stock_quantity': row['stock'],
+            'days_of_stock': round(row['stock'] / per_day, 1) if row['stock'] is not None else None
+        })
+    return items
@@ -0,0 +1,238 @@
+# core/autocomplete.py
+"""
+Typo-tolerant autocomplete over dish and restaurant names.
+
+Every word of every approved restaurant's name and of its dishes' names
+goes into two in-memory structures:
+
+- a trie, so a partly typed word ("biry") finds every word starting with it;
+- a trigram index (word -> its three-letter slices, padded like pg_trgm), so
+  a misspelt word ("birani", "biriyani") finds the words sharing most of its
+  trigrams ("biryani").
+
+A query's words are each matched either way and the names containing a match
+for every word are ranked, so suggestions come back in a few milliseconds
+without touching the database. Like the search index, it is built lazily and
+kept current through core/index_sync.py: signals on Restaurant and Food log
+each committed change to the shared cache, and every process replays the
+log through update() before its next suggestion.
+"""
+import threading
+from collections import Counter, defaultdict
+
+from .index_sync import IndexSync
+from .models import Food, Restaurant
+from .search_index import tokenize
+
+# Saves that don't touch these leave the suggestions alone
+INDEXED_FIELDS = {
+    Restaurant: {'name', 'is_approved'},
+    Food: {'name', 'restaurant'},
+}
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Least trigram similarity for a misspelt word to count as a match
+MIN_SIMILARITY = 0.3
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Autocomplete:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.built = False
+        self.trie = {}                      # nested {char: node}; a node's None key holds the word ending there
+        self.word_trigrams = {}             # word -> its trigrams
+        self.trigram_words = defaultdict(set)
+        self.word_entries = defaultdict(set)   # word -> {(kind, id)}
+        self.entries = {}                   # (kind, id) -> {'name', 'words', 'restaurant_id'}
+        self.restaurants = {}               # id -> is_approved
+
+    # Building and incremental updates
+
+    def rebuild(self):
+        with self.lock:
+            self.trie = {}
+            self.word_trigrams.clear()
+            self.trigram_words.clear()
+            self.word_entries.clear()
+            self.entries.clear()
+            self.restaurants.clear()
+            for row in Restaurant.objects.values('id', 'name', 'is_approved'):
+                self._add_restaurant(row)
+            for row in Food.objects.values('id', 'name', 'restaurant_id'):
+                self._add_food(row)
+            self.built = True
+
+    def _add_word(self, word):
+        node = self.trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[None] = word
+        self.word_trigrams[word] = trigrams(word)
+        for trigram in self.word_trigrams[word]:
+            self.trigram_words[trigram].add(word)
+
+    def _remove_word(self, word):
+        nodes = [self.trie]
+        for char in word:
+            nodes.append(nodes[-1][char])
+        del nodes[-1][None]
+        # Prune the branch back to the last node still in use
+        for depth in range(len(word), 0, -1):
+            if nodes[depth]:
+                break
+            del nodes[depth - 1][word[depth - 1]]
+        for trigram in self.word_trigrams.pop(word):
+            self.trigram_words[trigram].discard(word)
+            if not self.trigram_words[trigram]:
+                del self.trigram_words[trigram]
+
+    def _set_entry(self, key, name, restaurant_id):
+        self._remove(key)
+        words = set(tokenize(name))
+        self.entries[key] = {'name': name, 'words': words, 'restaurant_id': restaurant_id}
+        for word in words:
+            if word not in self.word_entries:
+                self._add_word(word)
+            self.word_entries[word].add(key)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for word in entry['words']:
+            self.word_entries[word].discard(key)
+            if not self.word_entries[word]:
+                del self.word_entries[word]
+                self._remove_word(word)
+
+    def _add_restaurant(self, row):
+        self.restaurants[row['id']] = row['is_approved']
+        self._set_entry(('restaurant', row['id']), row['name'], row['id'])
+
+    def _add_food(self, row):
+        self._set_entry(('food', row['id']), row['name'], row['restaurant_id'])
+
+    def update(self, model, pk):
+        """Re-index (or drop) one Restaurant or Food name after it changed"""
+        with self.lock:
+            if not self.built:
+                return
+            if model is Restaurant:
+                row = Restaurant.objects.filter(pk=pk).values('id', 'name', 'is_approved').first()
+                if row:
+                    self._add_restaurant(row)
+                else:
+                    # Its foods went with it (CASCADE)
+                    self.restaurants.pop(pk, None)
+                    for key in [key for key, entry in self.entries.items() if entry['restaurant_id'] == pk]:
+                        self._remove(key)
+            elif model is Food:
+                row = Food.objects.filter(pk=pk).values('id', 'name', 'restaurant_id').first()
+                if row:
+                    self._add_food(row)
+                else:
+                    self._remove(('food', pk))
+
+    # Suggesting
+
+    def prefixed(self, prefix):
+        node = self.trie
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        words, stack = [], [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char is None:
+                    words.append(child)
+                else:
+                    stack.append(child)
+        return words
+
+    def similar(self, word):
+        """Words sharing at least MIN_SIMILARITY of their trigrams with `word`, with that similarity"""
+        wanted = trigrams(word)
+        shared = Counter(other for trigram in wanted for other in self.trigram_words.get(trigram, ()))
+        matches = {}
+        for other, count in shared.items():
+            similarity = count / (len(wanted) + len(self.word_trigrams[other]) - count)
+            if similarity >= MIN_SIMILARITY:
+                matches[other] = similarity
+        return matches
+
+    def matches(self, token):
+        """{word: score} for a query word: 1 for words it starts, trigram similarity for near misses"""
+        matches = self.similar(token)
+        matches.update(dict.fromkeys(self.prefixed(token), 1.0))
+        return matches
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """
+        Up to `limit` restaurant and dish names matching every word of
+        `query` (by prefix or by spelling), best first, as
+        [{'type', 'id', 'name', 'restaurant_id', 'restaurant_name', 'score'}].
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self.lock:
+            scores = None
+            for token in tokens:
+                token_scores = {}
+                for word, score in self.matches(token).items():
+                    for key in self.word_entries[word]:
+                        token_scores[key] = max(token_scores.get(key, 0), score)
+                # Every word of the query has to match something in the name
+                scores = token_scores if scores is None else {
+                    key: scores[key] + score for key, score in token_scores.items() if key in scores
+                }
+
+            name = ' '.join(tokens)
+            candidates = [
+                (key, total / len(tokens)) for key, total in scores.items()
+                if self.restaurants.get(self.entries[key]['restaurant_id'])
+            ]
+            candidates.sort(key=lambda candidate: (
+                -candidate[1],
+                # Names that start with what was typed come first, then shorter names
+                not self.entries[candidate[0]]['name'].lower().startswith(name),
+                len(self.entries[candidate[0]]['name']),
+                candidate[0]
+            ))
+
+            suggestions = []
+            for (kind, pk), score in candidates[:limit]:
+                entry = self.entries[kind, pk]
+                suggestions.append({
+                    'type': kind,
+                    'id': pk,
+                    'name': entry['name'],
+                    'restaurant_id': entry['restaurant_id'],
+                    'restaurant_name': self.entries[('restaurant', entry['restaurant_id'])]['name'],
+                    'score': round(score, 3)
+                })
+            return suggestions
+
+
+index = Autocomplete()
+sync = IndexSync('autocomplete', index)
+
+
+def suggest(query, limit=DEFAULT_LIMIT):
+    """Suggest from the process's index, first catching up with changes made anywhere"""
+    sync.refresh()
+    return index.suggest(query, limit)
+
+
+def record_change(model, pk):
+    """Log a committed change to a Restaurant or Food for every process's index"""
+    return sync.record_change(model, pk)
@@ -0,0 +1,124 @@
+# core/cart_service.py
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import Cart, CartItem, Food
+from .reservation_service import hold_many, with_available_to_sell
+
+
+def get_cart(user):
+    """
+    Load the user's cart with everything CartSerializer reads (items, foods,
+    categories and addons) in a fixed number of queries, however big it is.
+    """
+    cart = Cart.objects.filter(user=user).prefetch_related(
+        Prefetch(
+            'items',
+            queryset=CartItem.objects.select_related('food__category').prefetch_related(
+                'food__available_addons'
+            ).order_by('id')
+        )
+    ).first()
+    if cart is None:
+        cart = Cart.objects.create(user=user)
+    return cart
+
+
+class CartError(Exception):
+    """Raised when cart lines can't be added; `items` holds per-line errors"""
+
+    def __init__(self, message, items=None, status=400):
+        super().__init__(message)
+        self.message = message
+        self.items = items or []
+        self.status = status
+
+
+class CartService:
+    """
+    Bulk cart mutations.
+
+    A whole batch of lines (e.g. a reorder or a bundle) is validated against
+    availability and unheld stock with one query, then written with bulk
+    upserts, so the cost doesn't grow with the number of lines.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def add_items(self, lines):
+        """
+        Add `lines` ({food_id, quantity, variants, addons}) to the cart. Quantities
+        are added to any existing line for the same food, like CartViewSet.create.
+        Either every line is added or none are.
+        """
+        lines = self.merge_lines(lines)
+        cart, _ = Cart.objects.get_or_create(user=self.user)
+
+        with transaction.atomic():
+            existing = {item.food_id: item for item in cart.items.filter(food_id__in=lines)}
+            foods = {
+                food.id: food
+                for food in with_available_to_sell(
+                    Food.objects.select_for_update().filter(id__in=lines), cart.id
+                )
+            }
+
+            errors = []
+            for food_id, line in lines.items():
+                error = self.check_line(foods.get(food_id), line, existing.get(food_id))
+                if error:
+                    errors.append({'food_id': food_id, 'error': error})
+            if errors:
+                raise CartError('Some items could not be added to cart', errors)
+
+            to_create, to_update = [], []
+            for food_id, line in lines.items():
+                item = existing.get(food_id)
+                if item is None:
+                    to_create.append(CartItem(cart=cart, food_id=food_id, **line))
+                else:
+                    item.quantity += line['quantity']
+                    item.variants = line['variants']
+                    item.addons = line['addons']
+                    to_update.append(item)
+
+            CartItem.objects.bulk_update(to_update, ['quantity', 'variants', 'addons'])
+            created = CartItem.objects.bulk_create(to_create)
+            hold_many(to_update + created)
+
+        return cart
+
+    @staticmethod
+    def merge_lines(lines):
+        """Collapse repeated food_ids into one line; the last variants/addons win"""
+        merged = {}
+        for line in lines:
+            food_id = line['food_id']
+            if food_id in merged:
+                merged[food_id]['quantity'] += line['quantity']
+                merged[food_id]['variants'] = line['variants']
+                merged[food_id]['addons'] = line['addons']
+            else:
+                merged[food_id] = {
+                    'quantity': line['quantity'],
+                    'variants': line['variants'],
+                    'addons': line['addons']
+                }
+        return merged
+
+    @staticmethod
+    def check_line(food, line, item):
+        if food is None:
+            return 'Item not found'
+        if not food.is_available:
+            return f'{food.name} is currently unavailable'
+        in_cart = item.quantity if item else 0
+        remaining = max(0, food.available_to_sell - in_cart)
+        if line['quantity'] > remaining:
+            if item is None:
+                return f'Only {remaining} {food.name} available in stock'
+            if remaining == 0:
+                return f'No more {food.name} available in stock'
+            return f'Only {remaining} more {food.name} can be added to cart'
+        return None
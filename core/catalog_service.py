@@ -0,0 +1,251 @@
+# core/catalog_service.py
+"""
+Filtered, faceted and sorted browsing of the food catalogue.
+
+Filters (?category=, ?is_veg=, ?min_price=/?max_price=, ?is_available=,
+?cuisine=, ?restaurant=) are applied in the database, backed by the
+Food(category, is_available, price) and Food(restaurant, is_available)
+indexes, and only the requested page is loaded. Facet counts come from three
+aggregate queries next to the page. Each facet is counted with every filter
+except its own, so a client can see how many items picking another value
+would give. A distance sort only considers restaurants within a radius,
+found with the geohash range scans behind Restaurant.nearby.
+
+refine_search applies the same filters, facets and sorts to search results.
+"""
+import math
+from datetime import timedelta
+
+from django.db.models import Count, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .analytics_service import UNSOLD_STATUSES
+from .models import Food, OrderLine, Restaurant
+
+SORTS = ('price', '-price', 'popularity', 'distance')
+# Deeper pages would overflow the database's OFFSET
+MAX_PAGE = 10_000
+SEARCH_SORTS = ('relevance', 'price', 'rating', 'distance')
+# Search hits (best first) that filters, sorts and facets are applied to
+MAX_REFINED_HITS = 200
+# Popularity is units sold over this many days
+POPULARITY_DAYS = 30
+
+TRUE_VALUES = ('true', '1', 'yes')
+FALSE_VALUES = ('false', '0', 'no')
+
+
+def parse_bool(name, value):
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ValueError(f'{name} must be true or false')
+
+
+def parse_number(name, value, cast=float):
+    try:
+        number = cast(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+    # nan and inf cast cleanly but no DecimalField lookup accepts them
+    if not math.isfinite(number):
+        raise ValueError(f'{name} must be a number')
+    return number
+
+
+def parse_filters(params):
+    """{facet: Q} for the filters in `params`; ValueError when one is invalid"""
+    filters = {}
+    if params.get('restaurant'):
+        filters['restaurant'] = Q(restaurant_id=parse_number('restaurant', params['restaurant'], int))
+    if params.get('category'):
+        ids = [parse_number('category', pk, int) for pk in params['category'].split(',')]
+        filters['category'] = Q(category_id__in=ids)
+    if params.get('is_veg'):
+        filters['is_veg'] = Q(is_veg=parse_bool('is_veg', params['is_veg']))
+    if params.get('is_available'):
+        filters['is_available'] = Q(is_available=parse_bool('is_available', params['is_available']))
+    if params.get('cuisine'):
+        filters['cuisine'] = Q(restaurant__cuisine__iexact=params['cuisine'])
+
+    price = Q()
+    if params.get('min_price'):
+        price &= Q(price__gte=parse_number('min_price', params['min_price']))
+    if params.get('max_price'):
+        price &= Q(price__lte=parse_number('max_price', params['max_price']))
+    if price:
+        filters['price'] = price
+    return filters
+
+
+def combine(filters, without=None):
+    combined = Q()
+    for name, condition in filters.items():
+        if name != without:
+            combined &= condition
+    return combined
+
+
+def facets(filters, foods=None):
+    """Counts per category, veg flag, availability and cuisine, and the price range, over `foods` (default all)"""
+    foods = Food.objects.all() if foods is None else foods
+
+    def counted(value, facet):
+        return Count('id', filter=combine(filters, without=facet) & value)
+
+    price_filter = combine(filters, without='price') or None
+    totals = foods.aggregate(
+        veg=counted(Q(is_veg=True), 'is_veg'),
+        non_veg=counted(Q(is_veg=False), 'is_veg'),
+        available=counted(Q(is_available=True), 'is_available'),
+        unavailable=counted(Q(is_available=False), 'is_available'),
+        min_price=Min('price', filter=price_filter),
+        max_price=Max('price', filter=price_filter)
+    )
+    categories = foods.filter(combine(filters, without='category')).values(
+        'category_id', 'category__name'
+    ).annotate(count=Count('id')).order_by('category__name')
+    cuisines = foods.filter(combine(filters, without='cuisine')).values(
+        'restaurant__cuisine'
+    ).annotate(count=Count('id')).order_by('restaurant__cuisine')
+
+    return {
+        'category': [
+            {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']} for row in categories
+        ],
+        'is_veg': {'true': totals['veg'], 'false': totals['non_veg']},
+        'is_available': {'true': totals['available'], 'false': totals['unavailable']},
+        'price': {
+            'min': float(totals['min_price']) if totals['min_price'] is not None else None,
+            'max': float(totals['max_price']) if totals['max_price'] is not None else None
+        },
+        'cuisine': [{'name': row['restaurant__cuisine'], 'count': row['count']} for row in cuisines]
+    }
+
+
+def with_popularity(foods):
+    since = timezone.now() - timedelta(days=POPULARITY_DAYS)
+    sold = OrderLine.objects.filter(food=OuterRef('pk'), created_at__gte=since).exclude(
+        order__status__in=UNSOLD_STATUSES
+    ).values('food').annotate(units=Sum('quantity')).values('units')
+    return foods.annotate(popularity=Coalesce(Subquery(sold, output_field=IntegerField()), Value(0)))
+
+
+def browse(params, location=None, page=1, page_size=20, radius_km=None):
+    """
+    One page of foods matching the filters in `params`, sorted by ?sort=
+    (price, -price, popularity or distance from `location`, within
+    `radius_km`), with the total count and facets. ValueError when a
+    parameter is invalid.
+    """
+    filters = parse_filters(params)
+    sort = params.get('sort') or None
+    if sort is not None and sort not in SORTS:
+        raise ValueError(f'sort must be one of {", ".join(SORTS)}')
+    if sort == 'distance' and location is None:
+        raise ValueError('sort=distance needs lat and lng (or a default address)')
+
+    distances = {}
+    if sort == 'distance':
+        # Indexed geohash scans pick the restaurants in range; only their foods are ranked
+        in_range = Restaurant.nearby(*location, radius_km, queryset=Restaurant.objects.only('id', 'lat', 'lng'))
+        distances = {restaurant.id: restaurant.distance_km for restaurant in in_range}
+        filters['nearby'] = Q(restaurant_id__in=list(distances))
+
+    foods = Food.objects.filter(combine(filters))
+    offset = (page - 1) * page_size
+    count = foods.count()
+
+    if sort == 'distance':
+        ranked = sorted(
+            (distances[restaurant_id], pk) for pk, restaurant_id in foods.values_list('id', 'restaurant_id')
+        )[offset:offset + page_size]
+        loaded = foods.select_related('category').prefetch_related('available_addons').in_bulk(
+            [pk for _, pk in ranked]
+        )
+        results = []
+        for distance, pk in ranked:
+            loaded[pk].distance_km = distance
+            results.append(loaded[pk])
+    else:
+        if sort == 'popularity':
+            foods = with_popularity(foods).order_by('-popularity', 'id')
+        elif sort in ('price', '-price'):
+            foods = foods.order_by(sort, 'id')
+        else:
+            foods = foods.order_by('id')
+        results = list(
+            foods.select_related('category').prefetch_related('available_addons')[offset:offset + page_size]
+        )
+
+    return {'results': results, 'count': count, 'facets': facets(filters)}
+
+
+def refine_search(hits, params, location=None):
+    """
+    Search hits ([{'restaurant_id', 'score', 'food_ids'}], best first)
+    narrowed to restaurants with foods matching the filters in `params`,
+    their listed foods narrowed the same way, and sorted by ?sort=
+    (relevance, price of the cheapest matching food, rating or distance
+    from `location`). Returns (hits, facets): facets over the hit
+    restaurants' foods when ?facets=true or a filter is given, else None.
+    ValueError when a parameter is invalid.
+
+    Plain relevance-ordered searches (autocomplete-style typing) are
+    returned as they are without touching the database; anything else
+    considers only the best MAX_REFINED_HITS hits.
+    """
+    filters = parse_filters(params)
+    sort = params.get('sort') or 'relevance'
+    if sort not in SEARCH_SORTS:
+        raise ValueError(f'sort must be one of {", ".join(SEARCH_SORTS)}')
+    if sort == 'distance' and location is None:
+        raise ValueError('sort=distance needs lat and lng (or a default address)')
+    want_facets = bool(filters) or bool(params.get('facets')) and parse_bool('facets', params['facets'])
+    if not filters and not want_facets and sort == 'relevance':
+        return hits, None
+
+    hits = hits[:MAX_REFINED_HITS]
+    restaurant_ids = [hit['restaurant_id'] for hit in hits]
+    foods = Food.objects.filter(restaurant_id__in=restaurant_ids)
+    found_facets = facets(filters, foods) if want_facets else None
+    if not hits:
+        return hits, found_facets
+
+    cheapest = None
+    if filters or sort == 'price':
+        matching = foods.filter(combine(filters))
+        cheapest = dict(matching.values('restaurant_id').annotate(cheapest=Min('price')).values_list(
+            'restaurant_id', 'cheapest'
+        ).order_by())
+    if filters:
+        listed = set(matching.filter(
+            id__in=[pk for hit in hits for pk in hit['food_ids']]
+        ).values_list('id', flat=True))
+        hits = [
+            {**hit, 'food_ids': [pk for pk in hit['food_ids'] if pk in listed]}
+            for hit in hits if hit['restaurant_id'] in cheapest
+        ]
+
+    # sorted() is stable, so ties keep their relevance order
+    if sort == 'price':
+        hits = sorted(hits, key=lambda hit: cheapest.get(hit['restaurant_id'], float('inf')))
+    elif sort == 'rating':
+        ratings = {
+            pk: total / count if count else 0
+            for pk, total, count in Restaurant.objects.filter(id__in=restaurant_ids).values_list(
+                'id', 'rating_sum', 'rating_count'
+            )
+        }
+        hits = sorted(hits, key=lambda hit: -ratings.get(hit['restaurant_id'], 0))
+    elif sort == 'distance':
+        from .geo import distances_km
+
+        rows = list(Restaurant.objects.filter(id__in=restaurant_ids).values_list('id', 'lat', 'lng'))
+        distance = dict(zip(
+            (row[0] for row in rows), distances_km(*location, [row[1] for row in rows], [row[2] for row in rows])
+        ))
+        hits = sorted(hits, key=lambda hit: distance.get(hit['restaurant_id'], float('inf')))
+    return hits, found_facets
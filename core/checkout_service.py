@@ -0,0 +1,235 @@
+# core/checkout_service.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Value, When
+
+from .menu_service import invalidate_on_commit
+from .models import Address, CartItem, Food, Notification, Order, OrderLine
+from .reservation_service import held_by_others, with_available_to_sell
+
+DELIVERY_FEE = Decimal('5.00')
+
+
+def resolve_addons(food, addons):
+    """
+    Match a cart line's addons (ids, names or {id, name} dicts) against the
+    food's available addons. Unknown entries are ignored for pricing.
+    Expects food.available_addons to be prefetched.
+    """
+    if not addons:
+        return []
+
+    by_id, by_name = {}, {}
+    for addon in food.available_addons.all():
+        by_id[addon.id] = addon
+        by_name[addon.name.lower()] = addon
+
+    resolved = []
+    for entry in addons or []:
+        if isinstance(entry, dict):
+            entry = entry.get('id') or entry.get('name')
+        if isinstance(entry, int):
+            addon = by_id.get(entry)
+        elif isinstance(entry, str):
+            addon = by_id.get(int(entry)) if entry.isdigit() else by_name.get(entry.strip().lower())
+        else:
+            addon = None
+        if addon is not None:
+            resolved.append(addon)
+    return resolved
+
+
+def line_subtotal(food, quantity, addons):
+    """Price of one cart/order line: (unit price + addon prices) x quantity"""
+    unit_price = food.price + sum((addon.price for addon in resolve_addons(food, addons)), Decimal('0'))
+    return unit_price * quantity
+
+
+def snapshot_line(food, quantity, variants, addons):
+    """
+    The order line as it was sold: name, unit price, addon prices and line
+    subtotal are frozen so order history never needs to look up Food again.
+    Money is stored as strings to keep it exact inside the JSON.
+    """
+    addon_details = [
+        {'id': addon.id, 'name': addon.name, 'price': str(addon.price)}
+        for addon in resolve_addons(food, addons)
+    ]
+    return {
+        'food_id': food.id,
+        'food_name': food.name,
+        'food_price': str(food.price),
+        'quantity': quantity,
+        'variants': variants or [],
+        'addons': addons or [],
+        'addon_details': addon_details,
+        'subtotal': str(line_subtotal(food, quantity, addons))
+    }
+
+
+def build_order_lines(order, foods):
+    """
+    Unsaved OrderLine rows for `order`'s items. `foods` maps food_id to Food
+    and supplies the category (and prices for items without a snapshot);
+    lines whose food no longer exists keep their snapshot with no food.
+    """
+    lines = []
+    for item in order.items:
+        food = foods.get(item['food_id'])
+        if 'food_name' not in item:
+            if food is None:
+                continue
+            item = snapshot_line(food, item['quantity'], item.get('variants'), item.get('addons'))
+        lines.append(OrderLine(
+            order=order,
+            restaurant_id=order.restaurant_id,
+            food=food,
+            category_id=food.category_id if food else None,
+            name=item['food_name'],
+            unit_price=Decimal(item['food_price']),
+            quantity=item['quantity'],
+            line_total=Decimal(item['subtotal']),
+            created_at=order.created_at
+        ))
+    return lines
+
+
+class CheckoutError(Exception):
+    """Raised when a cart cannot be turned into an order"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class CheckoutService:
+    """
+    Turns a customer's cart into an order.
+
+    Stock for every cart line is decremented by a single conditional UPDATE
+    inside the same transaction that creates the order, so two customers
+    racing for the last items can never both win, and a failure on any line
+    rolls back the whole order. The number of queries does not depend on
+    how many items are in the cart.
+
+    Stock held by other customers' carts is not for sale; the customer's
+    own holds are converted into the decrement and released with the cart.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def place_order(self, address_id=None, current_location=None, payment_method='cod', note=''):
+        address = self.get_delivery_address(address_id, current_location)
+
+        with transaction.atomic():
+            cart_items = list(
+                CartItem.objects.filter(cart__user=self.user).select_related(
+                    'food__restaurant'
+                ).prefetch_related('food__available_addons').annotate(
+                    held_by_others=held_by_others(OuterRef('food_id'), OuterRef('cart_id'))
+                )
+            )
+            if not cart_items:
+                raise CheckoutError('Empty cart')
+            cart_id = cart_items[0].cart_id
+
+            quantities = defaultdict(int)
+            for item in cart_items:
+                quantities[item.food_id] += item.quantity
+
+            # Fail fast with a helpful message before taking any write locks
+            for item in cart_items:
+                self.check_stock(
+                    item.food, quantities[item.food_id], item.food.stock_quantity - item.held_by_others
+                )
+
+            if not self.decrement_stock(quantities, cart_id):
+                # Someone else bought the stock between our read and the update.
+                # Re-read the current numbers so the error says what's left.
+                foods = with_available_to_sell(Food.objects.filter(id__in=quantities), cart_id)
+                for food in foods:
+                    self.check_stock(food, quantities[food.id], food.available_to_sell)
+                raise CheckoutError('Some items in your cart are no longer available')
+            # The bulk stock update sends no signals
+            invalidate_on_commit(item.food.restaurant_id for item in cart_items)
+
+            items = [
+                snapshot_line(item.food, item.quantity, item.variants, item.addons)
+                for item in cart_items
+            ]
+            subtotal = sum((Decimal(line['subtotal']) for line in items), Decimal('0'))
+
+            order_data = {
+                'user': self.user,
+                'restaurant': cart_items[0].food.restaurant,
+                'address': address,
+                'items': items,
+                'subtotal': subtotal,
+                'delivery_fee': DELIVERY_FEE,
+                'total': subtotal + DELIVERY_FEE,
+                'payment_method': payment_method,
+                'note': note
+            }
+            # Store the delivery location when the customer is using their current location
+            if current_location and not address:
+                order_data['delivery_location'] = current_location
+
+            order = Order.objects.create(**order_data)
+            OrderLine.objects.bulk_create(
+                build_order_lines(order, {item.food_id: item.food for item in cart_items})
+            )
+
+            CartItem.objects.filter(id__in=[item.id for item in cart_items]).delete()
+            Notification.objects.create(user=self.user, message='Order placed!')
+
+        return order
+
+    def get_delivery_address(self, address_id, current_location):
+        """Resolve the saved address, or None when delivering to the current location"""
+        if address_id:
+            try:
+                return Address.objects.get(id=address_id, user=self.user)
+            except Address.DoesNotExist:
+                raise CheckoutError('Invalid address')
+        if current_location:
+            return None
+        raise CheckoutError('Address or current location required')
+
+    @staticmethod
+    def check_stock(food, quantity, available):
+        if not food.is_available:
+            raise CheckoutError(f'{food.name} is currently unavailable')
+        if available < quantity:
+            raise CheckoutError(
+                f'Insufficient stock for {food.name}. Only {max(0, available)} available.'
+            )
+
+    @staticmethod
+    def decrement_stock(quantities, cart_id):
+        """
+        Decrement stock for every food in one statement, only where enough
+        stock remains once other carts' live holds are set aside. Returns
+        False if any line could not be fulfilled; the caller must then roll
+        back.
+        """
+        quantity = Case(
+            *[When(id=food_id, then=Value(qty)) for food_id, qty in quantities.items()],
+            output_field=IntegerField()
+        )
+        updated = Food.objects.filter(
+            id__in=list(quantities),
+            is_available=True,
+            stock_quantity__gte=quantity + held_by_others(OuterRef('pk'), cart_id)
+        ).update(
+            stock_quantity=F('stock_quantity') - quantity,
+            # Auto-disable items that sell out
+            is_available=Case(
+                When(stock_quantity=quantity, then=Value(False)),
+                default=F('is_available')
+            )
+        )
+        return updated == len(quantities)
@@ -0,0 +1,24 @@
+# core/checks.py
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+
+def shared_cache():
+    """Whether the default cache is seen by every process (Redis, Memcached, database...)"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if shared_cache():
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint=(
+            'Cached metrics and their locks, the search and autocomplete change logs and menu versions '
+            'must be shared by every worker. Configure Redis, Memcached or DatabaseCache in CACHES.'
+        ),
+        id='core.W001',
+    )]
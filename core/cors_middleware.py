@@ -36,7 +36,7 @@ class CustomCorsMiddleware:
         response['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
         response['Access-Control-Allow-Headers'] = (
             'accept, accept-encoding, authorization, content-type, dnt, '
-            'origin, user-agent, x-csrftoken, x-requested-with'
+            'origin, user-agent, x-csrftoken, x-requested-with, idempotency-key'
         )
         response['Access-Control-Max-Age'] = '86400'
         
@@ -0,0 +1,216 @@
+# core/export_views.py
+"""
+Streaming CSV exports.
+
+Rows are read with values_list().iterator(), which fetches in chunks
+(server-side cursors where the database supports them), and written one at
+a time into a StreamingHttpResponse. Memory stays flat however many years
+an export covers, and the first bytes go out before the last row is read.
+"""
+import csv
+import heapq
+from abc import ABC, abstractmethod
+from datetime import date
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import LoginLog, Order, Restaurant, WithdrawalRequest
+from .rollup_service import commission_rate, split_revenue
+
+DEFAULT_CHUNK_SIZE = 2000
+# Spreadsheets run a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object for csv.writer that hands each written line straight back"""
+
+    def write(self, value):
+        return value
+
+
+def escape_cell(value):
+    """Quote a text cell that a spreadsheet would otherwise run as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(filename, header, rows):
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for row in rows:
+            # Names, emails, addresses and user agents are user input
+            yield writer.writerow([escape_cell(value) for value in row])
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def chunked(queryset, *fields):
+    return queryset.values_list(*fields).iterator(
+        chunk_size=getattr(settings, 'EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    )
+
+
+def local(moment):
+    return timezone.localtime(moment).strftime('%Y-%m-%d %H:%M:%S') if moment else ''
+
+
+def describe_items(items):
+    """Order items as "Name x2; Other x1" from the checkout snapshot, without touching Food"""
+    return '; '.join(
+        f"{item.get('food_name') or '#' + str(item['food_id'])} x{item['quantity']}" for item in items
+    )
+
+
+def delivery_address(title, address, location):
+    if address:
+        return f"{title} - {address}"
+    if location:
+        return location.get('address', '')
+    return ''
+
+
+class ExportView(ABC, APIView):
+    """Base for CSV exports: date-range filtering and streaming; subclasses implement export"""
+    permission_classes = [IsAuthenticated]
+    date_field = 'created_at'
+
+    def get(self, request):
+        error = self.check_access(request)
+        if error:
+            return error
+
+        try:
+            start = date.fromisoformat(request.GET['from']) if request.GET.get('from') else None
+            end = date.fromisoformat(request.GET['to']) if request.GET.get('to') else None
+        except ValueError:
+            return Response({'error': 'from/to must be dates in YYYY-MM-DD format'}, status=400)
+
+        filename, header, rows = self.export(request, start, end)
+        return stream_csv(filename, header, rows)
+
+    def check_access(self, request):
+        return None
+
+    def in_range(self, queryset, start, end, date_field=None):
+        date_field = date_field or self.date_field
+        if start:
+            queryset = queryset.filter(**{f'{date_field}__date__gte': start})
+        if end:
+            queryset = queryset.filter(**{f'{date_field}__date__lte': end})
+        return queryset
+
+    @abstractmethod
+    def export(self, request, start, end):
+        """(filename, header, rows) for the export between `start` and `end` (either may be None)"""
+
+
+class RestaurantExportView(ExportView):
+    def check_access(self, request):
+        self.restaurant = Restaurant.objects.filter(owner=request.user).first()
+        if self.restaurant is None:
+            return Response({'error': 'Restaurant not found'}, status=404)
+
+
+class RestaurantOrdersExportView(RestaurantExportView):
+    def export(self, request, start, end):
+        orders = self.in_range(
+            Order.objects.filter(restaurant=self.restaurant), start, end
+        ).order_by('created_at', 'id')
+        rows = (
+            [order_id, local(created_at), status, email, describe_items(items), subtotal, fee, total, method, paid]
+            for order_id, created_at, status, email, items, subtotal, fee, total, method, paid in chunked(
+                orders, 'id', 'created_at', 'status', 'user__email', 'items',
+                'subtotal', 'delivery_fee', 'total', 'payment_method', 'payment_status'
+            )
+        )
+        header = ['Order ID', 'Placed At', 'Status', 'Customer', 'Items',
+                  'Subtotal', 'Delivery Fee', 'Total', 'Payment Method', 'Payment Status']
+        return f'orders-{self.restaurant.id}.csv', header, rows
+
+
+class RestaurantEarningsExportView(RestaurantExportView):
+    """Ledger of delivered orders (credits) and withdrawal requests (debits), oldest first"""
+
+    def export(self, request, start, end):
+        rate = commission_rate(self.restaurant.id)
+
+        orders = self.in_range(
+            Order.objects.filter(restaurant=self.restaurant, status='delivered'), start, end
+        ).order_by('created_at', 'id')
+        withdrawals = self.in_range(
+            WithdrawalRequest.objects.filter(restaurant=self.restaurant), start, end, 'requested_at'
+        ).order_by('requested_at', 'id')
+
+        def order_entries():
+            for order_id, created_at, total in chunked(orders, 'id', 'created_at', 'total'):
+                commission, net = split_revenue(total, rate)
+                yield created_at, ['order', f'Order #{order_id}', total, commission, net, 'delivered']
+
+        def withdrawal_entries():
+            for withdrawal_id, requested_at, amount, status in chunked(
+                withdrawals, 'id', 'requested_at', 'amount', 'status'
+            ):
+                yield requested_at, ['withdrawal', f'Withdrawal #{withdrawal_id}', '', '', -amount, status]
+
+        # Both sources are already in time order, so merging them stays streaming
+        rows = (
+            [local(moment), *entry]
+            for moment, entry in heapq.merge(order_entries(), withdrawal_entries(), key=lambda pair: pair[0])
+        )
+        header = ['Date', 'Type', 'Reference', 'Gross', 'Commission', 'Net', 'Status']
+        return f'earnings-{self.restaurant.id}.csv', header, rows
+
+
+class AdminExportView(ExportView):
+    def check_access(self, request):
+        if request.user.role != 'admin':
+            return Response({'error': 'Access denied'}, status=403)
+
+
+class AdminOrdersExportView(AdminExportView):
+    def export(self, request, start, end):
+        orders = self.in_range(Order.objects.all(), start, end).order_by('created_at', 'id')
+        status = request.GET.get('status')
+        if status:
+            orders = orders.filter(status=status)
+        rows = (
+            [order_id, local(created_at), status, restaurant, customer, rider or '',
+             delivery_address(title, address, location), describe_items(items),
+             subtotal, fee, total, method, paid]
+            for (order_id, created_at, status, restaurant, customer, rider, title, address, location, items,
+                 subtotal, fee, total, method, paid) in chunked(
+                orders, 'id', 'created_at', 'status', 'restaurant__name', 'user__email', 'rider__email',
+                'address__title', 'address__address', 'delivery_location', 'items',
+                'subtotal', 'delivery_fee', 'total', 'payment_method', 'payment_status'
+            )
+        )
+        header = ['Order ID', 'Placed At', 'Status', 'Restaurant', 'Customer', 'Rider', 'Delivery Address',
+                  'Items', 'Subtotal', 'Delivery Fee', 'Total', 'Payment Method', 'Payment Status']
+        return 'orders.csv', header, rows
+
+
+class LoginLogExportView(AdminExportView):
+    date_field = 'login_time'
+
+    def export(self, request, start, end):
+        logs = self.in_range(LoginLog.objects.all(), start, end).order_by('-login_time', '-id')
+        rows = (
+            [local(login_time), email, role, 'yes' if success else 'no', reason or '', ip or '', agent or '']
+            for login_time, email, role, success, reason, ip, agent in chunked(
+                logs, 'login_time', 'user__email', 'user__role', 'success', 'failure_reason',
+                'ip_address', 'user_agent'
+            )
+        )
+        header = ['Login Time', 'User', 'Role', 'Success', 'Failure Reason', 'IP Address', 'User Agent']
+        return 'login-logs.csv', header, rows
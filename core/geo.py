@@ -0,0 +1,105 @@
+# core/geo.py
+"""
+Great-circle distances with NumPy, and geohash cells for radius searches.
+
+Every caller that needs distances (restaurant delivery times, rider ETAs,
+distances from a rider to the pickup pool) goes through these functions,
+which take whole arrays of coordinates and compute the haversine formula
+for all of them in one vectorized pass instead of once per object.
+
+Geohashes give each point a string whose prefixes name ever smaller grid
+cells, so "everything within r km" becomes a handful of indexed string
+range scans (covering_prefixes) followed by exact distances on the few
+rows they return.
+"""
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Stored precision: 9 characters is a cell of about 5 m
+GEOHASH_PRECISION = 9
+# Most cells a radius search may scan; larger radii fall back to coarser cells
+MAX_COVERING_CELLS = 16
+
+
+def _haversine(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(value, dtype=float)) for value in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    # Rounding can push a a hair past 1 for antipodal points
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Distance between two points, in km"""
+    return float(_haversine(lat1, lng1, lat2, lng2))
+
+
+def distances_km(lat, lng, lats, lngs):
+    """Distances from one point to each of N points, as an array of length N"""
+    return _haversine(lat, lng, lats, lngs)
+
+
+def distance_matrix_km(lats1, lngs1, lats2, lngs2):
+    """Distances from each of N points to each of M points, as an N×M array"""
+    return _haversine(
+        np.asarray(lats1, dtype=float)[:, None], np.asarray(lngs1, dtype=float)[:, None],
+        np.asarray(lats2, dtype=float)[None, :], np.asarray(lngs2, dtype=float)[None, :]
+    )
+
+
+def travel_minutes(distance, speed_kmh):
+    """Minutes to cover `distance` km (scalar or array) at `speed_kmh`"""
+    return np.asarray(distance, dtype=float) / speed_kmh * 60
+
+
+def geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Geohash of a point: alternately halve the longitude and latitude ranges, 5 bits per character"""
+    ranges = {'lng': [-180.0, 180.0], 'lat': [-90.0, 90.0]}
+    value = {'lng': lng, 'lat': lat}
+    chars, bits, bit_count, axis = [], 0, 0, 'lng'
+    while len(chars) < precision:
+        low, high = ranges[axis]
+        mid = (low + high) / 2
+        if value[axis] >= mid:
+            bits, ranges[axis][0] = bits * 2 + 1, mid
+        else:
+            bits, ranges[axis][1] = bits * 2, mid
+        axis = 'lat' if axis == 'lng' else 'lng'
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell with `precision` characters"""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def covering_prefixes(lat, lng, radius_km):
+    """
+    Geohash prefixes whose cells together cover every point within
+    `radius_km` of (lat, lng): the finest precision that needs at most
+    MAX_COVERING_CELLS cells for the circle's bounding box.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    west, east = max(lng - dlng, -180.0), min(lng + dlng, 180.0)
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = range(int((south + 90) // height), int((north + 90) // height) + 1)
+        columns = range(int((west + 180) // width), int((east + 180) // width) + 1)
+        if len(rows) * len(columns) <= MAX_COVERING_CELLS or precision == 1:
+            # Hash each cell's centre to name it
+            return sorted({
+                geohash(-90 + (row + 0.5) * height, -180 + (column + 0.5) * width, precision)
+                for row in rows for column in columns
+            })
@@ -0,0 +1,150 @@
+# core/idempotency.py
+"""
+Idempotency-Key support for POST endpoints that create orders or move money.
+
+Clients send a unique ``Idempotency-Key`` header with each logical request and
+reuse it on retries. The first request does the work and its response is
+stored; duplicates within the TTL get the stored response replayed, and a
+duplicate that arrives while the first is still running waits for it instead
+of doing the work twice. A claim still in progress after the lease
+(IDEMPOTENCY_LEASE seconds) is taken to belong to a worker that died, and
+the next request with its key claims it afresh.
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+
+# How long a stored response is replayed for (seconds)
+DEFAULT_TTL = 60 * 60 * 24
+# How long a duplicate waits on an in-flight request before giving up (seconds)
+DEFAULT_WAIT_TIMEOUT = 10
+# How long an in-progress claim holds its key before a retry may take it over (seconds)
+DEFAULT_LEASE = 60
+POLL_INTERVAL = 0.1
+
+
+def idempotent(view_method):
+    """Decorator for APIView/ViewSet handlers that should honour Idempotency-Key"""
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER, '').strip()
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response({'error': 'Idempotency-Key must be at most 255 characters'}, status=400)
+
+        endpoint = f"{request.method} {request.path}"
+        request_hash = fingerprint(request)
+
+        record, created = claim_key(request.user, key, endpoint, request_hash)
+        if record is None:
+            return Response({
+                'error': 'A request with this Idempotency-Key is still being processed'
+            }, status=409)
+        if not created:
+            return replay(record, endpoint, request_hash)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500 or not isinstance(response, Response):
+            # Let the client retry server errors with the same key
+            record.delete()
+            return response
+
+        # Matches no row if the lease ran out and a retry took the key over
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            status='completed', response_status=response.status_code, response_body=response.data
+        )
+        return response
+
+    return wrapper
+
+
+def fingerprint(request):
+    """Hash of the request body, used to reject a key reused for a different request"""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def claim_key(user, key, endpoint, request_hash):
+    """
+    Insert an in-progress record for the key. Returns (record, True) if this
+    request owns the key, or (existing_record, False) for a duplicate.
+    """
+    ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', DEFAULT_TTL)
+    now = timezone.now()
+    lease_start = now - timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LEASE', DEFAULT_LEASE))
+
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    endpoint=endpoint,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=ttl)
+                )
+            return record, True
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if existing is None:
+                continue  # The other request failed and released the key
+            if existing.expires_at <= now:
+                # Expired keys are free to be used again
+                IdempotencyKey.objects.filter(id=existing.id, expires_at__lte=now).delete()
+                continue
+            if existing.status == 'in_progress' and existing.created_at <= lease_start:
+                # Its worker died mid-request; the key is free again
+                IdempotencyKey.objects.filter(
+                    id=existing.id, status='in_progress', created_at__lte=lease_start
+                ).delete()
+                continue
+            return existing, False
+
+    return None, False
+
+
+def replay(record, endpoint, request_hash):
+    """Return the stored response for a duplicate, waiting if the original is still running"""
+    if record.endpoint != endpoint or record.request_hash != request_hash:
+        return Response({
+            'error': 'Idempotency-Key has already been used for a different request'
+        }, status=422)
+
+    timeout = getattr(settings, 'IDEMPOTENCY_WAIT_TIMEOUT', DEFAULT_WAIT_TIMEOUT)
+    deadline = time.monotonic() + timeout
+    while record.status != 'completed':
+        if time.monotonic() >= deadline:
+            return Response({
+                'error': 'A request with this Idempotency-Key is still being processed'
+            }, status=409)
+        time.sleep(POLL_INTERVAL)
+        try:
+            record.refresh_from_db()
+        except IdempotencyKey.DoesNotExist:
+            # The original request failed; the client should retry
+            return Response({
+                'error': 'The original request with this Idempotency-Key failed, please retry'
+            }, status=409)
+
+    response = Response(record.response_body, status=record.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
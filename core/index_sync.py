@@ -0,0 +1,101 @@
+# core/index_sync.py
+"""
+Keeps a per-process in-memory index (search, autocomplete) in step with
+every other process through the shared cache.
+
+Each committed change is appended to a change log in the cache: a counter
+(the index version) and one entry per version naming the changed
+(model, pk). Before a read, a process replays the entries it hasn't seen yet
+through its index's update(model, pk), so a change costs every process one
+row re-index rather than a rebuild. A process falls back to a full rebuild
+only when it has no index yet, has fallen further behind than the log keeps,
+finds an entry missing (evicted, or not written yet), or its index is older
+than INDEX_MAX_AGE seconds, a backstop against changes that never reached
+the log.
+"""
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+
+# Entries a lagging process may replay before it rebuilds instead
+MAX_REPLAY = 500
+# How long change log entries are kept (seconds)
+CHANGE_LOG_TTL = 60 * 60
+DEFAULT_INDEX_MAX_AGE = 60 * 60
+
+
+class IndexSync:
+    """
+    Syncs `index`, an object with rebuild() and update(model, pk), under
+    cache keys prefixed with `name`.
+    """
+
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+        self.lock = threading.RLock()
+        self.version = None
+        self.built_at = None
+
+    @property
+    def version_key(self):
+        return f'{self.name}_version'
+
+    def change_key(self, version):
+        return f'{self.name}_change_{version}'
+
+    def current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # Seed from the clock so a lost version never matches an older index
+            cache.add(self.version_key, int(time.time() * 1000), timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def record_change(self, model, pk):
+        """Log a committed change to one row; every process applies it before its next read"""
+        change = (model._meta.label, pk)
+        while True:
+            try:
+                version = cache.incr(self.version_key)
+            except ValueError:
+                self.current_version()
+                continue
+            # add() fails if a concurrent writer got the same version from a non-atomic incr; take the next
+            if cache.add(self.change_key(version), change, timeout=CHANGE_LOG_TTL):
+                return version
+
+    def rebuild(self):
+        # Read the version first: changes logged during the rebuild are replayed (updates are idempotent)
+        version = self.current_version()
+        self.index.rebuild()
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def refresh(self):
+        """Bring this process's index up to date: replay logged changes, or rebuild"""
+        with self.lock:
+            max_age = getattr(settings, 'INDEX_MAX_AGE', DEFAULT_INDEX_MAX_AGE)
+            if self.version is None or time.monotonic() - self.built_at > max_age:
+                self.rebuild()
+                return
+
+            current = self.current_version()
+            if current == self.version:
+                return
+            if not 0 < current - self.version <= MAX_REPLAY:
+                self.rebuild()
+                return
+
+            versions = range(self.version + 1, current + 1)
+            changes = cache.get_many([self.change_key(version) for version in versions])
+            if len(changes) < len(versions):
+                self.rebuild()
+                return
+            for version in versions:
+                label, pk = changes[self.change_key(version)]
+                self.index.update(apps.get_model(label), pk)
+            self.version = current
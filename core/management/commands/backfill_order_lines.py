@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from core.checkout_service import build_order_lines
+from core.models import Food, Order, OrderLine
+
+
+class Command(BaseCommand):
+    help = 'Create OrderLine rows for orders placed before order lines were recorded'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Orders per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        orders_done = 0
+        lines_created = 0
+
+        while True:
+            batch = list(
+                Order.objects.filter(id__gt=last_id, lines__isnull=True)
+                .order_by('id')
+                .only('id', 'restaurant_id', 'items', 'created_at')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            food_ids = {item['food_id'] for order in batch for item in order.items}
+            foods = Food.objects.prefetch_related('available_addons').in_bulk(food_ids)
+
+            lines = []
+            for order in batch:
+                lines.extend(build_order_lines(order, foods))
+            OrderLine.objects.bulk_create(lines, batch_size=1000)
+
+            orders_done += len(batch)
+            lines_created += len(lines)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Created {lines_created} order lines for {orders_done} orders'
+        ))
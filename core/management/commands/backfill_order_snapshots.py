@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from core.checkout_service import snapshot_line
+from core.models import Food, Order
+
+
+class Command(BaseCommand):
+    help = (
+        'Add name/price snapshots to order items placed before checkout stored them. What each item sold '
+        'for was never recorded: current prices are scaled so the lines add up to the order\'s stored '
+        'subtotal, and lines that had to be apportioned this way are marked "estimated": true.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Orders per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+
+        while True:
+            batch = list(Order.objects.filter(id__gt=last_id).order_by('id').only('id', 'items', 'subtotal')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            stale = [order for order in batch if any('food_name' not in item for item in order.items)]
+            food_ids = {item['food_id'] for order in stale for item in order.items}
+            foods = Food.objects.prefetch_related('available_addons').in_bulk(food_ids)
+
+            for order in stale:
+                order.items = self.snapshot_items(order, foods)
+            Order.objects.bulk_update(stale, ['items'])
+            updated += len(stale)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Backfilled item snapshots for {updated} orders'))
+
+    @staticmethod
+    def snapshot_items(order, foods):
+        """The order's items with snapshots, priced to add up to its stored subtotal"""
+        lines = []
+        for item in order.items:
+            food = foods.get(item['food_id'])
+            if 'food_name' in item:
+                lines.append(item)
+            elif food is None:
+                lines.append({
+                    **item,
+                    'food_name': 'Item no longer available',
+                    'food_price': '0',
+                    'addon_details': [],
+                    'subtotal': '0'
+                })
+            else:
+                lines.append(snapshot_line(food, item['quantity'], item.get('variants'), item.get('addons')))
+
+        # Only the order's subtotal is known for sure: share it out in proportion to today's prices
+        stale = [
+            index for index, item in enumerate(order.items)
+            if 'food_name' not in item and item['food_id'] in foods
+        ]
+        current = sum(Decimal(lines[index]['subtotal']) for index in stale)
+        known = sum(Decimal(line['subtotal']) for index, line in enumerate(lines) if index not in stale)
+        if not current or order.subtotal is None or order.subtotal < known:
+            return lines
+
+        cent = Decimal('0.01')
+        factor = (order.subtotal - known) / current
+        remaining = order.subtotal - known
+        exact = len(order.items) == 1 and not lines[0]['addon_details']
+        for position, index in enumerate(stale):
+            line = lines[index]
+            if position == len(stale) - 1:
+                # The last line takes the rounding so the lines add up to the subtotal exactly
+                subtotal = remaining
+            else:
+                subtotal = (Decimal(line['subtotal']) * factor).quantize(cent)
+                remaining -= subtotal
+            line['subtotal'] = str(subtotal)
+            line['food_price'] = str((Decimal(line['food_price']) * factor).quantize(cent))
+            for addon in line['addon_details']:
+                addon['price'] = str((Decimal(addon['price']) * factor).quantize(cent))
+            if not exact:
+                line['estimated'] = True
+        return lines
@@ -0,0 +1,66 @@
+import math
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.geo import distance_matrix_km, distances_km
+from core.models import Restaurant
+
+# Dhaka-ish bounding box
+LAT_RANGE = (23.70, 23.90)
+LNG_RANGE = (90.35, 90.50)
+
+
+def python_haversine(lat1, lng1, lat2, lng2):
+    """The per-object pure-Python haversine the geo module replaced"""
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    return 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class Command(BaseCommand):
+    help = 'Time per-restaurant distance and delivery-time cost: per-object Python vs the vectorized geo module'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=10000, help='Restaurants to compute distances to')
+        parser.add_argument('--riders', type=int, default=100, help='Riders for the riders × restaurants matrix')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case (median is reported)')
+
+    def handle(self, *args, **options):
+        count, repeat = options['restaurants'], options['repeat']
+        point = lambda: (random.uniform(*LAT_RANGE), random.uniform(*LNG_RANGE))
+        lat, lng = point()
+        coords = [point() for _ in range(count)]
+        lats, lngs = [c[0] for c in coords], [c[1] for c in coords]
+        # Unsaved instances: this measures the computation, not the database
+        restaurants = [Restaurant(id=i + 1, lat=c[0], lng=c[1], prep_time_minutes=20) for i, c in enumerate(coords)]
+        riders = [point() for _ in range(options['riders'])]
+
+        cases = [
+            ('distance, per-object Python', count,
+             lambda: [python_haversine(lat, lng, a, b) for a, b in coords]),
+            ('distance, vectorized', count,
+             lambda: distances_km(lat, lng, lats, lngs)),
+            ('delivery time, one call per restaurant', count,
+             lambda: [restaurant.calculate_delivery_time(lat, lng) for restaurant in restaurants]),
+            ('delivery time, Restaurant.delivery_times', count,
+             lambda: Restaurant.delivery_times(restaurants, lat, lng)),
+            (f'{len(riders)} riders × restaurants matrix', count * len(riders),
+             lambda: distance_matrix_km([r[0] for r in riders], [r[1] for r in riders], lats, lngs)),
+        ]
+
+        for name, pairs, run in cases:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - started)
+            total = statistics.median(timings)
+            self.stdout.write(
+                f'{name}: {total * 1000:.2f} ms total, {total / pairs * 1e6:.3f} µs per distance'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Benchmarked distances to {count} restaurants'))
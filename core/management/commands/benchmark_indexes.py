@@ -0,0 +1,193 @@
+import json
+import random
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import AIChatSession, Notification, Order, OrderChatMessage, Restaurant, User
+
+RESTAURANTS = 50
+RIDERS = 100
+ORDERS_PER_CUSTOMER = 20
+BATCH_SIZE = 2000
+
+# (name, model, fields of the index it should use, queryset factory)
+HOT_QUERIES = [
+    ('restaurant orders by status', Order, ['restaurant', 'status', '-created_at'],
+     lambda s: Order.objects.filter(restaurant=s['restaurant'], status='pending').order_by('-created_at')[:20]),
+    ('rider orders by status', Order, ['rider', 'status'],
+     lambda s: Order.objects.filter(rider=s['rider'], status='out_for_delivery')),
+    ('customer order history', Order, ['user', '-created_at', '-id'],
+     lambda s: Order.objects.filter(user=s['customer']).order_by('-created_at', '-id')[:20]),
+    ('unassigned pickup pool', Order, ['status', '-created_at'],
+     lambda s: Order.objects.filter(status='ready_for_pickup', rider__isnull=True).order_by('-created_at')[:20]),
+    ('unread notifications', Notification, ['user', '-created_at'],
+     lambda s: Notification.objects.filter(user=s['customer'], is_read=False).order_by('-created_at')[:20]),
+    ('order chat', OrderChatMessage, ['order', 'created_at'],
+     lambda s: OrderChatMessage.objects.filter(order=s['order']).order_by('created_at')),
+    ('AI chat sessions', AIChatSession, ['user', '-updated_at'],
+     lambda s: AIChatSession.objects.filter(user=s['customer']).order_by('-updated_at')[:20]),
+]
+
+
+def find_index(model, fields):
+    for index in model._meta.indexes:
+        if list(index.fields) == fields:
+            return index
+    raise CommandError(f'{model.__name__} declares no index on {fields}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large dataset inside a transaction, record query plans and latencies of the hot '
+        'Order/Notification/chat queries with and without their indexes, then roll everything back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=20000, help='Orders to seed')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--output', help='Write the plans and timings to this JSON file')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail if any query does not use its index (for CI)'
+        )
+
+    def handle(self, *args, **options):
+        if not connection.features.can_rollback_ddl:
+            raise CommandError(f'{connection.vendor} cannot roll back DROP INDEX; run this against SQLite or PostgreSQL')
+
+        with transaction.atomic():
+            sample = self.seed(options['orders'])
+            self.analyze()
+            indexed = self.measure(sample, options['repeat'])
+
+            drop_index = connection.schema_editor().sql_delete_index
+            quote = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                for _, model, fields, _ in HOT_QUERIES:
+                    cursor.execute(drop_index % {
+                        'table': quote(model._meta.db_table),
+                        'name': quote(find_index(model, fields).name)
+                    })
+            self.analyze()
+            unindexed = self.measure(sample, options['repeat'])
+
+            # Drops the seeded rows and restores the indexes
+            transaction.set_rollback(True)
+
+        results = []
+        for name, model, fields, _ in HOT_QUERIES:
+            index_name = find_index(model, fields).name
+            results.append({
+                'query': name,
+                'index': index_name,
+                'uses_index': index_name in indexed[name]['plan'],
+                'indexed': indexed[name],
+                'unindexed': unindexed[name]
+            })
+        self.report(results)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'vendor': connection.vendor, 'orders': options['orders'], 'results': results}, f, indent=2)
+
+        missing = [result['query'] for result in results if not result['uses_index']]
+        if options['check'] and missing:
+            raise CommandError(f'Queries not using their index: {", ".join(missing)}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Benchmarked {len(results)} queries over {options["orders"]} orders'))
+
+    def seed(self, order_count):
+        """Bulk-insert users, restaurants, orders, notifications and chats (no signals, no rollups)"""
+        run = uuid.uuid4().hex[:8]
+        statuses = [status for status, _ in Order.STATUS_CHOICES]
+        customer_count = max(order_count // ORDERS_PER_CUSTOMER, 1)
+
+        def users(role, count):
+            return User.objects.bulk_create(
+                [User(email=f'bench-{run}-{role}-{i}@example.com', role=role) for i in range(count)],
+                batch_size=BATCH_SIZE
+            )
+
+        customers = users('customer', customer_count)
+        riders = users('rider', RIDERS)
+        restaurants = Restaurant.objects.bulk_create([
+            Restaurant(owner=owner, name=f'Bench {i}', cuisine='Bench', is_approved=True)
+            for i, owner in enumerate(users('restaurant', RESTAURANTS))
+        ])
+
+        orders = []
+        for _ in range(order_count):
+            status = random.choice(statuses)
+            unassigned = status in ('pending', 'preparing', 'ready_for_pickup', 'cancelled')
+            orders.append(Order(
+                user=random.choice(customers),
+                restaurant=random.choice(restaurants),
+                rider=None if unassigned else random.choice(riders),
+                items=[],
+                subtotal=Decimal('100.00'),
+                delivery_fee=Decimal('0'),
+                total=Decimal('100.00'),
+                payment_method='cod',
+                status=status
+            ))
+        orders = Order.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+
+        Notification.objects.bulk_create([
+            Notification(user=order.user, message='Order update', is_read=random.random() < 0.8)
+            for order in orders
+        ], batch_size=BATCH_SIZE)
+        OrderChatMessage.objects.bulk_create([
+            OrderChatMessage(order=order, sender=order.user, message='Hello')
+            for order in orders for _ in range(2)
+        ], batch_size=BATCH_SIZE)
+        AIChatSession.objects.bulk_create([
+            AIChatSession(user=customer) for customer in customers for _ in range(3)
+        ], batch_size=BATCH_SIZE)
+
+        return {
+            'customer': customers[0],
+            'rider': riders[0],
+            'restaurant': restaurants[0],
+            'order': orders[0]
+        }
+
+    def analyze(self):
+        # Let the planner see the seeded rows (and the dropped indexes)
+        if connection.vendor in ('postgresql',):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def measure(self, sample, repeat):
+        measurements = {}
+        for name, _, _, build in HOT_QUERIES:
+            queryset = build(sample)
+            # Time the SQL alone; building model instances would swamp the difference
+            sql, params = queryset.query.sql_with_params()
+            timings = []
+            with connection.cursor() as cursor:
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                    timings.append((time.perf_counter() - started) * 1000)
+            measurements[name] = {
+                'plan': queryset.explain(),
+                'median_ms': round(statistics.median(timings), 3),
+                'max_ms': round(max(timings), 3)
+            }
+        return measurements
+
+    def report(self, results):
+        for result in results:
+            indexed, unindexed = result['indexed'], result['unindexed']
+            speedup = unindexed['median_ms'] / indexed['median_ms'] if indexed['median_ms'] else 0
+            marker = '✅' if result['uses_index'] else '❌'
+            self.stdout.write(
+                f"{marker} {result['query']}: {indexed['median_ms']} ms with {result['index']}, "
+                f"{unindexed['median_ms']} ms without ({speedup:.1f}x)"
+            )
+            self.stdout.write(f"   plan: {' | '.join(indexed['plan'].splitlines())}")
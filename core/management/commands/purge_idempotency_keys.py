@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete expired Idempotency-Key records (run periodically, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'✅ Purged {deleted} expired idempotency keys'))
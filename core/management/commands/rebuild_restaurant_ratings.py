@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.rating_service import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute every restaurant's stored rating count, sum and star histogram from its reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Restaurants written per UPDATE batch')
+
+    def handle(self, *args, **options):
+        updated = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt ratings for {updated} restaurants'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.rider_service import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Create missing rider payouts for delivered orders and recompute RiderDailyStats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Payouts created per batch')
+
+    def handle(self, *args, **options):
+        created, rows = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Created {created} rider payouts and rebuilt {rows} rider daily stats rows'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.reservation_service import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Release expired cart stock reservations in bulk (run every minute or so, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        released = release_expired()
+        self.stdout.write(self.style.SUCCESS(f'✅ Released {released} expired stock reservations'))
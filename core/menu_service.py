@@ -0,0 +1,126 @@
+# core/menu_service.py
+"""
+Cached full-menu snapshots.
+
+A restaurant's menu (its foods grouped by category, with their addons and
+stock state) is built with one query per relation and cached under a
+per-restaurant version. Signals bump the version on any change to the
+restaurant's foods, their addons or categories (see core/signals.py), and
+stock changes made with bulk updates bump it explicitly. The version doubles
+as the snapshot's ETag, so a client holding the current menu gets a 304
+from a cache lookup alone.
+
+Versions and snapshots are only trusted in a cache every process shares
+(see core/checks.py): with a per-process cache, a bump made by another
+worker's checkout would never be seen here, so the menu is built fresh on
+every request and served without an ETag instead.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .checks import shared_cache
+from .models import Food, Restaurant
+
+UNCATEGORIZED = 'Other'
+
+
+def version_key(restaurant_id):
+    return f"restaurant_menu_version_{restaurant_id}"
+
+
+def current_version(restaurant_id):
+    key = version_key(restaurant_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a lost version never reuses an older one's snapshot or ETag
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(restaurant_id):
+    """Bump the restaurant's menu version so its snapshot is rebuilt on next read"""
+    try:
+        cache.incr(version_key(restaurant_id))
+    except ValueError:
+        current_version(restaurant_id)
+
+
+def invalidate_on_commit(restaurant_ids):
+    """Invalidate once the change is visible to the request that rebuilds the snapshot"""
+    for restaurant_id in set(restaurant_ids):
+        # A cache outage must not fail the checkout or edit that triggered it
+        transaction.on_commit(lambda restaurant_id=restaurant_id: invalidate(restaurant_id), robust=True)
+
+
+def etag(restaurant_id, version):
+    return f'"menu-{restaurant_id}-{version}"'
+
+
+def build(restaurant):
+    from .serializers import AddonSerializer, FoodSerializer
+
+    # Serialized without a request, so images are media paths (see with_absolute_urls)
+    foods = Food.objects.filter(restaurant=restaurant).select_related('category').prefetch_related(
+        'available_addons'
+    ).order_by('category__name', 'name', 'id')
+
+    categories = {}
+    for food, data in zip(foods, FoodSerializer(foods, many=True).data):
+        key = food.category_id
+        if key not in categories:
+            categories[key] = {
+                'id': key,
+                'name': food.category.name if food.category else UNCATEGORIZED,
+                'items': []
+            }
+        data['stock_status'] = food.stock_status
+        categories[key]['items'].append(data)
+
+    return {
+        'restaurant': {'id': restaurant.id, 'name': restaurant.name},
+        # Uncategorized items go last
+        'categories': sorted(categories.values(), key=lambda category: category['id'] is None),
+        'addons': AddonSerializer(restaurant.addon_set.all(), many=True).data
+    }
+
+
+def with_absolute_urls(menu, request):
+    """
+    `menu` with its item images as absolute URLs for `request`, as
+    FoodSerializer gives them with a request in context. Snapshots are
+    shared by every host and scheme, so they store the media paths.
+    """
+    return {**menu, 'categories': [
+        {**category, 'items': [
+            {**item, 'image': request.build_absolute_uri(item['image']) if item['image'] else item['image']}
+            for item in category['items']
+        ]}
+        for category in menu['categories']
+    ]}
+
+
+def snapshot(restaurant_id, version=None):
+    """
+    (version, menu) for an approved restaurant, from the cache when the
+    snapshot for its current version is there; None if there is no such
+    restaurant. Without a shared cache the version is None and the menu is
+    built from the database.
+    """
+    if not shared_cache():
+        restaurant = Restaurant.objects.filter(pk=restaurant_id, is_approved=True).first()
+        return None if restaurant is None else (None, build(restaurant))
+
+    version = current_version(restaurant_id) if version is None else version
+    key = f"restaurant_menu_{restaurant_id}_v{version}"
+    menu = cache.get(key)
+    if menu is None:
+        restaurant = Restaurant.objects.filter(pk=restaurant_id, is_approved=True).first()
+        if restaurant is None:
+            return None
+        menu = {**build(restaurant), 'version': version}
+        # Never expires: a new version makes it unreachable instead
+        cache.set(key, menu, timeout=None)
+    return version, menu
@@ -0,0 +1,166 @@
+# core/metrics_service.py
+"""
+Restaurant dashboard metrics shared by RestaurantAnalyticsView and
+RestaurantEarningsView.
+
+Both screens read the same gross/commission/net series and totals from the
+daily rollup, cached per restaurant and period. Cache keys carry a
+per-restaurant version that every order creation and status change bumps
+(see core/signals.py), so an unchanged dashboard is served from cache
+indefinitely and a changed one is recomputed on its next read. Concurrent
+misses for the same key wait for a single recomputation instead of all
+hitting the database.
+
+Entries never expire, so this relies on the shared cache configured in
+settings (CACHES): a version bump or lock taken by one worker or management
+command has to be seen by every other process.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .analytics_service import last_buckets, time_series
+from .models import PlatformDailyStats, PlatformTotals, RestaurantDailyStats
+from .rollup_service import STATUS_FIELDS
+
+# How long a recomputation may hold the lock, and how long others wait on it (seconds)
+LOCK_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+
+class RestaurantMetricsService:
+    # Buckets kept per granularity; views slice shorter windows from these
+    SERIES = {'day': 7, 'week': 8, 'month': 12, 'year': 5}
+
+    def __init__(self, restaurant):
+        self.restaurant = restaurant
+        self.stats = RestaurantDailyStats.objects.filter(restaurant=restaurant)
+        self._version = None
+
+    @staticmethod
+    def version_key(restaurant_id):
+        return f"restaurant_metrics_version_{restaurant_id}"
+
+    @classmethod
+    def invalidate(cls, restaurant_id):
+        """Bump the restaurant's version so its cached metrics are recomputed on next read"""
+        try:
+            cache.incr(cls.version_key(restaurant_id))
+        except ValueError:
+            # No version yet (or it was evicted); start a fresh one
+            cls.current_version(restaurant_id)
+
+    @classmethod
+    def current_version(cls, restaurant_id):
+        key = cls.version_key(restaurant_id)
+        version = cache.get(key)
+        if version is None:
+            # Seed from the clock so a lost version never reuses an older one's keys
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def cache_key(self, name):
+        if self._version is None:
+            self._version = self.current_version(self.restaurant.id)
+        # The date is part of the key so "Today" rolls over at midnight
+        return f"restaurant_metrics_{self.restaurant.id}_v{self._version}_{name}_{timezone.localdate().isoformat()}"
+
+    def cached(self, name, compute):
+        key = self.cache_key(name)
+        data = cache.get(key)
+        if data is not None:
+            return data
+
+        lock_key = f"{key}_lock"
+        if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            try:
+                data = compute()
+                # Never expires: a new version makes it unreachable instead
+                cache.set(key, data, timeout=None)
+            finally:
+                cache.delete(lock_key)
+            return data
+
+        # Another request is computing the same metrics; use its result
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            data = cache.get(key)
+            if data is not None:
+                return data
+        return compute()
+
+    def series(self, granularity):
+        """
+        Gross, commission_total, net and delivered order count for each of
+        the last SERIES[granularity] buckets, oldest first.
+        """
+        return self.cached(granularity, lambda: self.compute_series(granularity))
+
+    def totals(self):
+        """Lifetime and today's revenue plus current order counts by status"""
+        return self.cached('totals', self.compute_totals)
+
+    def compute_series(self, granularity):
+        start, end = last_buckets(granularity, self.SERIES[granularity])
+        return time_series(
+            self.stats, granularity, start, end, date_field='date',
+            gross=Sum('gross_revenue'),
+            commission_total=Sum('commission'),
+            net=Sum('net_revenue'),
+            orders=Sum('delivered_orders')
+        )
+
+    def compute_totals(self):
+        today = Q(date=timezone.localdate())
+        totals = self.stats.aggregate(
+            total_orders=Sum('total_orders'),
+            gross=Sum('gross_revenue'),
+            commission_total=Sum('commission'),
+            net=Sum('net_revenue'),
+            today_gross=Sum('gross_revenue', filter=today),
+            today_commission=Sum('commission', filter=today),
+            today_net=Sum('net_revenue', filter=today),
+            **{field: Sum(field) for field in STATUS_FIELDS.values()}
+        )
+        return {name: value or 0 for name, value in totals.items()}
+
+
+class PlatformMetricsService:
+    """
+    Platform-wide metrics for the admin dashboard, read from the
+    PlatformTotals row and the PlatformDailyStats rollup. The cost of a read
+    does not depend on how many orders the platform has.
+    """
+    SERIES = {'day': 30, 'week': 12, 'month': 12}
+
+    def totals(self):
+        return PlatformTotals.load()
+
+    def series(self, granularity):
+        """Revenue, commission, delivered and cancelled orders per bucket, oldest first"""
+        start, end = last_buckets(granularity, self.SERIES[granularity])
+        return time_series(
+            PlatformDailyStats.objects.all(), granularity, start, end, date_field='date',
+            gross=Sum('gross_revenue'),
+            commission_total=Sum('commission'),
+            orders=Sum('total_orders'),
+            delivered=Sum('delivered_orders'),
+            cancelled=Sum('cancelled_orders')
+        )
+
+    def chart(self, granularity):
+        """Series shaped for the admin charts: labels plus one list per metric"""
+        label_format = {'day': '%b %d', 'week': '%m/%d', 'month': '%b %y'}[granularity]
+        series = self.series(granularity)
+        return {
+            'labels': [timezone.localtime(bucket['start']).strftime(label_format) for bucket in series],
+            'revenue': [float(bucket['gross']) for bucket in series],
+            'commission': [float(bucket['commission_total']) for bucket in series],
+            'orders': [bucket['orders'] for bucket in series],
+            'delivered': [bucket['delivered'] for bucket in series],
+            'cancelled': [bucket['cancelled'] for bucket in series]
+        }
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField(help_text='Hold is released after this time')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('cart_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reservation', to='core.cartitem')),
+                ('food', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='core.food')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['food', 'expires_at'], name='core_stockr_food_id_df9bb4_idx'), models.Index(fields=['expires_at'], name='core_stockr_expires_3f11d8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_stockreservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.PositiveIntegerField()),
+                ('line_total', models.DecimalField(decimal_places=2, help_text='Including addons', max_digits=10)),
+                ('created_at', models.DateTimeField(help_text='When the order was placed')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_lines', to='core.category')),
+                ('food', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_lines', to='core.food')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='core.order')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_lines', to='core.restaurant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['restaurant', 'created_at'], name='core_orderl_restaur_578e99_idx'), models.Index(fields=['restaurant', 'food', 'created_at'], name='core_orderl_restaur_6df080_idx'), models.Index(fields=['restaurant', 'category', 'created_at'], name='core_orderl_restaur_164194_idx')],
+            },
+        ),
+    ]
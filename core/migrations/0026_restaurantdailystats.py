@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_orderline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('pending_orders', models.IntegerField(default=0)),
+                ('preparing_orders', models.IntegerField(default=0)),
+                ('ready_for_pickup_orders', models.IntegerField(default=0)),
+                ('rider_assigned_orders', models.IntegerField(default=0)),
+                ('picked_up_orders', models.IntegerField(default=0)),
+                ('out_for_delivery_orders', models.IntegerField(default=0)),
+                ('delivered_orders', models.IntegerField(default=0)),
+                ('cancelled_orders', models.IntegerField(default=0)),
+                ('gross_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Total of delivered orders', max_digits=12)),
+                ('commission', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('net_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cancelled_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Total of cancelled orders', max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.restaurant')),
+            ],
+            options={
+                'verbose_name_plural': 'Restaurant daily stats',
+                'constraints': [models.UniqueConstraint(fields=('restaurant', 'date'), name='unique_restaurant_daily_stats')],
+            },
+        ),
+    ]
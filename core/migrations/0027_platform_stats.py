@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_restaurantdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('pending_orders', models.IntegerField(default=0)),
+                ('preparing_orders', models.IntegerField(default=0)),
+                ('ready_for_pickup_orders', models.IntegerField(default=0)),
+                ('rider_assigned_orders', models.IntegerField(default=0)),
+                ('picked_up_orders', models.IntegerField(default=0)),
+                ('out_for_delivery_orders', models.IntegerField(default=0)),
+                ('delivered_orders', models.IntegerField(default=0)),
+                ('cancelled_orders', models.IntegerField(default=0)),
+                ('gross_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Total of delivered orders', max_digits=14)),
+                ('commission', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cancelled_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Total of cancelled orders', max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField(unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Platform daily stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='PlatformTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('pending_orders', models.IntegerField(default=0)),
+                ('preparing_orders', models.IntegerField(default=0)),
+                ('ready_for_pickup_orders', models.IntegerField(default=0)),
+                ('rider_assigned_orders', models.IntegerField(default=0)),
+                ('picked_up_orders', models.IntegerField(default=0)),
+                ('out_for_delivery_orders', models.IntegerField(default=0)),
+                ('delivered_orders', models.IntegerField(default=0)),
+                ('cancelled_orders', models.IntegerField(default=0)),
+                ('gross_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Total of delivered orders', max_digits=14)),
+                ('commission', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cancelled_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Total of cancelled orders', max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Platform totals',
+            },
+        ),
+        migrations.AlterField(
+            model_name='restaurantdailystats',
+            name='cancelled_revenue',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Total of cancelled orders', max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='restaurantdailystats',
+            name='commission',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='restaurantdailystats',
+            name='gross_revenue',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Total of delivered orders', max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='restaurantdailystats',
+            name='net_revenue',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+    ]
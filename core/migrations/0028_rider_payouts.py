@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_platform_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiderDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('trips', models.IntegerField(default=0)),
+                ('earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('rating_total', models.IntegerField(default=0, help_text='Sum of review ratings received')),
+                ('ratings', models.IntegerField(default=0, help_text='Number of review ratings received')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('rider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Rider daily stats',
+                'constraints': [models.UniqueConstraint(fields=('rider', 'date'), name='unique_rider_daily_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RiderPayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('delivered_at', models.DateTimeField()),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rider_payout', to='core.order')),
+                ('rider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payouts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['rider', 'delivered_at'], name='core_riderp_rider_i_1b4355_idx')],
+            },
+        ),
+    ]
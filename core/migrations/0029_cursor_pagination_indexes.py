@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_rider_payouts'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='loginlog',
+            name='core_loginl_login_t_b307d8_idx',
+        ),
+        migrations.AddIndex(
+            model_name='loginlog',
+            index=models.Index(fields=['-login_time', '-id'], name='core_loginl_login_t_a2daeb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='core_notifi_user_id_ea1d2f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='core_order_user_id_12de96_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', '-created_at', '-id'], name='core_order_restaur_a9a547_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['rider', '-created_at', '-id'], name='core_order_rider_i_071749_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='core_order_created_d22947_idx'),
+        ),
+    ]
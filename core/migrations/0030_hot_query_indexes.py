@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aichatsession',
+            index=models.Index(fields=['user', '-updated_at'], name='core_aichat_user_id_8a1982_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', '-created_at'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', 'status', '-created_at'], name='core_order_restaur_c23ed8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['rider', 'status'], name='core_order_rider_i_5f8d73_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('rider__isnull', True)), fields=['status', '-created_at'], name='order_unassigned_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderchatmessage',
+            index=models.Index(fields=['order', 'created_at'], name='core_orderc_order_i_7dab5c_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='rating_1',
+            field=models.IntegerField(default=0, help_text='1-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='rating_2',
+            field=models.IntegerField(default=0, help_text='2-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='rating_3',
+            field=models.IntegerField(default=0, help_text='3-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='rating_4',
+            field=models.IntegerField(default=0, help_text='4-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='rating_5',
+            field=models.IntegerField(default=0, help_text='5-star reviews'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='rating_count',
+            field=models.IntegerField(default=0, help_text='Number of reviews'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='rating_sum',
+            field=models.IntegerField(default=0, help_text='Sum of review ratings'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:24
+
+from django.db import migrations, models
+
+from core.geo import geohash
+
+
+def set_geohashes(apps, schema_editor):
+    Restaurant = apps.get_model('core', 'Restaurant')
+    restaurants = list(Restaurant.objects.only('id', 'lat', 'lng'))
+    for restaurant in restaurants:
+        restaurant.geohash = geohash(restaurant.lat, restaurant.lng) if restaurant.lat is not None else ''
+    Restaurant.objects.bulk_update(restaurants, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_restaurant_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Geohash of lat/lng, set on save; backs radius searches', max_length=12),
+        ),
+        migrations.RunPython(set_geohashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_restaurant_geohash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='food',
+            index=models.Index(fields=['category', 'is_available', 'price'], name='core_food_categor_08a8a4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='food',
+            index=models.Index(fields=['restaurant', 'is_available'], name='core_food_restaur_27fdf9_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 # core/models.py
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -98,6 +99,8 @@ class Restaurant(models.Model):
     postal_code = models.CharField(max_length=10, blank=True, help_text="Postal/ZIP code")
     lat = models.FloatField(default=23.8103, help_text="Latitude coordinate")
     lng = models.FloatField(default=90.4125, help_text="Longitude coordinate")
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False,
+                               help_text="Geohash of lat/lng, set on save; backs radius searches")
     
     # Legacy address field for backward compatibility - will be deprecated
     address = models.TextField(null=True, blank=True, help_text="Legacy address field (deprecated)")
@@ -106,8 +109,35 @@ class Restaurant(models.Model):
     is_approved = models.BooleanField(default=False)
     prep_time_minutes = models.IntegerField(default=20, help_text="Average food preparation time in minutes")
 
+    # Review aggregates, kept current by core/signals.py (rebuild_restaurant_ratings recomputes them)
+    rating_count = models.IntegerField(default=0, editable=False, help_text="Number of reviews")
+    rating_sum = models.IntegerField(default=0, editable=False, help_text="Sum of review ratings")
+    rating_1 = models.IntegerField(default=0, editable=False, help_text="1-star reviews")
+    rating_2 = models.IntegerField(default=0, editable=False, help_text="2-star reviews")
+    rating_3 = models.IntegerField(default=0, editable=False, help_text="3-star reviews")
+    rating_4 = models.IntegerField(default=0, editable=False, help_text="4-star reviews")
+    rating_5 = models.IntegerField(default=0, editable=False, help_text="5-star reviews")
+
+    # Only ever changed by F() updates (core/rating_service.py), never by saving an instance
+    RATING_FIELDS = ('rating_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5')
+
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        from .geo import geohash
+        if kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+            # A full save would write back stale in-memory counters over concurrent review updates
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name not in self.RATING_FIELDS
+            ]
+        self.geohash = geohash(self.lat, self.lng) if self.lat is not None and self.lng is not None else ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'lat', 'lng'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
     
     @property
     def full_address(self):
@@ -122,38 +152,69 @@ class Restaurant(models.Model):
         return ", ".join(parts)
     
     def get_average_rating(self):
-        """Calculate average rating from all reviews for this restaurant's orders"""
-        from django.db.models import Avg
-        avg = Review.objects.filter(order__restaurant=self).aggregate(Avg('rating'))['rating__avg']
-        return round(avg, 1) if avg else 0.0
+        """Average review rating, from the stored aggregates"""
+        return round(self.rating_sum / self.rating_count, 1) if self.rating_count else 0.0
+
+    def get_rating_histogram(self):
+        """Review count per star, 1 to 5"""
+        return {stars: getattr(self, f'rating_{stars}') for stars in range(1, 6)}
     
+    # Average rider speed assumed for delivery time estimates (km/h)
+    DELIVERY_SPEED_KMH = 30
+
     def calculate_delivery_time(self, customer_lat, customer_lng):
         """Calculate estimated delivery time based on distance"""
-        if not self.lat or not self.lng:
-            return "30 min"  # default fallback
-        
-        # Calculate distance using Haversine formula
-        from math import radians, sin, cos, sqrt, atan2
-        
-        R = 6371  # Earth's radius in kilometers
-        
-        lat1 = radians(self.lat)
-        lon1 = radians(self.lng)
-        lat2 = radians(customer_lat)
-        lon2 = radians(customer_lng)
-        
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        distance_km = R * c
-        
-        # Estimate delivery time: prep time + travel time (assuming 30 km/h average speed)
-        travel_time_minutes = (distance_km / 30) * 60
-        total_time = self.prep_time_minutes + travel_time_minutes
-        
-        return f"{int(total_time)} min"
+        return self.delivery_times([self], customer_lat, customer_lng)[self.id]
+
+    @classmethod
+    def delivery_times(cls, restaurants, customer_lat, customer_lng):
+        """
+        Estimated delivery time ("N min": prep time plus travel) from each
+        restaurant to the customer, keyed by restaurant id. Distances for all
+        restaurants come from one vectorized haversine call.
+        """
+        from .geo import distances_km, travel_minutes
+
+        located = [restaurant for restaurant in restaurants if restaurant.lat and restaurant.lng]
+        # Restaurants without coordinates get the default estimate
+        times = {restaurant.id: "30 min" for restaurant in restaurants}
+        if located:
+            distances = distances_km(
+                customer_lat, customer_lng,
+                [restaurant.lat for restaurant in located], [restaurant.lng for restaurant in located]
+            )
+            minutes = travel_minutes(distances, cls.DELIVERY_SPEED_KMH)
+            for restaurant, travel in zip(located, minutes):
+                times[restaurant.id] = f"{int(restaurant.prep_time_minutes + travel)} min"
+        return times
+
+    @classmethod
+    def nearby(cls, lat, lng, radius_km, queryset=None):
+        """
+        Restaurants within `radius_km` of (lat, lng), nearest first, each with
+        a `distance_km` attribute. The geohash cells covering the radius pick
+        the candidates with indexed range scans; exact distances (one
+        vectorized call) drop the corners and order the rest.
+        """
+        from .geo import covering_prefixes, distances_km
+
+        queryset = cls.objects.all() if queryset is None else queryset
+        cells = models.Q()
+        for prefix in covering_prefixes(lat, lng, radius_km):
+            # Every geohash starting with `prefix` sorts between it and prefix + '{' (just after 'z')
+            cells |= models.Q(geohash__gte=prefix, geohash__lt=prefix + '{')
+        candidates = list(queryset.filter(cells))
+        if not candidates:
+            return []
+
+        distances = distances_km(lat, lng, [r.lat for r in candidates], [r.lng for r in candidates])
+        restaurants = []
+        for restaurant, distance in zip(candidates, distances):
+            if distance <= radius_km:
+                restaurant.distance_km = float(distance)
+                restaurants.append(restaurant)
+        restaurants.sort(key=lambda restaurant: restaurant.distance_km)
+        return restaurants
 
 
 class Category(models.Model):
@@ -198,6 +259,14 @@ class Food(models.Model):
     stock_quantity = models.PositiveIntegerField(default=0, help_text="Available quantity in stock")
     is_available = models.BooleanField(default=True, help_text="Whether this item is currently available")
 
+    class Meta:
+        indexes = [
+            # Catalogue browsing: category and availability filters, price range and sort
+            models.Index(fields=['category', 'is_available', 'price']),
+            # A restaurant's menu, optionally only what's available
+            models.Index(fields=['restaurant', 'is_available']),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -215,14 +284,22 @@ class Food(models.Model):
     
     def reduce_stock(self, quantity):
         """Reduce stock quantity when order is placed"""
-        if self.stock_quantity >= quantity:
-            self.stock_quantity -= quantity
+        # Conditional update so concurrent orders can't take the same stock twice
+        updated = Food.objects.filter(id=self.id, stock_quantity__gte=quantity).update(
+            stock_quantity=models.F('stock_quantity') - quantity,
             # Auto-disable if stock reaches 0
-            if self.stock_quantity == 0:
-                self.is_available = False
-            self.save()
-            return True
-        return False
+            is_available=models.Case(
+                models.When(stock_quantity=quantity, then=models.Value(False)),
+                default=models.F('is_available')
+            )
+        )
+        self.refresh_from_db(fields=['stock_quantity', 'is_available'])
+        if updated:
+            from .menu_service import invalidate_on_commit
+
+            # update() sends no signals, so the cached menu is told directly
+            invalidate_on_commit([self.restaurant_id])
+        return bool(updated)
 
 
 class Address(models.Model):
@@ -250,6 +327,26 @@ class CartItem(models.Model):
     addons = models.JSONField(default=list)
 
 
+class StockReservation(models.Model):
+    """Time-boxed hold on a food's stock for an item sitting in a customer's cart"""
+    cart_item = models.OneToOneField(CartItem, on_delete=models.CASCADE, related_name='reservation')
+    food = models.ForeignKey(Food, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(help_text="Hold is released after this time")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Live holds per food: WHERE food_id = ? AND expires_at > now
+            models.Index(fields=['food', 'expires_at']),
+            # Bulk sweep of expired holds
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.food.name} x {self.quantity} (until {self.expires_at})"
+
+
 class Order(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -288,6 +385,23 @@ class Order(models.Model):
     eta = models.CharField(max_length=20, null=True, help_text="Estimated time of arrival (e.g., '15 min')")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Newest-first keyset pagination for each list that pages over orders
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['restaurant', '-created_at', '-id']),
+            models.Index(fields=['rider', '-created_at', '-id']),
+            models.Index(fields=['-created_at', '-id']),
+            # Restaurant order tabs, a rider's current deliveries, and the unassigned pickup pool
+            models.Index(fields=['restaurant', 'status', '-created_at']),
+            models.Index(fields=['rider', 'status']),
+            models.Index(
+                fields=['status', '-created_at'],
+                condition=models.Q(rider__isnull=True),
+                name='order_unassigned_status_idx'
+            ),
+        ]
     
     def get_delivery_address_display(self):
         """Get delivery address for display - either saved address or current location"""
@@ -309,12 +423,50 @@ class Order(models.Model):
         return f"Order #{self.id} - {self.restaurant.name} - {self.status} - Participants: {', '.join(participants)}"
 
 
+class OrderLine(models.Model):
+    """
+    One row per item sold, written alongside Order.items so item-level
+    reporting (top sellers, category mix, velocity) can be grouped in the
+    database. Name and prices are copied from the checkout snapshot.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines')
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='order_lines')
+    food = models.ForeignKey(Food, on_delete=models.SET_NULL, null=True, related_name='order_lines')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_lines')
+    name = models.CharField(max_length=100)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+    line_total = models.DecimalField(max_digits=10, decimal_places=2, help_text="Including addons")
+    created_at = models.DateTimeField(help_text="When the order was placed")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['restaurant', 'created_at']),
+            models.Index(fields=['restaurant', 'food', 'created_at']),
+            models.Index(fields=['restaurant', 'category', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id} - {self.name} x {self.quantity}"
+
+
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+            # Unread only: the filter renders as NOT is_read, which SQLite can't match to an index column
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx'
+            ),
+        ]
+
 
 class Favorite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -351,6 +503,9 @@ class AIChatSession(models.Model):
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['user', '-updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.title}"
@@ -415,6 +570,116 @@ class RestaurantEarnings(models.Model):
         verbose_name_plural = "Restaurant Earnings"
 
 
+class OrderStats(models.Model):
+    """
+    Order counters shared by the rollup tables. Status counts are the
+    orders currently in that status; revenue covers delivered orders.
+    """
+    total_orders = models.PositiveIntegerField(default=0)
+    pending_orders = models.IntegerField(default=0)
+    preparing_orders = models.IntegerField(default=0)
+    ready_for_pickup_orders = models.IntegerField(default=0)
+    rider_assigned_orders = models.IntegerField(default=0)
+    picked_up_orders = models.IntegerField(default=0)
+    out_for_delivery_orders = models.IntegerField(default=0)
+    delivered_orders = models.IntegerField(default=0)
+    cancelled_orders = models.IntegerField(default=0)
+
+    gross_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Total of delivered orders")
+    commission = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    net_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cancelled_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Total of cancelled orders")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class RestaurantDailyStats(OrderStats):
+    """
+    Per-restaurant, per-day rollup of orders, keyed by the local date the
+    order was placed. Kept up to date on every order status transition
+    (see core/signals.py) and rebuilt with the rebuild_restaurant_stats
+    command.
+    """
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+
+    class Meta:
+        verbose_name_plural = "Restaurant daily stats"
+        constraints = [
+            models.UniqueConstraint(fields=['restaurant', 'date'], name='unique_restaurant_daily_stats'),
+        ]
+
+    def __str__(self):
+        return f"{self.restaurant.name} - {self.date}"
+
+
+class PlatformDailyStats(OrderStats):
+    """Platform-wide rollup of orders per local order date, maintained like RestaurantDailyStats"""
+    date = models.DateField(unique=True)
+
+    class Meta:
+        verbose_name_plural = "Platform daily stats"
+
+    def __str__(self):
+        return f"Platform - {self.date}"
+
+
+class PlatformTotals(OrderStats):
+    """Single row of lifetime platform counters (pk=1), so the admin dashboard reads one row"""
+
+    class Meta:
+        verbose_name_plural = "Platform totals"
+
+    @classmethod
+    def load(cls):
+        return cls.objects.get_or_create(pk=1)[0]
+
+    def __str__(self):
+        return "Platform totals"
+
+
+class RiderPayout(models.Model):
+    """What a rider earned for one delivery, recorded when the order is delivered"""
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='rider_payout')
+    rider = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payouts')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    delivered_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['rider', 'delivered_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.rider.email} - Order #{self.order_id} - ৳{self.amount}"
+
+
+class RiderDailyStats(models.Model):
+    """
+    Per-rider, per-day rollup of payouts (by delivery date) and ratings (by
+    review date), kept in step by signals on RiderPayout and Review.
+    """
+    rider = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    trips = models.IntegerField(default=0)
+    earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    rating_total = models.IntegerField(default=0, help_text="Sum of review ratings received")
+    ratings = models.IntegerField(default=0, help_text="Number of review ratings received")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Rider daily stats"
+        constraints = [
+            models.UniqueConstraint(fields=['rider', 'date'], name='unique_rider_daily_stats'),
+        ]
+
+    def __str__(self):
+        return f"{self.rider.email} - {self.date}"
+
+
 class WithdrawalRequest(models.Model):
     """Track withdrawal requests from restaurants"""
     STATUS_CHOICES = (
@@ -460,6 +725,9 @@ class OrderChatMessage(models.Model):
         ordering = ['-created_at']
         verbose_name = "Order Chat Message"
         verbose_name_plural = "Order Chat Messages"
+        indexes = [
+            models.Index(fields=['order', 'created_at']),
+        ]
     
     def __str__(self):
         return f"Order #{self.order.id} - {self.sender.email}: {self.message[:50]}..."
@@ -490,7 +758,7 @@ class LoginLog(models.Model):
         verbose_name_plural = "Login Logs"
         indexes = [
             models.Index(fields=['user', '-login_time']),
-            models.Index(fields=['-login_time']),
+            models.Index(fields=['-login_time', '-id']),
             models.Index(fields=['success']),
         ]
     
@@ -535,4 +803,34 @@ class LoginLog(models.Model):
         elif 'tablet' in user_agent or 'ipad' in user_agent:
             return "Tablet"
         else:
-            return "Desktop"
\ No newline at end of file
+            return "Desktop"
+
+class IdempotencyKey(models.Model):
+    """Stores the first response for a client-supplied Idempotency-Key so retries can be replayed"""
+    STATUS_CHOICES = (
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255, help_text="Value of the Idempotency-Key header")
+    endpoint = models.CharField(max_length=255, help_text="HTTP method and path the key was first used with")
+    request_hash = models.CharField(max_length=64, help_text="Fingerprint of the request body")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.endpoint} ({self.status})"
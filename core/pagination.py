@@ -0,0 +1,28 @@
+# core/pagination.py
+"""
+Cursor pagination for the order, notification and login-log lists.
+
+Pages are fetched with a keyset condition on the ordering columns (backed by
+the matching composite indexes) instead of OFFSET, so the hundredth page of
+a long order history costs the same as the first and every response is
+bounded by the page size.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_MAX_PAGE_SIZE = 100
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Newest first; `id` breaks ties between rows created in the same instant"""
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'API_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+        self.max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+
+
+class LoginTimeCursorPagination(CreatedAtCursorPagination):
+    ordering = ('-login_time', '-id')
@@ -0,0 +1,72 @@
+# core/rating_service.py
+"""
+Restaurant rating aggregates.
+
+Each review adds its rating to its restaurant's rating_count, rating_sum and
+star histogram (rating_1..rating_5) in a single UPDATE, and deleting it takes
+the rating back out, so reading a restaurant's rating never touches Review.
+rebuild() recomputes the stored values from the reviews themselves.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Order, Restaurant, Review
+
+STARS = range(1, 6)
+
+
+def star_field(rating):
+    # Out-of-range ratings still count, in the nearest bucket
+    return f'rating_{min(max(rating, STARS[0]), STARS[-1])}'
+
+
+def rating_changes(rating, sign=1):
+    return {'rating_count': sign, 'rating_sum': sign * rating, star_field(rating): sign}
+
+
+def record_review(review, old_rating=None, new_rating=None):
+    """
+    Move a review's rating from `old_rating` to `new_rating` on its
+    restaurant. Use None for `old_rating` when the review is created and for
+    `new_rating` when it is deleted.
+    """
+    changes = {}
+    for rating, sign in ((old_rating, -1), (new_rating, 1)):
+        if rating is not None:
+            for field, delta in rating_changes(rating, sign).items():
+                changes[field] = changes.get(field, 0) + delta
+    changes = {field: delta for field, delta in changes.items() if delta}
+    if not changes:
+        return
+
+    restaurant_id = Order.objects.filter(pk=review.order_id).values_list('restaurant_id', flat=True).first()
+    if restaurant_id:
+        Restaurant.objects.filter(pk=restaurant_id).update(
+            **{field: F(field) + delta for field, delta in changes.items()}
+        )
+
+
+def rebuild(batch_size=500):
+    """Recompute every restaurant's rating aggregates from its reviews. Returns restaurants updated."""
+    fields = ['rating_count', 'rating_sum', *(f'rating_{stars}' for stars in STARS)]
+    # The histogram buckets use the same clamping as star_field()
+    buckets = {
+        f'rating_{stars}': Count('id', filter=Q(rating=stars)) for stars in STARS[1:-1]
+    }
+    buckets['rating_1'] = Count('id', filter=Q(rating__lte=STARS[0]))
+    buckets['rating_5'] = Count('id', filter=Q(rating__gte=STARS[-1]))
+    rows = {
+        row.pop('order__restaurant_id'): row
+        for row in Review.objects.values('order__restaurant_id').annotate(
+            rating_count=Count('id'), rating_sum=Sum('rating'), **buckets
+        ).order_by()
+    }
+
+    with transaction.atomic():
+        restaurants = list(Restaurant.objects.select_for_update().only('id', *fields))
+        for restaurant in restaurants:
+            row = rows.get(restaurant.id, {})
+            for field in fields:
+                setattr(restaurant, field, row.get(field) or 0)
+        Restaurant.objects.bulk_update(restaurants, fields, batch_size=batch_size)
+    return len(restaurants)
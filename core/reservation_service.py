@@ -0,0 +1,113 @@
+# core/reservation_service.py
+"""
+Cart stock reservations.
+
+Adding an item to the cart places a hold against the food's stock for
+CART_RESERVATION_TTL seconds. Available-to-sell is stock minus everyone
+else's live holds, computed in the database from the (food, expires_at)
+index rather than by scanning carts. Checkout turns the customer's own
+holds into a real decrement; expired holds are swept in bulk by the
+release_expired_reservations management command.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Food, StockReservation
+
+DEFAULT_TTL = 15 * 60
+
+
+def reservation_ttl():
+    return timedelta(seconds=getattr(settings, 'CART_RESERVATION_TTL', DEFAULT_TTL))
+
+
+def held_by_others(food_ref, cart_id=None):
+    """
+    Expression for the quantity of `food_ref` held by live reservations in
+    carts other than `cart_id` (a value or an OuterRef). Use inside
+    annotate()/filter()/update().
+    """
+    holds = StockReservation.objects.filter(food=food_ref, expires_at__gt=timezone.now())
+    if cart_id is not None:
+        holds = holds.exclude(cart_item__cart_id=cart_id)
+    total = holds.values('food').annotate(total=Sum('quantity')).values('total')
+    return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+
+
+def with_available_to_sell(queryset, cart_id=None):
+    """Annotate a Food queryset with `available_to_sell`"""
+    return queryset.annotate(
+        available_to_sell=F('stock_quantity') - held_by_others(OuterRef('pk'), cart_id)
+    )
+
+
+def available_to_sell(food, cart_id=None):
+    """Stock of `food` not held by anyone else's cart"""
+    return with_available_to_sell(Food.objects.filter(pk=food.pk), cart_id).values_list(
+        'available_to_sell', flat=True
+    ).get()
+
+
+def hold(cart_item):
+    """Place or refresh the hold for a cart item's current quantity"""
+    StockReservation.objects.update_or_create(
+        cart_item=cart_item,
+        defaults={
+            'food_id': cart_item.food_id,
+            'quantity': cart_item.quantity,
+            'expires_at': timezone.now() + reservation_ttl()
+        }
+    )
+
+
+def hold_many(cart_items):
+    """Place or refresh holds for several cart items with a constant number of queries"""
+    expires_at = timezone.now() + reservation_ttl()
+    StockReservation.objects.filter(cart_item__in=cart_items).delete()
+    StockReservation.objects.bulk_create([
+        StockReservation(
+            cart_item=cart_item,
+            food_id=cart_item.food_id,
+            quantity=cart_item.quantity,
+            expires_at=expires_at
+        )
+        for cart_item in cart_items
+    ])
+
+
+def reserve(cart, food, quantity, cart_item=None, **fields):
+    """
+    Set `cart`'s line for `food` to `quantity` (plus any other CartItem
+    `fields`) and hold that much stock.
+
+    Returns (cart_item, available) where cart_item is None if there isn't
+    enough unheld stock. The food row is locked for the duration so two
+    carts can't both claim the last units.
+    """
+    with transaction.atomic():
+        locked = with_available_to_sell(
+            Food.objects.select_for_update().filter(pk=food.pk), cart.id
+        ).get()
+        if locked.available_to_sell < quantity:
+            return None, max(0, locked.available_to_sell)
+
+        if cart_item is None:
+            cart_item = cart.items.create(food=food, quantity=quantity, **fields)
+        else:
+            cart_item.quantity = quantity
+            for name, value in fields.items():
+                setattr(cart_item, name, value)
+            cart_item.save()
+        hold(cart_item)
+        return cart_item, locked.available_to_sell
+
+
+def release_expired(now=None):
+    """Delete every expired hold in one statement. Returns the number released."""
+    deleted, _ = StockReservation.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
@@ -0,0 +1,146 @@
+# core/rider_service.py
+"""
+Rider earnings.
+
+Delivering an order records a RiderPayout; signals fold every payout (and
+every review of a rider's delivery) into that rider's RiderDailyStats row,
+so the earnings screen is one aggregate over a rider's daily rows.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, Review, RiderDailyStats, RiderPayout
+from .rollup_service import apply_changes
+
+DEFAULT_PAYOUT_PER_DELIVERY = Decimal('50.00')
+
+
+def payout_per_delivery():
+    return Decimal(str(getattr(settings, 'RIDER_PAYOUT_PER_DELIVERY', DEFAULT_PAYOUT_PER_DELIVERY)))
+
+
+def record_delivery(order, old_status, new_status):
+    """Create or remove the rider's payout when an order becomes (or stops being) delivered"""
+    if new_status == 'delivered' and old_status != 'delivered' and order.rider_id:
+        RiderPayout.objects.get_or_create(order=order, defaults={
+            'rider_id': order.rider_id,
+            'amount': payout_per_delivery(),
+            'delivered_at': timezone.now()
+        })
+    elif old_status == 'delivered' and new_status is not None and new_status != 'delivered':
+        # Deleting the payout rolls it back out of the rider's stats
+        for payout in RiderPayout.objects.filter(order=order):
+            payout.delete()
+
+
+def record_payout(payout, sign=1):
+    apply_changes(
+        RiderDailyStats,
+        {'trips': sign, 'earnings': sign * payout.amount},
+        rider_id=payout.rider_id,
+        date=timezone.localdate(payout.delivered_at)
+    )
+
+
+def record_rating(review, rating, sign=1):
+    """Add (sign=1) or take back (sign=-1) one `rating` of the review's rider on the day it was written"""
+    rider_id = Order.objects.filter(pk=review.order_id).values_list('rider_id', flat=True).first()
+    if rider_id:
+        apply_changes(
+            RiderDailyStats,
+            {'rating_total': sign * rating, 'ratings': sign},
+            rider_id=rider_id,
+            date=timezone.localdate(review.created_at)
+        )
+
+
+def earnings_summary(rider, days=7):
+    """
+    Today/week/month/lifetime earnings and trips, average rating and a
+    daily series for the last `days` days, from one aggregate over the
+    rider's daily rows.
+    """
+    today = timezone.localdate()
+    week_start = today - timedelta(days=6)
+    month_start = today.replace(day=1)
+    series_days = [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+
+    windows = {
+        'today': Q(date=today),
+        'weekly': Q(date__gte=week_start),
+        'monthly': Q(date__gte=month_start),
+        'total': None,
+        **{f'day_{i}': Q(date=day) for i, day in enumerate(series_days)}
+    }
+    aggregates = {'rating_points': Sum('rating_total'), 'rating_count': Sum('ratings')}
+    for name, window in windows.items():
+        aggregates[f'{name}_earnings'] = Sum('earnings', filter=window)
+        aggregates[f'{name}_trips'] = Sum('trips', filter=window)
+
+    row = RiderDailyStats.objects.filter(rider=rider).aggregate(**aggregates)
+    row = {name: value or 0 for name, value in row.items()}
+
+    summary = {}
+    for name in ['today', 'weekly', 'monthly', 'total']:
+        summary[f'{name}_earnings'] = float(row[f'{name}_earnings'])
+        summary[f'{name}_trips'] = row[f'{name}_trips']
+    summary['average_rating'] = round(row['rating_points'] / row['rating_count'], 1) if row['rating_count'] else 0
+    summary['earnings_per_trip'] = float(payout_per_delivery())
+    summary['weekly_breakdown'] = [
+        {
+            'date': day.isoformat(),
+            'day': day.strftime('%a'),
+            'earnings': float(row[f'day_{i}_earnings']),
+            'trips': row[f'day_{i}_trips']
+        }
+        for i, day in enumerate(series_days)
+    ]
+    return summary
+
+
+def rebuild(batch_size=500):
+    """
+    Create payouts missing for delivered orders (dated by the order's last
+    update) and recompute every rider's daily rows from payouts and
+    reviews. Returns (payouts created, rows written).
+    """
+    amount = payout_per_delivery()
+    created = 0
+    missing = Order.objects.filter(status='delivered', rider__isnull=False, rider_payout__isnull=True)
+    while True:
+        batch = list(missing.order_by('id').values_list('id', 'rider_id', 'updated_at')[:batch_size])
+        if not batch:
+            break
+        RiderPayout.objects.bulk_create([
+            RiderPayout(order_id=order_id, rider_id=rider_id, amount=amount, delivered_at=updated_at)
+            for order_id, rider_id, updated_at in batch
+        ])
+        created += len(batch)
+
+    with transaction.atomic():
+        rows = {}
+        payouts = RiderPayout.objects.annotate(day=TruncDate('delivered_at')).values('rider_id', 'day').annotate(
+            trip_count=Count('id'), total=Sum('amount')
+        ).order_by()
+        for payout in payouts:
+            rows[payout['rider_id'], payout['day']] = RiderDailyStats(
+                rider_id=payout['rider_id'], date=payout['day'], trips=payout['trip_count'], earnings=payout['total']
+            )
+        reviews = Review.objects.filter(order__rider__isnull=False).annotate(day=TruncDate('created_at')).values(
+            'order__rider_id', 'day'
+        ).annotate(points=Sum('rating'), count=Count('id')).order_by()
+        for review in reviews:
+            key = review['order__rider_id'], review['day']
+            stats = rows.setdefault(key, RiderDailyStats(rider_id=key[0], date=key[1]))
+            stats.rating_total = review['points']
+            stats.ratings = review['count']
+
+        RiderDailyStats.objects.all().delete()
+        RiderDailyStats.objects.bulk_create(rows.values(), batch_size=batch_size)
+    return created, len(rows)
@@ -0,0 +1,170 @@
+# core/rollup_service.py
+"""
+Daily restaurant rollups.
+
+Every order status transition moves one order between the status counters
+of the RestaurantDailyStats and PlatformDailyStats rows for the day it was
+placed (and of the PlatformTotals row), and moves its total in or out of
+revenue when it becomes (or stops being) delivered or cancelled. Dashboards
+read these rows instead of scanning orders; rebuild() recomputes any date
+range from the orders themselves.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, PlatformDailyStats, PlatformTotals, RestaurantDailyStats, RestaurantEarnings
+
+DEFAULT_COMMISSION_RATE = Decimal('15.00')
+CENT = Decimal('0.01')
+
+STATUS_FIELDS = {status: f'{status}_orders' for status, _ in Order.STATUS_CHOICES}
+REVENUE_FIELDS = ['gross_revenue', 'commission', 'net_revenue', 'cancelled_revenue']
+
+
+def commission_rate(restaurant_id):
+    rate = RestaurantEarnings.objects.filter(restaurant_id=restaurant_id).values_list(
+        'commission_rate', flat=True
+    ).first()
+    return rate if rate is not None else DEFAULT_COMMISSION_RATE
+
+
+def split_revenue(gross, rate):
+    """(commission, net) for a gross amount at `rate` percent"""
+    commission = (gross * rate / 100).quantize(CENT)
+    return commission, gross - commission
+
+
+def order_changes(order, old_status, new_status):
+    """Counter deltas for one order moving from `old_status` to `new_status`"""
+    changes = defaultdict(int)
+    if old_status is None:
+        changes['total_orders'] += 1
+    else:
+        changes[STATUS_FIELDS[old_status]] -= 1
+    if new_status is None:
+        changes['total_orders'] -= 1
+    else:
+        changes[STATUS_FIELDS[new_status]] += 1
+
+    if (old_status == 'delivered') != (new_status == 'delivered'):
+        sign = 1 if new_status == 'delivered' else -1
+        commission, net = split_revenue(order.total, commission_rate(order.restaurant_id))
+        changes['gross_revenue'] += sign * order.total
+        changes['commission'] += sign * commission
+        changes['net_revenue'] += sign * net
+    if (old_status == 'cancelled') != (new_status == 'cancelled'):
+        changes['cancelled_revenue'] += order.total if new_status == 'cancelled' else -order.total
+    return {field: delta for field, delta in changes.items() if delta}
+
+
+def apply_changes(model, changes, **lookup):
+    """Add `changes` to the `model` row matching `lookup`, creating it if needed"""
+    updates = {field: F(field) + delta for field, delta in changes.items()}
+    updates['updated_at'] = timezone.now()
+    rows = model.objects.filter(**lookup)
+    if not rows.update(**updates):
+        model.objects.get_or_create(**lookup)
+        rows.update(**updates)
+
+
+def record_transition(order, old_status, new_status):
+    """
+    Apply one order's move from `old_status` to `new_status` to its day's
+    restaurant and platform rollups and to the platform totals. Use None
+    for `old_status` when the order is created and for `new_status` when
+    it is deleted.
+    """
+    changes = order_changes(order, old_status, new_status)
+    if not changes:
+        return
+
+    day = timezone.localdate(order.created_at)
+    apply_changes(RestaurantDailyStats, changes, restaurant_id=order.restaurant_id, date=day)
+    apply_changes(PlatformDailyStats, changes, date=day)
+    apply_changes(PlatformTotals, changes, pk=1)
+
+
+def rebuild(start=None, end=None, restaurant_ids=None):
+    """
+    Recompute restaurant rollup rows for local dates start..end (inclusive,
+    either may be None for unbounded) from the orders table, then the
+    platform rows for those dates and the platform totals from the
+    restaurant rows. Returns the number of restaurant rows written.
+    """
+    orders = Order.objects.annotate(day=TruncDate('created_at'))
+    stats = RestaurantDailyStats.objects.all()
+    if start:
+        orders = orders.filter(day__gte=start)
+        stats = stats.filter(date__gte=start)
+    if end:
+        orders = orders.filter(day__lte=end)
+        stats = stats.filter(date__lte=end)
+    if restaurant_ids:
+        orders = orders.filter(restaurant_id__in=restaurant_ids)
+        stats = stats.filter(restaurant_id__in=restaurant_ids)
+
+    status_counts = {
+        field: Count('id', filter=Q(status=status)) for status, field in STATUS_FIELDS.items()
+    }
+    rows = orders.values('restaurant_id', 'day').annotate(
+        total_orders=Count('id'),
+        gross_revenue=Sum('total', filter=Q(status='delivered')),
+        cancelled_revenue=Sum('total', filter=Q(status='cancelled')),
+        **status_counts
+    ).order_by()
+
+    rates = dict(RestaurantEarnings.objects.values_list('restaurant_id', 'commission_rate'))
+    with transaction.atomic():
+        new_stats = []
+        for row in rows:
+            gross = row.pop('gross_revenue') or Decimal('0')
+            commission, net = split_revenue(gross, rates.get(row['restaurant_id'], DEFAULT_COMMISSION_RATE))
+            new_stats.append(RestaurantDailyStats(
+                date=row.pop('day'),
+                gross_revenue=gross,
+                commission=commission,
+                net_revenue=net,
+                cancelled_revenue=row.pop('cancelled_revenue') or Decimal('0'),
+                **row
+            ))
+
+        stats.delete()
+        RestaurantDailyStats.objects.bulk_create(new_stats, batch_size=500)
+        rebuild_platform(start, end)
+    return len(new_stats)
+
+
+def rebuild_platform(start=None, end=None):
+    """Recompute platform daily rows for start..end and the lifetime totals from the restaurant rollup"""
+    fields = ['total_orders', *STATUS_FIELDS.values(), *REVENUE_FIELDS]
+    # Aliases can't shadow the model's own field names
+    sums = {f'sum_{field}': Sum(field) for field in fields}
+
+    def unprefixed(row):
+        return {field: row[f'sum_{field}'] or 0 for field in fields}
+
+    stats = RestaurantDailyStats.objects.all()
+    platform = PlatformDailyStats.objects.all()
+    if start:
+        stats = stats.filter(date__gte=start)
+        platform = platform.filter(date__gte=start)
+    if end:
+        stats = stats.filter(date__lte=end)
+        platform = platform.filter(date__lte=end)
+
+    with transaction.atomic():
+        platform.delete()
+        PlatformDailyStats.objects.bulk_create(
+            [
+                PlatformDailyStats(date=row['date'], **unprefixed(row))
+                for row in stats.values('date').annotate(**sums).order_by()
+            ],
+            batch_size=500
+        )
+        totals = RestaurantDailyStats.objects.aggregate(**sums)
+        PlatformTotals.objects.update_or_create(pk=1, defaults=unprefixed(totals))
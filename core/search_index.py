@@ -0,0 +1,206 @@
+# core/search_index.py
+"""
+In-process inverted index for customer search.
+
+Restaurants (name, cuisine) and foods (name, description, ingredients,
+category) are tokenized into one index of term -> {document: weight}. A
+search looks up each query term (the last one as a prefix, for search as
+you type), scores documents by weighted tf-idf, and rolls food matches up
+under their restaurant. Nothing is scanned per keystroke.
+
+The index is built lazily on the first search. Signals (core/signals.py) log
+each changed row to the shared cache once its transaction commits, and every
+process replays the log through update() before its next search
+(core/index_sync.py), re-indexing just those rows.
+"""
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict
+
+from .index_sync import IndexSync
+from .models import Category, Food, Restaurant
+
+# How much a term counts, by the field it appears in
+RESTAURANT_FIELDS = {'name': 3.0, 'cuisine': 2.0}
+FOOD_FIELDS = {'name': 3.0, 'category': 2.0, 'description': 1.0, 'ingredients': 1.0}
+
+# Saves that only touch other columns (stock, prices, ...) leave the index alone
+INDEXED_FIELDS = {
+    Restaurant: {'name', 'cuisine', 'is_approved'},
+    Food: {'name', 'description', 'ingredients', 'category', 'restaurant'},
+    Category: {'name'},
+}
+
+# Matching food items listed under each restaurant
+MAX_ITEMS_PER_RESTAURANT = 5
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def weigh(fields, weights):
+    terms = defaultdict(float)
+    for field, weight in weights.items():
+        for token in tokenize(fields.get(field)):
+            terms[token] += weight
+    return terms
+
+
+class SearchIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.built = False
+        self.postings = defaultdict(dict)   # term -> {(kind, id): weight}
+        self.terms = {}                     # (kind, id) -> {term: weight}
+        self.restaurants = {}               # id -> is_approved
+        self.food_restaurant = {}           # food id -> restaurant id
+        self.categories = {}                # id -> name
+        self.vocabulary = None              # sorted terms for prefix lookups; None when stale
+
+    # Building and incremental updates
+
+    def rebuild(self):
+        with self.lock:
+            self.postings.clear()
+            self.terms.clear()
+            self.restaurants.clear()
+            self.food_restaurant.clear()
+            self.categories = dict(Category.objects.values_list('id', 'name'))
+            for row in Restaurant.objects.values('id', 'name', 'cuisine', 'is_approved'):
+                self._add_restaurant(row)
+            for row in Food.objects.values('id', 'restaurant_id', 'category_id', 'name', 'description', 'ingredients'):
+                self._add_food(row)
+            self.built = True
+
+    def _set_terms(self, key, terms):
+        self._remove(key)
+        self.terms[key] = terms
+        for term, weight in terms.items():
+            self.postings[term][key] = weight
+        self.vocabulary = None
+
+    def _remove(self, key):
+        for term in self.terms.pop(key, {}):
+            documents = self.postings[term]
+            documents.pop(key, None)
+            if not documents:
+                del self.postings[term]
+                self.vocabulary = None
+
+    def _add_restaurant(self, row):
+        self.restaurants[row['id']] = row['is_approved']
+        self._set_terms(('restaurant', row['id']), weigh(row, RESTAURANT_FIELDS))
+
+    def _add_food(self, row):
+        self.food_restaurant[row['id']] = row['restaurant_id']
+        fields = {**row, 'category': self.categories.get(row['category_id'])}
+        self._set_terms(('food', row['id']), weigh(fields, FOOD_FIELDS))
+
+    def update(self, model, pk):
+        """Re-index (or drop) one Restaurant, Food or Category row after it changed"""
+        with self.lock:
+            if not self.built:
+                return
+            if model is Restaurant:
+                row = Restaurant.objects.filter(pk=pk).values('id', 'name', 'cuisine', 'is_approved').first()
+                if row:
+                    self._add_restaurant(row)
+                else:
+                    # Its foods went with it (CASCADE)
+                    self.restaurants.pop(pk, None)
+                    self._remove(('restaurant', pk))
+                    for food_id in [f for f, r in self.food_restaurant.items() if r == pk]:
+                        self.food_restaurant.pop(food_id)
+                        self._remove(('food', food_id))
+            elif model is Food:
+                row = Food.objects.filter(pk=pk).values(
+                    'id', 'restaurant_id', 'category_id', 'name', 'description', 'ingredients'
+                ).first()
+                if row:
+                    self._add_food(row)
+                else:
+                    self.food_restaurant.pop(pk, None)
+                    self._remove(('food', pk))
+            elif model is Category:
+                name = Category.objects.filter(pk=pk).values_list('name', flat=True).first()
+                if name is None:
+                    self.categories.pop(pk, None)
+                else:
+                    self.categories[pk] = name
+                # The category name is part of every food in it
+                for row in Food.objects.filter(category_id=pk).values(
+                    'id', 'restaurant_id', 'category_id', 'name', 'description', 'ingredients'
+                ):
+                    self._add_food(row)
+
+    # Searching
+
+    def expand(self, token, prefix):
+        if not prefix:
+            return [token] if token in self.postings else []
+        if self.vocabulary is None:
+            self.vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self.vocabulary, token)
+        end = bisect.bisect_left(self.vocabulary, token + '\uffff')
+        return self.vocabulary[start:end]
+
+    def search(self, query):
+        """
+        Approved restaurants matching `query`, best first, as
+        [{'restaurant_id', 'score', 'food_ids'}]: restaurants that match more
+        of the query's terms rank first, then by tf-idf score summed over the
+        restaurant and its matching foods.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self.lock:
+            documents = len(self.terms) or 1
+            scores = defaultdict(float)
+            matched = defaultdict(set)    # restaurant id -> query tokens it (or its foods) matched
+            food_scores = defaultdict(dict)
+            for position, token in enumerate(tokens):
+                # The last word is still being typed
+                for term in self.expand(token, prefix=position == len(tokens) - 1):
+                    postings = self.postings[term]
+                    idf = math.log(1 + documents / len(postings))
+                    for (kind, pk), weight in postings.items():
+                        restaurant_id = pk if kind == 'restaurant' else self.food_restaurant.get(pk)
+                        if not self.restaurants.get(restaurant_id):
+                            continue
+                        score = weight * idf
+                        scores[restaurant_id] += score
+                        matched[restaurant_id].add(position)
+                        if kind == 'food':
+                            food_scores[restaurant_id][pk] = food_scores[restaurant_id].get(pk, 0) + score
+
+        ranked = sorted(scores, key=lambda pk: (-len(matched[pk]), -scores[pk], pk))
+        return [
+            {
+                'restaurant_id': pk,
+                'score': round(scores[pk], 3),
+                'food_ids': sorted(food_scores[pk], key=lambda food: -food_scores[pk][food])[:MAX_ITEMS_PER_RESTAURANT]
+            }
+            for pk in ranked
+        ]
+
+
+index = SearchIndex()
+sync = IndexSync('search_index', index)
+
+
+def search(query):
+    """Search the process's index, first catching up with changes made anywhere"""
+    sync.refresh()
+    return index.search(query)
+
+
+def record_change(model, pk):
+    """Log a committed change to a Restaurant, Food or Category for every process's index"""
+    return sync.record_change(model, pk)
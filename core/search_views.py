@@ -1,15 +1,25 @@
 # core/search_views.py
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from . import autocomplete
+from .catalog_service import refine_search
 from .models import Restaurant, Food
-from .serializers import RestaurantSerializer
+from .search_index import search
+from .serializers import RestaurantSerializer, customer_location
 
 
 class SearchView(APIView):
     """
-    Search for restaurants by name or food items.
-    When searching for food items, returns restaurants that sell those items.
+    Search restaurants by name and cuisine and by their food items' name,
+    description, ingredients and category. Results come from the in-process
+    search index (core/search_index.py), ranked, paginated with ?page= and
+    ?page_size=, with the matching food items listed under each restaurant.
+    The catalogue filters (?category=, ?is_veg=, ?min_price=/?max_price=,
+    ?cuisine=, ...) narrow the hits, ?sort= reorders them (relevance, price,
+    rating or distance) and, when filtering or asked with ?facets=true, facet
+    counts over the hits come back with them.
     """
     permission_classes = [IsAuthenticated]
 
@@ -22,26 +32,72 @@ class SearchView(APIView):
                 'count': 0,
                 'message': 'No query provided'
             })
-        
-        # Search restaurants by name (case-insensitive)
-        restaurants_by_name = Restaurant.objects.filter(
-            name__icontains=query,
-            is_approved=True
-        )
-        
-        # Search food items and get their restaurants
-        foods = Food.objects.filter(name__icontains=query)
-        restaurant_ids_from_food = foods.values_list('restaurant_id', flat=True).distinct()
-        restaurants_by_food = Restaurant.objects.filter(
-            id__in=restaurant_ids_from_food,
-            is_approved=True
-        )
-        
-        # Combine and deduplicate using union
-        all_restaurants = (restaurants_by_name | restaurants_by_food).distinct()
-        
-        serializer = RestaurantSerializer(all_restaurants, many=True, context={'request': request})
+
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = int(request.query_params.get('page_size', getattr(settings, 'API_PAGE_SIZE', 20)))
+        except ValueError:
+            return Response({'error': 'page and page_size must be numbers'}, status=400)
+        page_size = min(max(page_size, 1), getattr(settings, 'API_MAX_PAGE_SIZE', 100))
+
+        location = customer_location(request)
+        try:
+            results, found_facets = refine_search(search(query), request.query_params, location)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        hits = results[(page - 1) * page_size:page * page_size]
+
+        restaurants = Restaurant.objects.in_bulk([hit['restaurant_id'] for hit in hits])
+        foods = {
+            food['id']: {**food, 'price': float(food['price'])}
+            for food in Food.objects.filter(id__in=[pk for hit in hits for pk in hit['food_ids']]).values(
+                'id', 'name', 'price', 'is_veg', 'is_available'
+            )
+        }
+        # Rows deleted since the index last caught up are skipped
+        hits = [hit for hit in hits if hit['restaurant_id'] in restaurants]
+
+        serializer = RestaurantSerializer([restaurants[hit['restaurant_id']] for hit in hits], many=True, context={
+            'request': request, 'customer_location': location
+        })
+        data = []
+        for hit, restaurant in zip(hits, serializer.data):
+            restaurant['score'] = hit['score']
+            restaurant['matching_items'] = [foods[pk] for pk in hit['food_ids'] if pk in foods]
+            data.append(restaurant)
+
+        response = {
+            'restaurants': data,
+            'count': len(results),
+            'page': page,
+            'page_size': page_size,
+            'has_next': page * page_size < len(results)
+        }
+        if found_facets is not None:
+            response['facets'] = found_facets
+        if not results:
+            # Probably misspelt: offer the names it was closest to
+            response['suggestions'] = autocomplete.suggest(query)
+        return Response(response)
+
+
+class AutocompleteView(APIView):
+    """
+    Restaurant and dish names for a partly typed or misspelt query, from the
+    in-memory autocomplete index (core/autocomplete.py). ?limit= caps the
+    number of suggestions.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', autocomplete.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=400)
+        limit = min(max(limit, 1), autocomplete.MAX_LIMIT)
+
         return Response({
-            'restaurants': serializer.data,
-            'count': all_restaurants.count()
+            'query': query,
+            'suggestions': autocomplete.suggest(query, limit) if query else []
         })
@@ -1,4 +1,6 @@
 # core/serializers.py
+from decimal import Decimal
+
 from rest_framework import serializers
 from .models import *
 
@@ -119,6 +121,43 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
+def customer_location(request):
+    """
+    (lat, lng) the customer is ordering to, or None: explicit ?lat=&lng=
+    query parameters (live location) if valid, otherwise the user's default
+    address. Resolved once per request however many serializers ask.
+    """
+    if request is None:
+        return None
+    if hasattr(request, '_customer_location'):
+        return request._customer_location
+
+    location = None
+    try:
+        lat = float(request.GET['lat'])
+        lng = float(request.GET['lng'])
+        if -90 <= lat <= 90 and -180 <= lng <= 180:
+            location = (lat, lng)
+    except (KeyError, ValueError):
+        pass
+    if location is None and request.user.is_authenticated:
+        location = Address.objects.filter(user=request.user, is_default=True).values_list('lat', 'lng').first()
+
+    request._customer_location = location
+    return location
+
+
+class RestaurantListSerializer(serializers.ListSerializer):
+    """Computes every restaurant's delivery time in one vectorized call before serializing them"""
+
+    def to_representation(self, data):
+        restaurants = list(data.all() if hasattr(data, 'all') else data)
+        location = self.child.get_customer_location()
+        if location and restaurants:
+            self.context['delivery_times'] = Restaurant.delivery_times(restaurants, *location)
+        return super().to_representation(restaurants)
+
+
 # Keep all other serializers exactly as they were
 class RestaurantSerializer(serializers.ModelSerializer):
     rating = serializers.SerializerMethodField()
@@ -134,6 +173,7 @@ class RestaurantSerializer(serializers.ModelSerializer):
                   'address', 'rating', 'delivery_time', 
                   'is_approved', 'prep_time_minutes']
         read_only_fields = ['rating', 'delivery_time', 'full_address']
+        list_serializer_class = RestaurantListSerializer
     
     def get_banner(self, obj):
         """Return full URL for banner image"""
@@ -159,19 +199,28 @@ class RestaurantSerializer(serializers.ModelSerializer):
             print(f"Error getting rating for {obj.name}: {e}")
             return 0.0
     
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Set by Restaurant.nearby() on radius searches
+        if hasattr(instance, 'distance_km'):
+            data['distance_km'] = round(instance.distance_km, 2)
+        return data
+
+    def get_customer_location(self):
+        # Views pass the location in context; otherwise resolve it (once) from the request
+        if 'customer_location' not in self.context:
+            self.context['customer_location'] = customer_location(self.context.get('request'))
+        return self.context['customer_location']
+
     def get_delivery_time(self, obj):
         """Get calculated delivery time based on user's location"""
         try:
-            # Try to get customer location from context
-            request = self.context.get('request')
-            if request and hasattr(request, 'user') and request.user.is_authenticated:
-                # Try to get user's default address
-                try:
-                    address = Address.objects.filter(user=request.user, is_default=True).first()
-                    if address:
-                        return obj.calculate_delivery_time(address.lat, address.lng)
-                except:
-                    pass
+            location = self.get_customer_location()
+            if location:
+                delivery_times = self.context.get('delivery_times', {})
+                if obj.id in delivery_times:
+                    return delivery_times[obj.id]
+                return obj.calculate_delivery_time(*location)
             
             # Fallback: use a default time
             return f"{obj.prep_time_minutes + 10} min"
@@ -225,11 +274,12 @@ class FoodSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(required=False, allow_null=True)
     category_name = serializers.CharField(write_only=True, required=False)
     category = CategorySerializer(read_only=True)
+    restaurant = serializers.PrimaryKeyRelatedField(read_only=True)
     
     class Meta:
         model = Food
         fields = ['id', 'name', 'description', 'price', 'image', 'is_veg', 'ingredients', 
-                 'stock_quantity', 'is_available', 'category', 'category_name', 'available_addons']
+                 'stock_quantity', 'is_available', 'category', 'category_name', 'available_addons', 'restaurant']
         # restaurant field is handled in perform_create, not in serializer
     
     def create(self, validated_data):
@@ -264,62 +314,146 @@ class CartItemSerializer(serializers.ModelSerializer):
         model = CartItem
         fields = ['id', 'food', 'quantity', 'variants', 'addons']
 
+class CartLineSerializer(serializers.Serializer):
+    """One line of a bulk add-to-cart request"""
+    food_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+    variants = serializers.ListField(default=list)
+    addons = serializers.ListField(default=list)
+
+class CartBulkSerializer(serializers.Serializer):
+    items = CartLineSerializer(many=True, allow_empty=False, max_length=50)
+
 class CartSerializer(serializers.ModelSerializer):
+    """
+    Load carts with cart_service.get_cart() so items, foods, categories and
+    addons are prefetched; totals are then computed without extra queries.
+    """
     items = CartItemSerializer(many=True, read_only=True)
-    subtotal = serializers.SerializerMethodField()
-    def get_subtotal(self, obj):
-        return sum(item.food.price * item.quantity for item in obj.items.all())
+
     class Meta:
         model = Cart
-        fields = ['id', 'items', 'subtotal']
+        fields = ['id', 'items']
+
+    def to_representation(self, obj):
+        from .checkout_service import DELIVERY_FEE, line_subtotal
+
+        data = super().to_representation(obj)
+        # One pass over the (prefetched) items for all the totals
+        subtotal = sum(
+            (line_subtotal(item.food, item.quantity, item.addons) for item in obj.items.all()),
+            Decimal('0')
+        )
+        data['subtotal'] = subtotal
+        data['delivery_fee'] = DELIVERY_FEE
+        data['total'] = subtotal + DELIVERY_FEE
+        return data
 
 class OrderSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     restaurant = RestaurantSerializer(read_only=True)
+    restaurant_name = serializers.CharField(source='restaurant.name', read_only=True)
     address = AddressSerializer(read_only=True)
     delivery_address_display = serializers.SerializerMethodField()
     items_details = serializers.SerializerMethodField()
     formatted_created_at = serializers.SerializerMethodField()
     time_ago = serializers.SerializerMethodField()
+
+    # What the order list screens show (?view=summary)
+    SUMMARY_FIELDS = ['id', 'status', 'total', 'restaurant_name', 'created_at', 'formatted_created_at', 'time_ago']
+    # Columns behind fields that aren't a model field of the same name
+    FIELD_SOURCES = {
+        'restaurant_name': ['restaurant__name'],
+        'delivery_address_display': ['address', 'delivery_location'],
+        'items_details': ['items'],
+        'formatted_created_at': ['created_at'],
+        'time_ago': ['created_at'],
+    }
+    # Relations serialized as nested objects rather than ids
+    NESTED = {'user', 'restaurant', 'address'}
     
     class Meta:
         model = Order
         fields = '__all__'
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, query_params, extra=()):
+        """
+        Field names asked for with ?view=summary or ?fields=a,b, or None for
+        every field. `extra` names keys the view adds itself that ?fields=
+        may also ask for.
+        """
+        if query_params.get('view') == 'summary':
+            return cls.SUMMARY_FIELDS
+        if not query_params.get('fields'):
+            return None
+
+        fields = [name.strip() for name in query_params['fields'].split(',') if name.strip()]
+        unknown = set(fields) - set(cls().fields) - set(extra)
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+        return fields
+
+    @classmethod
+    def trim_queryset(cls, queryset, fields):
+        """Load only the columns and relations that `fields` need"""
+        # created_at is what the cursor paginator reads to build next/previous links
+        paths = {'id', 'created_at'}
+        for name in fields:
+            paths.update(cls.FIELD_SOURCES.get(name, [name]))
+        related = {path.split('__')[0] for path in paths} & cls.NESTED
+        # Drop the view's own select_related: deferred relations can't be joined
+        return queryset.select_related(None).select_related(*related).only(*paths)
     
     def get_delivery_address_display(self, obj):
         """Get formatted delivery address for display"""
         return obj.get_delivery_address_display()
     
     def get_items_details(self, obj):
-        """Get detailed information about order items"""
-        from .models import Food
+        """Get detailed information about order items from the checkout snapshot"""
+        items = obj.items
+        # Orders placed before line snapshots existed (until backfill_order_snapshots
+        # has been run) get one bulk lookup per order rather than one per item
+        legacy_ids = [item['food_id'] for item in items if 'food_name' not in item]
+        foods = Food.objects.in_bulk(legacy_ids) if legacy_ids else {}
+
         items_with_details = []
-        
-        for item in obj.items:
-            try:
-                food = Food.objects.get(id=item['food_id'])
-                item_detail = {
-                    'food_id': item['food_id'],
-                    'food_name': food.name,
-                    'food_price': float(food.price),
-                    'quantity': item['quantity'],
-                    'variants': item.get('variants', []),
-                    'addons': item.get('addons', []),
-                    'subtotal': float(food.price) * item['quantity']
-                }
-                items_with_details.append(item_detail)
-            except Food.DoesNotExist:
+        for item in items:
+            if 'food_name' in item:
+                food_name = item['food_name']
+                food_price = float(item['food_price'])
+                subtotal = float(item['subtotal'])
+            elif item['food_id'] in foods:
+                food = foods[item['food_id']]
+                food_name = food.name
+                food_price = float(food.price)
+                subtotal = float(food.price) * item['quantity']
+            else:
                 # Fallback for deleted food items
-                item_detail = {
-                    'food_id': item['food_id'],
-                    'food_name': 'Item no longer available',
-                    'food_price': 0,
-                    'quantity': item['quantity'],
-                    'variants': item.get('variants', []),
-                    'addons': item.get('addons', []),
-                    'subtotal': 0
-                }
-                items_with_details.append(item_detail)
+                food_name = 'Item no longer available'
+                food_price = 0
+                subtotal = 0
+
+            items_with_details.append({
+                'food_id': item['food_id'],
+                'food_name': food_name,
+                'food_price': food_price,
+                'quantity': item['quantity'],
+                'variants': item.get('variants', []),
+                'addons': item.get('addons', []),
+                'addon_details': [
+                    {**addon, 'price': float(addon['price'])} for addon in item.get('addon_details', [])
+                ],
+                'subtotal': subtotal,
+                # Backfilled prices apportioned from the order's subtotal rather than recorded at checkout
+                'estimated': item.get('estimated', False)
+            })
         
         return items_with_details
     
@@ -0,0 +1,153 @@
+# core/signals.py
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import autocomplete, menu_service
+from .metrics_service import RestaurantMetricsService
+from .rating_service import record_review
+from .models import Addon, Category, Food, Order, Restaurant, Review, RiderPayout
+from .rider_service import record_delivery, record_payout, record_rating
+from .rollup_service import record_transition
+from .search_index import INDEXED_FIELDS, record_change
+
+
+def order_changed(order, old_status, new_status):
+    record_transition(order, old_status, new_status)
+    record_delivery(order, old_status, new_status)
+    # Bump the cached metrics version once the change is visible to other requests; like menu
+    # invalidation, a cache outage must not fail the order change that triggered it
+    restaurant_id = order.restaurant_id
+    transaction.on_commit(lambda: RestaurantMetricsService.invalidate(restaurant_id), robust=True)
+
+
+@receiver(post_init, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    # Read from __dict__ so orders loaded with only()/defer() don't trigger a query
+    instance._saved_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Order)
+def roll_up_order_status(sender, instance, created, **kwargs):
+    """Keep RestaurantDailyStats and cached metrics in step with order creation and status changes"""
+    if created:
+        order_changed(instance, None, instance.status)
+    elif instance._saved_status is not None and instance._saved_status != instance.status:
+        order_changed(instance, instance._saved_status, instance.status)
+    instance._saved_status = instance.status
+
+
+@receiver(post_delete, sender=Order)
+def roll_up_deleted_order(sender, instance, **kwargs):
+    if instance._saved_status is not None:
+        order_changed(instance, instance._saved_status, None)
+
+
+@receiver(post_save, sender=RiderPayout)
+def roll_up_rider_payout(sender, instance, created, **kwargs):
+    if created:
+        record_payout(instance)
+
+
+@receiver(post_delete, sender=RiderPayout)
+def roll_up_deleted_rider_payout(sender, instance, **kwargs):
+    record_payout(instance, sign=-1)
+
+
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    instance._saved_rating = instance.__dict__.get('rating') if instance.pk else None
+
+
+@receiver(post_save, sender=Review)
+def roll_up_rider_rating(sender, instance, created, **kwargs):
+    """Keep the rider's daily rating total and count in step with reviews of their deliveries"""
+    # Registered before roll_up_restaurant_rating, which moves _saved_rating on
+    if created:
+        record_rating(instance, instance.rating)
+    elif instance._saved_rating is not None and instance._saved_rating != instance.rating:
+        record_rating(instance, instance._saved_rating, sign=-1)
+        record_rating(instance, instance.rating)
+
+
+@receiver(post_save, sender=Review)
+def roll_up_restaurant_rating(sender, instance, created, **kwargs):
+    """Keep the restaurant's stored rating count, sum and histogram in step with its reviews"""
+    if created:
+        record_review(instance, new_rating=instance.rating)
+    elif instance._saved_rating is not None and instance._saved_rating != instance.rating:
+        record_review(instance, old_rating=instance._saved_rating, new_rating=instance.rating)
+    instance._saved_rating = instance.rating
+
+
+@receiver(post_delete, sender=Review)
+def roll_up_deleted_review(sender, instance, **kwargs):
+    if instance._saved_rating is not None:
+        record_review(instance, old_rating=instance._saved_rating)
+        record_rating(instance, instance._saved_rating, sign=-1)
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_save, sender=Food)
+@receiver(post_save, sender=Category)
+def reindex_for_search(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS[sender] & set(update_fields):
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: record_change(sender, pk))
+
+
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_delete, sender=Food)
+@receiver(post_delete, sender=Category)
+def unindex_for_search(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: record_change(sender, pk))
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_save, sender=Food)
+def refresh_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not autocomplete.INDEXED_FIELDS[sender] & set(update_fields):
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete.record_change(sender, pk))
+
+
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_delete, sender=Food)
+def drop_from_autocomplete(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete.record_change(sender, pk))
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+@receiver(post_save, sender=Addon)
+@receiver(post_delete, sender=Addon)
+def invalidate_menu(sender, instance, **kwargs):
+    menu_service.invalidate_on_commit([instance.restaurant_id])
+
+
+@receiver(m2m_changed, sender=Food.available_addons.through)
+def invalidate_menu_addons(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        # A Food or, for addon.food_set changes, an Addon; both belong to the one restaurant
+        menu_service.invalidate_on_commit([instance.restaurant_id])
+
+
+@receiver(post_save, sender=Restaurant)
+def invalidate_restaurant_menu(sender, instance, created, update_fields=None, **kwargs):
+    # The snapshot carries the name and is only served while approved
+    if not created and (update_fields is None or {'name', 'is_approved'} & set(update_fields)):
+        menu_service.invalidate_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def invalidate_category_menus(sender, instance, created=False, **kwargs):
+    # Before a delete, while its foods still point at it
+    if not created:
+        menu_service.invalidate_on_commit(
+            Food.objects.filter(category=instance).values_list('restaurant_id', flat=True).distinct()
+        )
@@ -1 +1,1688 @@
-# Tests removed to reduce project size
+import csv
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .cart_service import CartService
+from .checkout_service import CheckoutError, CheckoutService
+from .models import (
+    Address, Addon, Cart, CartItem, Category, Food, IdempotencyKey, Notification, Order, Restaurant,
+    PlatformDailyStats, PlatformTotals, RestaurantDailyStats, Review, RiderDailyStats, RiderLocation, RiderPayout,
+    LoginLog, StockReservation, User, WithdrawalRequest
+)
+from .geo import distance_km, distance_matrix_km, distances_km, geohash
+from .menu_service import snapshot
+from .metrics_service import RestaurantMetricsService
+from . import autocomplete, catalog_service, idempotency, search_index
+from .reservation_service import available_to_sell, release_expired
+from .serializers import OrderSerializer
+from .rollup_service import rebuild as rebuild_daily_stats
+from .views import RestaurantAnalyticsView
+
+CURRENT_LOCATION = {'lat': 23.81, 'lng': 90.41, 'address': 'Gulshan 1'}
+
+
+def create_restaurant(email='owner@example.com', name='Kacchi House'):
+    owner = User.objects.create_user(email=email, password='password123', role='restaurant')
+    return Restaurant.objects.create(owner=owner, name=name, cuisine='Bangladeshi', is_approved=True)
+
+
+def create_food(restaurant, name='Kacchi Biryani', price='250.00', stock_quantity=10):
+    return Food.objects.create(
+        restaurant=restaurant,
+        name=name,
+        description=name,
+        price=Decimal(price),
+        stock_quantity=stock_quantity
+    )
+
+
+def create_customer(email):
+    # No password: hashing one per customer makes the concurrency test crawl
+    return User.objects.create_user(email=email)
+
+
+def uncached(queries):
+    """Captured queries other than the shared cache table's reads and writes (and their savepoints)"""
+    return [
+        query for query in queries.captured_queries
+        if 'django_cache' not in query['sql'] and 'SAVEPOINT' not in query['sql']
+    ]
+
+
+def fill_cart(user, *lines):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    for food, quantity in lines:
+        CartItem.objects.create(cart=cart, food=food, quantity=quantity)
+    return cart
+
+
+class CheckoutServiceTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+
+    def test_place_order_decrements_stock_and_clears_cart(self):
+        biryani = create_food(self.restaurant, stock_quantity=3)
+        borhani = create_food(self.restaurant, name='Borhani', price='60.00', stock_quantity=10)
+        fill_cart(self.customer, (biryani, 3), (borhani, 2))
+
+        order = CheckoutService(self.customer).place_order(current_location=CURRENT_LOCATION)
+
+        biryani.refresh_from_db()
+        borhani.refresh_from_db()
+        self.assertEqual(biryani.stock_quantity, 0)
+        self.assertFalse(biryani.is_available)
+        self.assertEqual(borhani.stock_quantity, 8)
+        self.assertTrue(borhani.is_available)
+        self.assertEqual(order.subtotal, Decimal('870.00'))
+        self.assertEqual(order.total, Decimal('875.00'))
+        self.assertEqual(order.delivery_location, CURRENT_LOCATION)
+        self.assertFalse(CartItem.objects.filter(cart__user=self.customer).exists())
+        self.assertTrue(Notification.objects.filter(user=self.customer).exists())
+
+    def test_insufficient_stock_on_any_line_rolls_back_everything(self):
+        biryani = create_food(self.restaurant, stock_quantity=5)
+        borhani = create_food(self.restaurant, name='Borhani', price='60.00', stock_quantity=1)
+        fill_cart(self.customer, (biryani, 2), (borhani, 2))
+
+        with self.assertRaises(CheckoutError):
+            CheckoutService(self.customer).place_order(current_location=CURRENT_LOCATION)
+
+        biryani.refresh_from_db()
+        self.assertEqual(biryani.stock_quantity, 5)
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(CartItem.objects.filter(cart__user=self.customer).count(), 2)
+
+    def test_lost_race_on_conditional_update_rolls_back_everything(self):
+        biryani = create_food(self.restaurant, stock_quantity=5)
+        borhani = create_food(self.restaurant, name='Borhani', price='60.00', stock_quantity=5)
+        fill_cart(self.customer, (biryani, 2), (borhani, 2))
+
+        # Simulate another checkout taking the stock after our read
+        original = CheckoutService.decrement_stock
+
+        def decrement_after_competitor(quantities, cart_id):
+            Food.objects.filter(id=borhani.id).update(stock_quantity=1)
+            return original(quantities, cart_id)
+
+        with mock.patch.object(CheckoutService, 'decrement_stock', staticmethod(decrement_after_competitor)):
+            with self.assertRaisesMessage(CheckoutError, 'Only 1 available'):
+                CheckoutService(self.customer).place_order(current_location=CURRENT_LOCATION)
+
+        biryani.refresh_from_db()
+        self.assertEqual(biryani.stock_quantity, 5)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        small_cart_customer = create_customer('small@example.com')
+        large_cart_customer = create_customer('large@example.com')
+        foods = [create_food(self.restaurant, name=f'Item {i}') for i in range(10)]
+        fill_cart(small_cart_customer, (foods[0], 1))
+        fill_cart(large_cart_customer, *[(food, 1) for food in foods])
+        # Only the day's first order pays for creating the rollup rows
+        RestaurantDailyStats.objects.create(restaurant=self.restaurant, date=timezone.localdate())
+        PlatformDailyStats.objects.create(date=timezone.localdate())
+        PlatformTotals.load()
+
+        with self.assertNumQueries(14) as small:
+            CheckoutService(small_cart_customer).place_order(current_location=CURRENT_LOCATION)
+        with self.assertNumQueries(len(small.captured_queries)):
+            CheckoutService(large_cart_customer).place_order(current_location=CURRENT_LOCATION)
+
+    def test_order_lines_are_snapshotted_at_checkout(self):
+        biryani = create_food(self.restaurant, stock_quantity=5)
+        egg = Addon.objects.create(name='Extra Egg', price=Decimal('20.00'), restaurant=self.restaurant)
+        biryani.available_addons.add(egg)
+        cart = fill_cart(self.customer, (biryani, 2))
+        cart.items.update(addons=['Extra Egg'])
+
+        order = CheckoutService(self.customer).place_order(current_location=CURRENT_LOCATION)
+        self.assertEqual(order.subtotal, Decimal('540.00'))
+
+        # Later menu changes must not rewrite order history
+        Food.objects.filter(id=biryani.id).update(name='Renamed', price=Decimal('999.00'))
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/v1/customer/orders/{order.id}/')
+        self.assertFalse([q for q in queries.captured_queries if 'FROM "core_food"' in q['sql']])
+
+        line = response.data['items_details'][0]
+        self.assertEqual(line['food_name'], 'Kacchi Biryani')
+        self.assertEqual(line['food_price'], 250.0)
+        self.assertEqual(line['addon_details'], [{'id': egg.id, 'name': 'Extra Egg', 'price': 20.0}])
+        self.assertEqual(line['subtotal'], 540.0)
+
+
+
+class OrderLineTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.client = APIClient()
+        self.client.force_authenticate(self.restaurant.owner)
+        self.biryani = create_food(self.restaurant, stock_quantity=100)
+        self.borhani = create_food(self.restaurant, name='Borhani', price='60.00', stock_quantity=100)
+
+    def place(self, email, *lines):
+        customer = create_customer(email)
+        fill_cart(customer, *lines)
+        return CheckoutService(customer).place_order(current_location=CURRENT_LOCATION)
+
+    def test_checkout_records_one_line_per_item(self):
+        order = self.place('a@example.com', (self.biryani, 2), (self.borhani, 3))
+
+        lines = {line.name: line for line in order.lines.all()}
+        self.assertEqual(lines['Kacchi Biryani'].line_total, Decimal('500.00'))
+        self.assertEqual(lines['Borhani'].quantity, 3)
+        self.assertEqual(lines['Borhani'].restaurant, self.restaurant)
+        self.assertEqual(lines['Borhani'].created_at, order.created_at)
+
+    def test_reorder_copies_the_lines_or_creates_nothing(self):
+        order = self.place('a@example.com', (self.biryani, 2), (self.borhani, 1))
+        client = APIClient()
+        client.force_authenticate(order.user)
+        url = f'/api/v1/customer/orders/{order.id}/reorder/'
+
+        with mock.patch('core.checkout_service.build_order_lines', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                client.post(url)
+        self.assertEqual(Order.objects.count(), 1)
+
+        reordered = Order.objects.get(pk=client.post(url).data['order_id'])
+        self.assertEqual(
+            sorted(reordered.lines.values_list('name', 'quantity')), [('Borhani', 1), ('Kacchi Biryani', 2)]
+        )
+
+    def test_top_sellers_groups_in_the_database_and_skips_cancelled(self):
+        self.place('a@example.com', (self.biryani, 1), (self.borhani, 3))
+        self.place('b@example.com', (self.borhani, 2))
+        cancelled = self.place('c@example.com', (self.biryani, 10))
+        Order.objects.filter(id=cancelled.id).update(status='cancelled')
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/restaurant/analytics/top-sellers/?days=7')
+
+        top = response.data['items']
+        self.assertEqual([row['name'] for row in top], ['Borhani', 'Kacchi Biryani'])
+        self.assertEqual(top[0]['quantity'], 5)
+        self.assertEqual(top[0]['orders'], 2)
+        self.assertEqual(top[1]['quantity'], 1)
+
+    def test_snapshot_backfill_shares_the_stored_subtotal_between_items(self):
+        order = self.place('a@example.com', (self.biryani, 2), (self.borhani, 1))
+        single = self.place('b@example.com', (self.borhani, 3))
+        # Placed before checkout snapshotted items, and repriced since
+        for placed in (order, single):
+            Order.objects.filter(pk=placed.pk).update(items=[
+                {'food_id': item['food_id'], 'quantity': item['quantity']} for item in placed.items
+            ])
+        Food.objects.filter(pk=self.biryani.pk).update(price=Decimal('300.00'))
+        Food.objects.filter(pk=self.borhani.pk).update(price=Decimal('100.00'))
+
+        call_command('backfill_order_snapshots', batch_size=1, stdout=StringIO())
+
+        items = {item['food_name']: item for item in Order.objects.get(pk=order.pk).items}
+        # 560.00 sold, split 600:100 at today's prices
+        self.assertEqual(sum(Decimal(item['subtotal']) for item in items.values()), Decimal('560.00'))
+        self.assertEqual((items['Kacchi Biryani']['subtotal'], items['Kacchi Biryani']['food_price']), (
+            '480.00', '240.00'
+        ))
+        self.assertEqual(items['Borhani']['subtotal'], '80.00')
+        self.assertTrue(all(item['estimated'] for item in items.values()))
+
+        [item] = Order.objects.get(pk=single.pk).items
+        self.assertEqual((item['subtotal'], item['food_price']), ('180.00', '60.00'))
+        self.assertNotIn('estimated', item)
+
+    def test_backfill_creates_lines_for_old_orders(self):
+        order = self.place('a@example.com', (self.biryani, 2))
+        order.lines.all().delete()
+
+        call_command('backfill_order_lines', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(order.lines.get().quantity, 2)
+
+
+
+class RevenueChartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+
+    def create_order(self, days_ago, total, status='delivered'):
+        order = Order.objects.create(
+            user=self.customer, restaurant=self.restaurant, items=[], subtotal=total,
+            delivery_fee=Decimal('0'), total=Decimal(total), payment_method='cod', status=status
+        )
+        Order.objects.filter(id=order.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+    def test_daily_chart_is_one_grouped_query_with_empty_days_filled(self):
+        self.create_order(0, '100.00')
+        self.create_order(0, '50.00')
+        self.create_order(2, '30.00')
+        self.create_order(2, '999.00', status='cancelled')
+        self.create_order(10, '999.00')
+        rebuild_daily_stats()  # created_at was moved behind the rollup's back
+
+        with CaptureQueriesContext(connection) as queries:
+            chart = RestaurantAnalyticsView().get_chart_data(self.restaurant, 'daily')
+
+        self.assertEqual(len(uncached(queries)), 1)
+
+        self.assertEqual(len(chart['labels']), 7)
+        self.assertEqual(chart['labels'][-2:], ['Yesterday', 'Today'])
+        self.assertEqual(chart['values'], [0, 0, 0, 0, 30.0, 0, 150.0])
+        self.assertEqual(chart['order_counts'], [0, 0, 0, 0, 1, 0, 2])
+        self.assertEqual(chart['total_revenue'], 180.0)
+        self.assertEqual(chart['avg_order_value'], 60.0)
+
+    def test_monthly_chart_has_twelve_consecutive_months(self):
+        chart = RestaurantAnalyticsView().get_chart_data(self.restaurant, 'monthly')
+
+        self.assertEqual(len(chart['labels']), 12)
+        self.assertEqual(len(set(chart['labels'])), 12)
+        self.assertEqual(chart['labels'][-1], 'This Month')
+        self.assertIn('avg_monthly', chart)
+
+
+
+class RestaurantDailyStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+
+    def create_order(self, total):
+        return Order.objects.create(
+            user=self.customer, restaurant=self.restaurant, items=[], subtotal=total,
+            delivery_fee=Decimal('0'), total=Decimal(total), payment_method='cod'
+        )
+
+    def stats(self):
+        return RestaurantDailyStats.objects.get(restaurant=self.restaurant, date=timezone.localdate())
+
+    def test_status_transitions_update_the_rollup(self):
+        first = self.create_order('100.00')
+        second = self.create_order('40.00')
+        self.assertEqual(self.stats().pending_orders, 2)
+
+        for status in ['preparing', 'ready_for_pickup', 'picked_up', 'delivered']:
+            first.status = status
+            first.save()
+        second = Order.objects.get(id=second.id)
+        second.status = 'cancelled'
+        second.save()
+        second.save()  # saving again without a transition changes nothing
+
+        stats = self.stats()
+        self.assertEqual(stats.total_orders, 2)
+        self.assertEqual(stats.pending_orders, 0)
+        self.assertEqual(stats.preparing_orders, 0)
+        self.assertEqual(stats.delivered_orders, 1)
+        self.assertEqual(stats.cancelled_orders, 1)
+        self.assertEqual(stats.gross_revenue, Decimal('100.00'))
+        self.assertEqual(stats.commission, Decimal('15.00'))
+        self.assertEqual(stats.net_revenue, Decimal('85.00'))
+        self.assertEqual(stats.cancelled_revenue, Decimal('40.00'))
+
+    def test_rebuild_matches_incremental_rollup(self):
+        for total, status in [('100.00', 'delivered'), ('40.00', 'cancelled'), ('25.50', 'preparing')]:
+            order = self.create_order(total)
+            order.status = status
+            order.save()
+        self.create_order('10.00').delete()
+        incremental = [
+            model.objects.values().get() for model in [RestaurantDailyStats, PlatformDailyStats, PlatformTotals]
+        ]
+
+        call_command('rebuild_restaurant_stats', start=str(timezone.localdate()), stdout=StringIO())
+
+        rebuilt = [
+            model.objects.values().get() for model in [RestaurantDailyStats, PlatformDailyStats, PlatformTotals]
+        ]
+        for row in incremental + rebuilt:
+            del row['id'], row['updated_at']
+        self.assertEqual(rebuilt, incremental)
+        self.assertEqual(rebuilt[2]['delivered_orders'], 1)
+
+    def test_earnings_view_reads_the_rollup(self):
+        order = self.create_order('200.00')
+        order.status = 'delivered'
+        order.save()
+        client = APIClient()
+        client.force_authenticate(self.restaurant.owner)
+
+        response = client.get('/api/v1/restaurant/earnings/')
+
+        self.assertEqual(response.data['daily_revenue'], {'gross': 200.0, 'commission': 30.0, 'net': 170.0})
+        self.assertEqual(response.data['daily_data'][-1]['day'], 'Today')
+        self.assertEqual(response.data['daily_data'][-1]['orders_count'], 1)
+        self.assertEqual(len(response.data['weekly_data']), 4)
+        self.assertEqual(response.data['monthly_data'][-1]['gross_revenue'], 200.0)
+        self.assertEqual(response.data['total_statistics']['total_orders'], 1)
+
+    def test_admin_dashboard_reads_platform_counters(self):
+        other = create_restaurant(email='other@example.com', name='Other')
+        for restaurant, total, status in [
+            (self.restaurant, '100.00', 'delivered'), (other, '50.00', 'delivered'), (other, '20.00', 'cancelled')
+        ]:
+            order = Order.objects.create(
+                user=self.customer, restaurant=restaurant, items=[], subtotal=total,
+                delivery_fee=Decimal('0'), total=Decimal(total), payment_method='cod'
+            )
+            order.status = status
+            order.save()
+        admin_user = User.objects.create_user(email='admin@example.com', role='admin')
+        client = APIClient()
+        client.force_authenticate(admin_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/admin/dashboard/')
+        self.assertFalse([q for q in queries.captured_queries if 'SUM(' in q['sql'] and 'core_order"' in q['sql']])
+
+        self.assertEqual(response.data['revenue'], 150.0)
+        self.assertEqual(response.data['orders'], 3)
+        self.assertEqual(response.data['deliveries'], 2)
+        self.assertEqual(response.data['cancelled'], 1)
+        self.assertEqual(response.data['charts']['daily']['revenue'][-1], 150.0)
+        self.assertEqual(response.data['platformStats']['dailyOrders'], 3)
+        self.assertEqual(response.data['totalRestaurants'], 2)
+        self.assertEqual(client.get('/api/v1/admin/revenue/?period=weekly').data['charts']['line'][-1], 150.0)
+
+class RestaurantMetricsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+
+    def create_order(self, total):
+        return Order.objects.create(
+            user=self.customer, restaurant=self.restaurant, items=[], subtotal=total,
+            delivery_fee=Decimal('0'), total=Decimal(total), payment_method='cod'
+        )
+
+    def test_dashboard_and_earnings_share_cached_metrics_until_an_order_changes(self):
+        order = self.create_order('200.00')
+        client = APIClient()
+        client.force_authenticate(self.restaurant.owner)
+        client.get('/api/v1/restaurant/analytics/')
+        client.get('/api/v1/restaurant/earnings/')
+
+        with mock.patch.object(RestaurantMetricsService, 'compute_series') as compute_series, \
+                mock.patch.object(RestaurantMetricsService, 'compute_totals') as compute_totals:
+            client.get('/api/v1/restaurant/analytics/')
+            client.get('/api/v1/restaurant/earnings/')
+        compute_series.assert_not_called()
+        compute_totals.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'delivered'
+            order.save()
+
+        response = client.get('/api/v1/restaurant/analytics/')
+        self.assertEqual(response.data['delivered_orders'], 1)
+        self.assertEqual(response.data['daily_revenue'], 200.0)
+
+    def test_cache_outage_after_commit_does_not_fail_the_order_change(self):
+        order = self.create_order('200.00')
+
+        with mock.patch.object(RestaurantMetricsService, 'invalidate', side_effect=ConnectionError('cache down')):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                order.status = 'delivered'
+                order.save()
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'delivered')
+
+    def test_rebuilding_the_rollup_invalidates_cached_metrics(self):
+        self.create_order('200.00')
+        self.assertEqual(RestaurantMetricsService(self.restaurant).totals()['total_orders'], 1)
+
+        # bulk_create skips the signals, so only a rebuild brings this order into the rollup
+        Order.objects.bulk_create([Order(
+            user=self.customer, restaurant=self.restaurant, items=[], subtotal=Decimal('100.00'),
+            delivery_fee=Decimal('0'), total=Decimal('100.00'), payment_method='cod'
+        )])
+        call_command('rebuild_restaurant_stats', restaurant=[self.restaurant.id], stdout=StringIO())
+
+        self.assertEqual(RestaurantMetricsService(self.restaurant).totals()['total_orders'], 2)
+
+    # The lock logic is the same on every backend; SQLite's table locks would only add timing noise
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def slow_totals(service):
+            calls.append(1)
+            time.sleep(0.2)
+            return {'total_orders': 0}
+
+        results = []
+
+        with mock.patch.object(RestaurantMetricsService, 'compute_totals', autospec=True, side_effect=slow_totals):
+            threads = [
+                threading.Thread(target=lambda: results.append(RestaurantMetricsService(self.restaurant).totals()))
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'total_orders': 0}] * 5)
+
+
+class RestaurantRatingTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+
+    def review(self, rating):
+        order = Order.objects.create(
+            user=self.customer, restaurant=self.restaurant, items=[], subtotal=Decimal('100.00'),
+            delivery_fee=Decimal('0'), total=Decimal('100.00'), payment_method='cod', status='delivered'
+        )
+        return Review.objects.create(order=order, rating=rating)
+
+    def test_reviews_update_stored_aggregates(self):
+        self.review(5)
+        four = self.review(4)
+        self.review(4)
+
+        self.restaurant.refresh_from_db()
+        self.assertEqual((self.restaurant.rating_count, self.restaurant.rating_sum), (3, 13))
+        self.assertEqual(self.restaurant.get_rating_histogram(), {1: 0, 2: 0, 3: 0, 4: 2, 5: 1})
+        self.assertEqual(self.restaurant.get_average_rating(), 4.3)
+
+        four.rating = 2
+        four.save()
+        Review.objects.get(rating=5).delete()
+
+        self.restaurant.refresh_from_db()
+        self.assertEqual((self.restaurant.rating_count, self.restaurant.rating_sum), (2, 6))
+        self.assertEqual(self.restaurant.get_rating_histogram(), {1: 0, 2: 1, 3: 0, 4: 1, 5: 0})
+
+    def test_rebuild_recomputes_from_reviews(self):
+        self.review(3)
+        self.review(5)
+        Restaurant.objects.update(rating_count=0, rating_sum=0, rating_3=9)
+
+        call_command('rebuild_restaurant_ratings', stdout=StringIO())
+
+        self.restaurant.refresh_from_db()
+        self.assertEqual((self.restaurant.rating_count, self.restaurant.rating_sum), (2, 8))
+        self.assertEqual(self.restaurant.get_rating_histogram(), {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+
+    def test_saving_a_stale_restaurant_keeps_review_counts(self):
+        stale = Restaurant.objects.get(pk=self.restaurant.pk)
+        self.review(5)
+
+        stale.name = 'Renamed'
+        stale.lat = 23.75
+        stale.save()
+        admin_user = User.objects.create_user(email='admin@example.com', role='admin')
+        client = APIClient()
+        client.force_authenticate(admin_user)
+        response = client.post(f'/api/v1/admin/restaurants/{self.restaurant.pk}/approve/')
+
+        self.assertEqual(response.status_code, 200)
+
+        self.restaurant.refresh_from_db()
+        self.assertEqual(self.restaurant.name, 'Renamed')
+        self.assertEqual((self.restaurant.rating_count, self.restaurant.rating_sum, self.restaurant.rating_5), (1, 5, 1))
+
+    def test_restaurant_list_reads_stored_ratings(self):
+        for i in range(3):
+            restaurant = create_restaurant(email=f'owner{i}@example.com', name=f'Restaurant {i}')
+            Restaurant.objects.filter(pk=restaurant.pk).update(rating_count=2, rating_sum=9)
+        client = APIClient()
+        client.force_authenticate(self.customer)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/customer/restaurants/')
+
+        self.assertEqual(response.data[-1]['rating'], 4.5)
+        self.assertFalse([query for query in queries if 'core_review' in query['sql']])
+
+
+class CustomerLocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = create_customer('customer@example.com')
+        Address.objects.create(
+            user=self.customer, title='Home', address='Gulshan 1', lat=23.78, lng=90.41, is_default=True
+        )
+        for i in range(3):
+            restaurant = create_restaurant(email=f'owner{i}@example.com', name=f'Kacchi House {i}')
+            create_food(restaurant, name=f'Kacchi {i}')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def address_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len([query for query in queries if 'core_address' in query['sql']])
+
+    def test_default_address_is_looked_up_once_per_request(self):
+        for url in ['/api/v1/customer/home/', '/api/v1/customer/search/?q=kacchi', '/api/v1/customer/restaurants/']:
+            _, lookups = self.address_queries(url)
+            self.assertEqual(lookups, 1, url)
+
+    def test_explicit_coordinates_skip_the_address_lookup(self):
+        response, lookups = self.address_queries('/api/v1/customer/home/?lat=23.78&lng=90.41')
+        far, _ = self.address_queries('/api/v1/customer/home/?lat=23.50&lng=90.41&radius_km=50')
+
+        self.assertEqual(lookups, 0)
+        self.assertNotEqual(
+            response.data['nearby_restaurants'][0]['delivery_time'], far.data['nearby_restaurants'][0]['delivery_time']
+        )
+
+    def test_invalid_coordinates_fall_back_to_the_address(self):
+        _, lookups = self.address_queries('/api/v1/customer/home/?lat=north&lng=90.41')
+
+        self.assertEqual(lookups, 1)
+
+
+class GeoTests(TestCase):
+    def test_vectorized_distances_match_the_haversine_formula(self):
+        # Dhaka to Chattogram is about 214 km as the crow flies
+        self.assertAlmostEqual(distance_km(23.8103, 90.4125, 22.3569, 91.7832), 214, delta=0.5)
+        distances = distances_km(23.8103, 90.4125, [23.8103, 22.3569], [90.4125, 91.7832])
+        self.assertEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], distance_km(23.8103, 90.4125, 22.3569, 91.7832))
+
+        matrix = distance_matrix_km([23.81, 22.36], [90.41, 91.78], [23.81, 22.36, 24.0], [90.41, 91.78, 90.0])
+        self.assertEqual(matrix.shape, (2, 3))
+        self.assertAlmostEqual(matrix[0, 1], matrix[1, 0])
+
+    def test_delivery_times_for_many_restaurants_match_single_calls(self):
+        near = create_restaurant()
+        far = create_restaurant(email='far@example.com', name='Far Away')
+        Restaurant.objects.filter(pk=far.pk).update(lat=22.3569, lng=91.7832)
+        unlocated = create_restaurant(email='none@example.com', name='Nowhere')
+        Restaurant.objects.filter(pk=unlocated.pk).update(lat=0, lng=0)
+        restaurants = list(Restaurant.objects.all())
+
+        times = Restaurant.delivery_times(restaurants, 23.80, 90.41)
+
+        for restaurant in restaurants:
+            self.assertEqual(times[restaurant.id], restaurant.calculate_delivery_time(23.80, 90.41))
+        self.assertEqual(times[unlocated.id], '30 min')
+        self.assertGreater(int(times[far.id].split()[0]), int(times[near.id].split()[0]))
+
+    def test_available_orders_carry_real_pickup_distances(self):
+        restaurant = create_restaurant()
+        customer = create_customer('customer@example.com')
+        rider = User.objects.create_user(email='rider@example.com', role='rider')
+        RiderLocation.objects.create(rider=rider, lat=23.8103, lng=90.4125)
+        Order.objects.create(
+            user=customer, restaurant=restaurant, items=[], subtotal=Decimal('100.00'),
+            delivery_fee=Decimal('5.00'), total=Decimal('105.00'), payment_method='cod', status='ready_for_pickup'
+        )
+        client = APIClient()
+        client.force_authenticate(rider)
+
+        response = client.get('/api/v1/rider/available-orders/')
+
+        self.assertEqual(response.data[0]['distance'], 0.0)
+        self.assertEqual(response.data[0]['rider_payout'], 50.0)
+        # The fee the customer was charged is left as it is
+        self.assertEqual(response.data[0]['delivery_fee'], '5.00')
+
+        summary = client.get('/api/v1/rider/available-orders/', {'view': 'summary'}).data[0]
+        self.assertFalse({'distance', 'rider_payout', 'delivery_fee'} & set(summary))
+        trimmed = client.get('/api/v1/rider/available-orders/', {'fields': 'id,distance'}).data[0]
+        self.assertEqual(set(trimmed), {'id', 'distance'})
+
+
+class NearbyRestaurantTests(TestCase):
+    PLACES = {
+        'Gulshan': (23.7925, 90.4078),
+        'Banani': (23.7937, 90.4066),
+        'Dhanmondi': (23.7461, 90.3742),
+        'Uttara': (23.8759, 90.3795),
+        'Chattogram': (22.3569, 91.7832),
+    }
+
+    def setUp(self):
+        for i, (name, (lat, lng)) in enumerate(self.PLACES.items()):
+            restaurant = create_restaurant(email=f'owner{i}@example.com', name=name)
+            restaurant.lat, restaurant.lng = lat, lng
+            restaurant.save()
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def names(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [restaurant['name'] for restaurant in response.data]
+
+    def test_geohash_is_kept_in_step_with_coordinates(self):
+        restaurant = Restaurant.objects.get(name='Gulshan')
+        self.assertEqual(restaurant.geohash, geohash(23.7925, 90.4078))
+
+        restaurant.lat, restaurant.lng = 22.3569, 91.7832
+        restaurant.save(update_fields=['lat', 'lng'])
+
+        restaurant.refresh_from_db()
+        self.assertEqual(restaurant.geohash, geohash(22.3569, 91.7832))
+
+    def test_radius_filter_returns_nearest_first_with_distance_and_delivery_time(self):
+        response = self.client.get('/api/v1/customer/restaurants/?lat=23.7930&lng=90.4070&radius_km=8')
+
+        self.assertEqual(self.names(response), ['Banani', 'Gulshan', 'Dhanmondi'])
+        self.assertLess(response.data[0]['distance_km'], 0.1)
+        self.assertEqual(response.data[0]['delivery_time'], '20 min')
+
+    def test_nearby_matches_a_full_scan(self):
+        lat, lng = 23.80, 90.40
+        for radius in [0.5, 2, 5, 10, 20, 50, 250]:
+            expected = sorted(
+                name for name, point in self.PLACES.items() if distance_km(lat, lng, *point) <= radius
+            )
+            found = sorted(restaurant.name for restaurant in Restaurant.nearby(lat, lng, radius))
+            self.assertEqual(found, expected, radius)
+
+    def test_home_shows_restaurants_near_the_customer(self):
+        response = self.client.get('/api/v1/customer/home/?lat=23.7930&lng=90.4070')
+
+        self.assertEqual(
+            [restaurant['name'] for restaurant in response.data['nearby_restaurants']],
+            ['Banani', 'Gulshan', 'Dhanmondi', 'Uttara']
+        )
+
+    def test_radius_needs_a_location_and_a_sane_value(self):
+        self.assertEqual(self.client.get('/api/v1/customer/restaurants/?radius_km=5').status_code, 400)
+        self.assertEqual(
+            self.client.get('/api/v1/customer/restaurants/?lat=23.79&lng=90.40&radius_km=5000').status_code, 400
+        )
+        self.assertEqual(len(self.client.get('/api/v1/customer/restaurants/').data), 5)
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        # Drops the index version, so the first search rebuilds from this test's rows
+        cache.clear()
+        self.biryani_house = create_restaurant(name='Kacchi House')
+        self.burger_bar = create_restaurant(email='burger@example.com', name='Burger Bar')
+        rice = Category.objects.create(name='Rice')
+        chicken = create_food(self.biryani_house, name='Chicken Biryani')
+        chicken.category = rice
+        chicken.ingredients = 'basmati, saffron'
+        chicken.save()
+        create_food(self.biryani_house, name='Borhani')
+        create_food(self.burger_bar, name='Chicken Burger')
+        create_food(self.burger_bar, name='Beef Biryani')
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def search(self, query, **params):
+        response = self.client.get('/api/v1/customer/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_results_are_ranked_with_matching_items_grouped(self):
+        data = self.search('chicken biryani')
+
+        self.assertEqual([r['name'] for r in data['restaurants']], ['Kacchi House', 'Burger Bar'])
+        self.assertEqual([item['name'] for item in data['restaurants'][0]['matching_items']], ['Chicken Biryani'])
+        self.assertEqual(
+            {item['name'] for item in data['restaurants'][1]['matching_items']}, {'Chicken Burger', 'Beef Biryani'}
+        )
+
+    def test_searches_prefixes_category_and_ingredients(self):
+        self.assertEqual([r['name'] for r in self.search('burg')['restaurants']], ['Burger Bar'])
+        self.assertEqual([r['name'] for r in self.search('saffron')['restaurants']], ['Kacchi House'])
+        self.assertEqual([r['name'] for r in self.search('rice')['restaurants']], ['Kacchi House'])
+        self.assertEqual(self.search('pizza')['count'], 0)
+
+    def test_pagination(self):
+        first = self.search('biryani', page_size=1)
+        second = self.search('biryani', page_size=1, page=2)
+
+        self.assertEqual((first['count'], first['has_next'], second['has_next']), (2, True, False))
+        self.assertNotEqual(first['restaurants'][0]['id'], second['restaurants'][0]['id'])
+
+    def test_catalogue_filters_sorts_and_facets_apply_to_hits(self):
+        Food.objects.filter(name='Beef Biryani').update(price=Decimal('100.00'), is_veg=False)
+
+        data = self.search('biryani', is_veg='false')
+        self.assertEqual([r['name'] for r in data['restaurants']], ['Burger Bar'])
+        self.assertEqual([item['name'] for item in data['restaurants'][0]['matching_items']], ['Beef Biryani'])
+        self.assertEqual(data['count'], 1)
+        # Facets count the hit restaurants' foods, the veg facet ignoring its own filter
+        self.assertEqual(data['facets']['is_veg'], {'true': 3, 'false': 1})
+        self.assertEqual(data['facets']['category'], [{'id': None, 'name': None, 'count': 1}])
+
+        self.assertEqual(
+            [r['name'] for r in self.search('biryani', sort='price')['restaurants']], ['Burger Bar', 'Kacchi House']
+        )
+        self.assertEqual(
+            [r['name'] for r in self.search('biryani', sort='relevance')['restaurants']],
+            [r['name'] for r in self.search('biryani')['restaurants']]
+        )
+
+    def test_facets_are_only_counted_when_asked_for_or_filtering(self):
+        with mock.patch.object(catalog_service, 'facets') as facets:
+            self.assertNotIn('facets', self.search('biryani'))
+        facets.assert_not_called()
+
+        data = self.search('biryani', facets='true')
+        self.assertEqual(data['facets']['is_veg'], {'true': 4, 'false': 0})
+        self.assertEqual(data['count'], 2)
+
+    def test_refinements_consider_only_the_best_hits(self):
+        with mock.patch.object(catalog_service, 'MAX_REFINED_HITS', 1):
+            data = self.search('biryani', sort='rating')
+
+        self.assertEqual(data['count'], 1)
+
+    def test_invalid_refinements_are_rejected(self):
+        for params in [{'sort': 'name'}, {'is_veg': 'maybe'}, {'sort': 'distance'}, {'facets': 'maybe'}]:
+            response = self.client.get('/api/v1/customer/search/', {'q': 'biryani', **params})
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_changes_are_indexed_incrementally(self):
+        self.search('biryani')
+
+        with mock.patch.object(search_index.index, 'rebuild') as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                create_food(self.burger_bar, name='Pepperoni Pizza')
+            with self.captureOnCommitCallbacks(execute=True):
+                Restaurant.objects.filter(pk=self.burger_bar.pk).first().delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.biryani_house.name = 'Pizza Palace'
+                self.biryani_house.save()
+
+            data = self.search('pizza')
+
+        rebuild.assert_not_called()
+        self.assertEqual([r['name'] for r in data['restaurants']], ['Pizza Palace'])
+        self.assertEqual(data['restaurants'][0]['matching_items'], [])
+
+    def test_unapproved_restaurants_are_hidden(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.burger_bar.is_approved = False
+            self.burger_bar.save()
+
+        self.assertEqual([r['name'] for r in self.search('biryani')['restaurants']], ['Kacchi House'])
+
+    def test_other_processes_replay_logged_changes(self):
+        # Another worker: its own index, the same shared cache
+        other = search_index.SearchIndex()
+        other_sync = search_index.IndexSync('search_index', other)
+        other_sync.refresh()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.burger_bar.name = 'Pizza Palace'
+            self.burger_bar.save()
+        with mock.patch.object(other, 'rebuild') as rebuild:
+            other_sync.refresh()
+        rebuild.assert_not_called()
+        self.assertEqual(other.search('pizza')[0]['restaurant_id'], self.burger_bar.id)
+
+        # A log entry that's gone (evicted) can't be replayed, so the worker rebuilds
+        version = search_index.record_change(Restaurant, self.burger_bar.id)
+        cache.delete(other_sync.change_key(version))
+        with mock.patch.object(other, 'rebuild') as rebuild:
+            other_sync.refresh()
+        rebuild.assert_called_once()
+
+    @override_settings(INDEX_MAX_AGE=0)
+    def test_index_is_rebuilt_once_it_is_too_old(self):
+        self.search('biryani')
+
+        with mock.patch.object(search_index.index, 'rebuild') as rebuild:
+            self.search('biryani')
+        rebuild.assert_called_once()
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.kacchi_house = create_restaurant(name='Kacchi House')
+        self.burger_bar = create_restaurant(email='burger@example.com', name='Burger Bar')
+        create_food(self.kacchi_house, name='Chicken Biryani')
+        create_food(self.kacchi_house, name='Borhani')
+        create_food(self.burger_bar, name='Chicken Burger')
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def suggest(self, query, **params):
+        response = self.client.get('/api/v1/customer/search/autocomplete/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [suggestion['name'] for suggestion in response.data['suggestions']]
+
+    def test_prefixes_complete_dish_and_restaurant_names(self):
+        self.assertEqual(self.suggest('kac'), ['Kacchi House'])
+        self.assertEqual(self.suggest('chick bir'), ['Chicken Biryani'])
+        self.assertEqual(self.suggest('chicken'), ['Chicken Burger', 'Chicken Biryani'])
+        self.assertEqual(self.suggest('chicken', limit=1), ['Chicken Burger'])
+
+    def test_misspellings_still_match(self):
+        for query in ['biryani', 'biriyani', 'birani', 'chiken biriyani']:
+            self.assertEqual(self.suggest(query), ['Chicken Biryani'], query)
+        self.assertEqual(self.suggest('pizza'), [])
+
+    def test_search_offers_suggestions_when_nothing_matches(self):
+        response = self.client.get('/api/v1/customer/search/', {'q': 'birani'})
+
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual([s['name'] for s in response.data['suggestions']], ['Chicken Biryani'])
+
+    def test_changes_are_indexed_incrementally(self):
+        self.suggest('bir')
+
+        with mock.patch.object(autocomplete.index, 'rebuild') as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                create_food(self.burger_bar, name='Beef Biryani')
+            with self.captureOnCommitCallbacks(execute=True):
+                Food.objects.get(name='Chicken Biryani').delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.burger_bar.is_approved = False
+                self.burger_bar.save()
+
+            self.assertEqual(self.suggest('biryani'), [])
+            self.assertEqual(self.suggest('borh'), ['Borhani'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.burger_bar.is_approved = True
+                self.burger_bar.save()
+            self.assertEqual(self.suggest('biryani'), ['Beef Biryani'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Food.objects.get(name='Borhani').delete()
+            self.assertEqual(self.suggest('borh'), [])
+
+        rebuild.assert_not_called()
+        # "borhani" was the only word under "bo", so its branch is pruned
+        self.assertNotIn('o', autocomplete.index.trie['b'])
+
+    def test_other_processes_replay_logged_changes(self):
+        other = autocomplete.Autocomplete()
+        other_sync = autocomplete.IndexSync('autocomplete', other)
+        other_sync.refresh()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_food(self.burger_bar, name='Beef Biryani')
+        with mock.patch.object(other, 'rebuild') as rebuild:
+            other_sync.refresh()
+
+        rebuild.assert_not_called()
+        self.assertEqual([s['name'] for s in other.suggest('biriyani')], ['Beef Biryani', 'Chicken Biryani'])
+
+
+class FoodCatalogueTests(TestCase):
+    def setUp(self):
+        self.kacchi_house = create_restaurant(name='Kacchi House')
+        self.burger_bar = create_restaurant(email='burger@example.com', name='Burger Bar')
+        self.burger_bar.cuisine = 'Fast Food'
+        self.burger_bar.lat, self.burger_bar.lng = 23.79, 90.40
+        self.burger_bar.save()
+        self.rice = Category.objects.create(name='Rice')
+        self.burgers = Category.objects.create(name='Burgers')
+
+        self.biryani = self.food(self.kacchi_house, 'Kacchi Biryani', '250.00', self.rice, is_veg=False)
+        self.khichuri = self.food(self.kacchi_house, 'Khichuri', '150.00', self.rice)
+        self.beef_burger = self.food(self.burger_bar, 'Beef Burger', '300.00', self.burgers, is_veg=False)
+        self.veggie_burger = self.food(self.burger_bar, 'Veggie Burger', '200.00', self.burgers, is_available=False)
+
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def food(self, restaurant, name, price, category, **fields):
+        food = create_food(restaurant, name=name, price=price, stock_quantity=100)
+        Food.objects.filter(pk=food.pk).update(category=category, **fields)
+        return food
+
+    def browse(self, **params):
+        response = self.client.get('/api/v1/customer/food/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def names(self, data):
+        return [food['name'] for food in data['results']]
+
+    def test_filters_are_applied_in_the_database(self):
+        self.assertEqual(self.names(self.browse(category=self.rice.id)), ['Kacchi Biryani', 'Khichuri'])
+        self.assertEqual(self.names(self.browse(is_veg='true', is_available='true')), ['Khichuri'])
+        self.assertEqual(self.names(self.browse(min_price=200, max_price=250)), ['Kacchi Biryani', 'Veggie Burger'])
+        self.assertEqual(self.names(self.browse(cuisine='fast food')), ['Beef Burger', 'Veggie Burger'])
+        self.assertEqual(self.names(self.browse(restaurant=self.kacchi_house.id)), ['Kacchi Biryani', 'Khichuri'])
+
+    def test_facets_count_every_filter_but_their_own(self):
+        data = self.browse(category=self.burgers.id, is_veg='false')
+
+        self.assertEqual(self.names(data), ['Beef Burger'])
+        facets = data['facets']
+        # Other categories are counted under is_veg=false; veg counts ignore the veg filter
+        self.assertEqual(
+            [(row['name'], row['count']) for row in facets['category']], [('Burgers', 1), ('Rice', 1)]
+        )
+        self.assertEqual(facets['is_veg'], {'true': 1, 'false': 1})
+        self.assertEqual(facets['is_available'], {'true': 1, 'false': 0})
+        self.assertEqual(facets['price'], {'min': 300.0, 'max': 300.0})
+        self.assertEqual(facets['cuisine'], [{'name': 'Fast Food', 'count': 1}])
+
+    def test_sorting(self):
+        self.assertEqual(
+            self.names(self.browse(sort='-price')), ['Beef Burger', 'Kacchi Biryani', 'Veggie Burger', 'Khichuri']
+        )
+
+        customer = create_customer('buyer@example.com')
+        fill_cart(customer, (self.khichuri, 3), (self.biryani, 1))
+        CheckoutService(customer).place_order(current_location=CURRENT_LOCATION)
+        self.assertEqual(self.names(self.browse(sort='popularity'))[:2], ['Khichuri', 'Kacchi Biryani'])
+
+        # Burger Bar sits closer to this point than Kacchi House's default location
+        data = self.browse(sort='distance', lat=23.79, lng=90.40, page_size=2)
+        self.assertEqual(self.names(data), ['Beef Burger', 'Veggie Burger'])
+        self.assertEqual(data['results'][0]['distance_km'], 0)
+        self.assertTrue(data['has_next'])
+
+    def test_distance_sort_only_ranks_restaurants_in_range(self):
+        # Kacchi House, at the default location, is over 2 km from Burger Bar
+        data = self.browse(sort='distance', lat=23.79, lng=90.40, radius_km=1)
+
+        self.assertEqual(self.names(data), ['Beef Burger', 'Veggie Burger'])
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['facets']['cuisine'], [{'name': 'Fast Food', 'count': 2}])
+
+    def test_pages_load_only_their_rows(self):
+        # Count, the page, its addons and three facet aggregates
+        with self.assertNumQueries(6):
+            data = self.browse(sort='price', page_size=2, page=2)
+
+        self.assertEqual(self.names(data), ['Kacchi Biryani', 'Beef Burger'])
+        self.assertEqual((data['count'], data['has_next']), (4, False))
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in [
+            {'sort': 'name'}, {'is_veg': 'maybe'}, {'min_price': 'cheap'}, {'sort': 'distance'},
+            {'min_price': 'nan'}, {'min_price': 'inf'}, {'max_price': '1e400'}
+        ]:
+            response = self.client.get('/api/v1/customer/food/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_huge_pages_are_empty(self):
+        data = self.browse(page='99999999999999999999', max_price='1e300')
+
+        self.assertEqual((data['results'], data['count'], data['has_next']), ([], 4, False))
+
+
+class MenuSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = create_restaurant()
+        rice = Category.objects.create(name='Rice')
+        self.cheese = Addon.objects.create(name='Extra Cheese', price=Decimal('30.00'), restaurant=self.restaurant)
+        self.biryani = create_food(self.restaurant, stock_quantity=3)
+        self.biryani.category = rice
+        self.biryani.save()
+        self.biryani.available_addons.add(self.cheese)
+        create_food(self.restaurant, name='Borhani', price='60.00')
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        self.url = f'/api/v1/customer/restaurants/{self.restaurant.id}/menu/'
+
+    def etag(self):
+        return self.client.get(self.url)['ETag']
+
+    def test_menu_is_grouped_by_category_with_addons_and_stock(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        categories = response.data['categories']
+        self.assertEqual([category['name'] for category in categories], ['Rice', 'Other'])
+        biryani = categories[0]['items'][0]
+        self.assertEqual([addon['name'] for addon in biryani['available_addons']], ['Extra Cheese'])
+        self.assertEqual((biryani['stock_quantity'], biryani['stock_status']), (3, '🟡 Low Stock (3)'))
+        self.assertEqual([item['name'] for item in categories[1]['items']], ['Borhani'])
+        self.assertEqual([addon['name'] for addon in response.data['addons']], ['Extra Cheese'])
+
+    def test_item_images_are_absolute_like_the_food_endpoint(self):
+        Food.objects.filter(pk=self.biryani.pk).update(image='foods/biryani.jpg')
+
+        menu = self.client.get(self.url).data
+        food = self.client.get(f'/api/v1/customer/food/{self.biryani.id}/').data
+
+        self.assertEqual(menu['categories'][0]['items'][0]['image'], 'http://testserver/media/foods/biryani.jpg')
+        self.assertEqual(menu['categories'][0]['items'][0]['image'], food['image'])
+        self.assertIsNone(menu['categories'][1]['items'][0]['image'])
+        # The shared snapshot keeps the path, whatever host asked first
+        stored = snapshot(self.restaurant.id)[1]
+        self.assertEqual(stored['categories'][0]['items'][0]['image'], '/media/foods/biryani.jpg')
+
+    def test_unchanged_menu_is_served_from_the_cache_alone(self):
+        tag = self.etag()
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=tag)
+
+        self.assertEqual(uncached(queries), [])
+        self.assertEqual(cached['ETag'], tag)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_food_addon_and_stock_changes_bump_the_version(self):
+        tags = [self.etag()]
+
+        changes = [
+            lambda: Addon.objects.get(pk=self.cheese.pk).save(),
+            lambda: self.biryani.available_addons.remove(self.cheese),
+            lambda: create_food(self.restaurant, name='Firni'),
+            lambda: self.biryani.reduce_stock(1),
+        ]
+        for change in changes:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            tags.append(self.etag())
+
+        # Checkout decrements stock with a bulk update
+        fill_cart(self.customer, (self.biryani, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            CheckoutService(self.customer).place_order(current_location=CURRENT_LOCATION)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=tags[-1])
+
+        self.assertEqual(len(set(tags)), len(tags))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['categories'][0]['items'][0]['is_available'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_serves_fresh_menus_without_etags(self):
+        first = self.client.get(self.url)
+        # A bulk stock change made by another worker, whose version bump this process would never see
+        Food.objects.filter(pk=self.biryani.pk).update(stock_quantity=0, is_available=False)
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH='*')
+
+        self.assertNotIn('ETag', first)
+        self.assertEqual(second.status_code, 200)
+        self.assertFalse(second.data['categories'][0]['items'][0]['is_available'])
+
+    def test_unapproved_restaurant_is_not_found(self):
+        self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.is_approved = False
+            self.restaurant.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class RiderEarningsTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+        self.rider = User.objects.create_user(email='rider@example.com', role='rider')
+        self.client = APIClient()
+        self.client.force_authenticate(self.rider)
+
+    def deliver(self, total='100.00'):
+        order = Order.objects.create(
+            user=self.customer, restaurant=self.restaurant, rider=self.rider, items=[], subtotal=total,
+            delivery_fee=Decimal('0'), total=Decimal(total), payment_method='cod', status='out_for_delivery'
+        )
+        order.status = 'delivered'
+        order.save()
+        return order
+
+    def test_earnings_come_from_one_query(self):
+        first = self.deliver()
+        self.deliver()
+        Review.objects.create(order=first, rating=4)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/rider/earnings/')
+
+        self.assertEqual(response.data['today_earnings'], 100.0)
+        self.assertEqual(response.data['today_trips'], 2)
+        self.assertEqual(response.data['weekly_earnings'], 100.0)
+        self.assertEqual(response.data['monthly_trips'], 2)
+        self.assertEqual(response.data['total_trips'], 2)
+        self.assertEqual(response.data['average_rating'], 4.0)
+        self.assertEqual(len(response.data['weekly_breakdown']), 7)
+        self.assertEqual(response.data['weekly_breakdown'][-1]['earnings'], 100.0)
+
+    def test_edited_and_deleted_reviews_move_the_riders_rating(self):
+        first, second = self.deliver(), self.deliver()
+        review = Review.objects.create(order=first, rating=2)
+        Review.objects.create(order=second, rating=4)
+
+        review.rating = 5
+        review.save()
+        self.assertEqual(RiderDailyStats.objects.values('rating_total', 'ratings').get(), {
+            'rating_total': 9, 'ratings': 2
+        })
+
+        Review.objects.get(pk=review.pk).delete()
+        self.assertEqual(RiderDailyStats.objects.values('rating_total', 'ratings').get(), {
+            'rating_total': 4, 'ratings': 1
+        })
+        self.assertEqual(self.client.get('/api/v1/rider/earnings/').data['average_rating'], 4.0)
+
+    def test_undelivering_reverses_the_payout_and_rebuild_matches(self):
+        order = self.deliver()
+        self.deliver()
+        order.status = 'cancelled'
+        order.save()
+
+        self.assertEqual(RiderPayout.objects.count(), 1)
+        incremental = RiderDailyStats.objects.values('trips', 'earnings').get()
+        self.assertEqual(incremental, {'trips': 1, 'earnings': Decimal('50.00')})
+
+        RiderPayout.objects.all().delete()
+        call_command('rebuild_rider_stats', stdout=StringIO())
+
+        self.assertEqual(RiderPayout.objects.count(), 1)
+        self.assertEqual(RiderDailyStats.objects.values('trips', 'earnings').get(), incremental)
+
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+
+    def test_restaurant_orders_export_streams_snapshot_rows_without_food_lookups(self):
+        biryani = create_food(self.restaurant, stock_quantity=5)
+        fill_cart(self.customer, (biryani, 2))
+        order = CheckoutService(self.customer).place_order(current_location=CURRENT_LOCATION)
+        self.client.force_authenticate(self.restaurant.owner)
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.read_csv(self.client.get('/api/v1/restaurant/export/orders/'))
+
+        self.assertFalse([q for q in queries.captured_queries if 'FROM "core_food"' in q['sql']])
+        self.assertEqual(rows[0][0], 'Order ID')
+        self.assertEqual(rows[1][0], str(order.id))
+        self.assertEqual(rows[1][4], 'Kacchi Biryani x2')
+        self.assertEqual(rows[1][7], '505.00')
+
+    def test_earnings_ledger_merges_orders_and_withdrawals_in_time_order(self):
+        order = Order.objects.create(
+            user=self.customer, restaurant=self.restaurant, items=[], subtotal=Decimal('100.00'),
+            delivery_fee=Decimal('0'), total=Decimal('100.00'), payment_method='cod', status='delivered'
+        )
+        withdrawal = WithdrawalRequest.objects.create(
+            restaurant=self.restaurant, amount=Decimal('40.00'), payment_details={}
+        )
+        self.client.force_authenticate(self.restaurant.owner)
+
+        rows = self.read_csv(self.client.get('/api/v1/restaurant/export/earnings/'))
+
+        self.assertEqual([row[2] for row in rows[1:]], [f'Order #{order.id}', f'Withdrawal #{withdrawal.id}'])
+        self.assertEqual(rows[1][3:6], ['100.00', '15.00', '85.00'])
+        self.assertEqual(rows[2][5], '-40.00')
+
+    def test_admin_exports_require_admin(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/v1/admin/export/login-logs/').status_code, 403)
+
+        LoginLog.objects.create(user=self.customer, ip_address='127.0.0.1')
+        self.client.force_authenticate(User.objects.create_user(email='admin@example.com', role='admin'))
+        rows = self.read_csv(self.client.get('/api/v1/admin/export/login-logs/?from=2000-01-01'))
+        self.assertEqual(rows[1][1], 'customer@example.com')
+        self.assertEqual(self.client.get('/api/v1/admin/export/orders/?from=bad').status_code, 400)
+
+    def test_user_input_is_not_exported_as_formulas(self):
+        LoginLog.objects.create(user=self.customer, ip_address='127.0.0.1', user_agent='=HYPERLINK("http://x")')
+        LoginLog.objects.create(user=self.customer, ip_address='127.0.0.1', user_agent='-2+3')
+        LoginLog.objects.create(user=self.customer, ip_address='127.0.0.1', user_agent='Mozilla/5.0')
+        self.client.force_authenticate(User.objects.create_user(email='admin@example.com', role='admin'))
+
+        rows = self.read_csv(self.client.get('/api/v1/admin/export/login-logs/'))
+
+        self.assertEqual(
+            sorted(row[6] for row in rows[1:]), ["'-2+3", '\'=HYPERLINK("http://x")', 'Mozilla/5.0']
+        )
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        Order.objects.bulk_create([
+            Order(
+                user=self.customer, restaurant=self.restaurant, items=[], subtotal=Decimal('100.00'),
+                delivery_fee=Decimal('0'), total=Decimal('100.00'), payment_method='cod'
+            )
+            for _ in range(7)
+        ])
+        # Identical timestamps: only the id tie-breaker keeps pages apart
+        Order.objects.update(created_at=timezone.now())
+
+    def walk(self, url):
+        ids, query_counts = [], []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [order['id'] for order in response.data['results']]
+            query_counts.append(len(queries))
+            url = response.data['next']
+        return ids, query_counts
+
+    def test_pages_cover_every_order_once_newest_first(self):
+        ids, query_counts = self.walk('/api/v1/customer/orders/?page_size=2')
+
+        self.assertEqual(ids, sorted(Order.objects.values_list('id', flat=True), reverse=True))
+        self.assertEqual(len(query_counts), 4)
+        # Later full pages cost the same as the first
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(query_counts[0], query_counts[2])
+
+    @override_settings(API_PAGE_SIZE=3, API_MAX_PAGE_SIZE=5)
+    def test_page_size_defaults_and_is_capped(self):
+        response = self.client.get('/api/v1/customer/orders/')
+        self.assertEqual(len(response.data['results']), 3)
+
+        response = self.client.get('/api/v1/customer/orders/?page_size=1000')
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_restaurant_orders_keep_status_filter(self):
+        Order.objects.filter(pk=Order.objects.order_by('id').values('id')[:1]).update(status='delivered')
+        self.client.force_authenticate(self.restaurant.owner)
+
+        response = self.client.get('/api/v1/restaurant/orders/?status=active&page_size=10')
+
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertIsNone(response.data['next'])
+
+
+class OrderFieldsTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        food = create_food(self.restaurant, stock_quantity=100)
+        for _ in range(5):
+            fill_cart(self.customer, (food, 1))
+            CheckoutService(self.customer).place_order(current_location=CURRENT_LOCATION)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'], len(queries)
+
+    def test_summary_view_returns_list_fields_in_constant_queries(self):
+        full, full_queries = self.get('/api/v1/customer/orders/')
+        summary, summary_queries = self.get('/api/v1/customer/orders/?view=summary')
+
+        self.assertEqual(set(summary[0]), set(OrderSerializer.SUMMARY_FIELDS))
+        self.assertEqual(summary[0]['restaurant_name'], 'Kacchi House')
+        self.assertEqual([order['id'] for order in summary], [order['id'] for order in full])
+        # The full payload queries per order (nested restaurant rating, address); the summary doesn't
+        self.assertEqual(summary_queries, 1)
+        self.assertGreater(full_queries, len(full))
+
+    def test_fields_param_selects_fields_and_loads_only_their_columns(self):
+        orders, queries = self.get('/api/v1/customer/orders/?fields=id,status,items_details,user')
+
+        self.assertEqual(set(orders[0]), {'id', 'status', 'items_details', 'user'})
+        self.assertEqual(orders[0]['user']['email'], 'customer@example.com')
+        self.assertEqual(orders[0]['items_details'][0]['food_name'], 'Kacchi Biryani')
+        self.assertEqual(queries, 1)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/v1/customer/orders/?fields=id,secret')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', str(response.data['fields']))
+
+    def test_actions_still_save_every_field(self):
+        order = Order.objects.filter(user=self.customer).first()
+
+        response = self.client.post(f'/api/v1/customer/orders/{order.id}/cancel/?view=summary')
+
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'cancelled')
+
+
+class IndexBenchmarkTests(TestCase):
+    def test_hot_queries_use_their_indexes_and_leave_no_rows(self):
+        out = StringIO()
+        call_command('benchmark_indexes', orders=400, repeat=1, check=True, stdout=out)
+
+        self.assertIn('Benchmarked 7 queries', out.getvalue())
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(User.objects.exists())
+        # The dropped indexes came back with the rollback
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, Order._meta.db_table)
+        self.assertIn('order_unassigned_status_idx', indexes)
+
+
+class CheckoutConcurrencyTests(TransactionTestCase):
+    CUSTOMERS = 200
+    STOCK = 7
+    ATTEMPTS = 5
+
+    def test_concurrent_checkouts_never_oversell(self):
+        restaurant = create_restaurant()
+        food = create_food(restaurant, stock_quantity=self.STOCK)
+        customers = [create_customer(f'rush{i}@example.com') for i in range(self.CUSTOMERS)]
+        for customer in customers:
+            fill_cart(customer, (food, 1))
+
+        barrier = threading.Barrier(self.CUSTOMERS)
+        placed = []
+        lock = threading.Lock()
+
+        def checkout(customer):
+            barrier.wait()
+            try:
+                for attempt in range(self.ATTEMPTS):
+                    try:
+                        order = CheckoutService(customer).place_order(current_location=CURRENT_LOCATION)
+                    except CheckoutError:
+                        return  # Sold out: losing the race must simply fail the checkout
+                    except OperationalError:
+                        # SQLite rejects lock contention instead of queueing; back off like a client retry
+                        time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+                        continue
+                    with lock:
+                        placed.append(order.id)
+                    return
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=(customer,)) for customer in customers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        food.refresh_from_db()
+        self.assertGreater(len(placed), 0)
+        self.assertLessEqual(len(placed), self.STOCK)
+        self.assertEqual(Order.objects.count(), len(placed))
+        self.assertEqual(food.stock_quantity, self.STOCK - len(placed))
+        self.assertEqual(
+            CartItem.objects.filter(cart__user__customer_orders__isnull=True).count(),
+            self.CUSTOMERS - len(placed)
+        )
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+        self.food = create_food(self.restaurant, stock_quantity=10)
+        fill_cart(self.customer, (self.food, 2))
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def checkout(self, key, **data):
+        data.setdefault('current_location', CURRENT_LOCATION)
+        return self.client.post(
+            '/api/v1/customer/checkout/', data, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_with_same_key_replays_first_response(self):
+        first = self.checkout('checkout-1')
+        retry = self.checkout('checkout-1')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.stock_quantity, 8)
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        self.checkout('checkout-1')
+        response = self.checkout('checkout-1', note='extra spicy')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_server_error_releases_key(self):
+        with mock.patch.object(CheckoutService, 'place_order', side_effect=RuntimeError('boom')):
+            self.assertEqual(self.checkout('checkout-1').status_code, 500)
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.checkout('checkout-1').status_code, 200)
+
+    def test_abandoned_claim_is_taken_over_after_its_lease(self):
+        claim = IdempotencyKey.objects.create(
+            user=self.customer, key='checkout-1', endpoint='POST /api/v1/customer/checkout/', request_hash='',
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+        # Still within its lease: the key stays with the (apparently running) first request
+        self.assertEqual(self.checkout('checkout-1').status_code, 422)
+
+        IdempotencyKey.objects.filter(pk=claim.pk).update(
+            created_at=timezone.now() - timedelta(seconds=idempotency.DEFAULT_LEASE + 1)
+        )
+        response = self.checkout('checkout-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(IdempotencyKey.objects.get().status, 'completed')
+        self.assertEqual(self.checkout('checkout-1')['Idempotent-Replayed'], 'true')
+
+
+class IdempotencyConcurrencyTests(TransactionTestCase):
+    def test_duplicate_waits_for_the_in_flight_request_and_replays_it(self):
+        restaurant = create_restaurant()
+        customer = create_customer('customer@example.com')
+        fill_cart(customer, (create_food(restaurant, stock_quantity=10), 2))
+
+        started, waiting, release = threading.Event(), threading.Event(), threading.Event()
+        place_order = CheckoutService.place_order
+
+        def slow_place_order(service, *args, **kwargs):
+            started.set()
+            release.wait(5)
+            return place_order(service, *args, **kwargs)
+
+        replay = idempotency.replay
+
+        def waiting_replay(*args):
+            waiting.set()
+            return replay(*args)
+
+        responses = {}
+
+        def checkout(name):
+            client = APIClient()
+            client.force_authenticate(customer)
+            try:
+                responses[name] = client.post(
+                    '/api/v1/customer/checkout/', {'current_location': CURRENT_LOCATION}, format='json',
+                    HTTP_IDEMPOTENCY_KEY='checkout-1'
+                )
+            finally:
+                connection.close()
+
+        with mock.patch.object(CheckoutService, 'place_order', slow_place_order), \
+                mock.patch.object(idempotency, 'replay', waiting_replay):
+            first = threading.Thread(target=checkout, args=('first',))
+            first.start()
+            self.assertTrue(started.wait(5))
+            duplicate = threading.Thread(target=checkout, args=('duplicate',))
+            duplicate.start()
+            # The duplicate found the key in progress; only now let the first request finish
+            self.assertTrue(waiting.wait(5))
+            release.set()
+            first.join()
+            duplicate.join()
+
+        self.assertEqual(responses['first'].status_code, 200)
+        self.assertEqual(responses['duplicate'].status_code, 200)
+        self.assertEqual(responses['duplicate']['Idempotent-Replayed'], 'true')
+        self.assertEqual(responses['duplicate'].data, responses['first'].data)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.food = create_food(self.restaurant, stock_quantity=3)
+        self.first = create_customer('first@example.com')
+        self.second = create_customer('second@example.com')
+
+    def add_to_cart(self, user, quantity):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(
+            '/api/v1/customer/cart/', {'food_id': self.food.id, 'quantity': quantity}, format='json'
+        )
+
+    def test_cart_hold_is_not_available_to_other_carts(self):
+        self.assertEqual(self.add_to_cart(self.first, 2).status_code, 200)
+
+        response = self.add_to_cart(self.second, 2)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Only 1 items available in stock')
+        self.assertEqual(available_to_sell(self.food), 1)
+        self.assertFalse(CartItem.objects.filter(cart__user=self.second).exists())
+
+    def test_checkout_converts_own_hold_and_respects_others(self):
+        self.add_to_cart(self.first, 2)
+        self.add_to_cart(self.second, 1)
+
+        CheckoutService(self.first).place_order(current_location=CURRENT_LOCATION)
+
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.stock_quantity, 1)
+        self.assertEqual(StockReservation.objects.get().cart_item.cart.user, self.second)
+        self.assertEqual(available_to_sell(self.food), 0)
+
+    def test_expired_holds_are_released_in_bulk(self):
+        self.add_to_cart(self.first, 3)
+        StockReservation.objects.update(expires_at=timezone.now())
+
+        self.assertEqual(release_expired(), 1)
+        self.assertEqual(available_to_sell(self.food), 3)
+        self.assertEqual(self.add_to_cart(self.second, 3).status_code, 200)
+
+
+class BulkCartTests(TestCase):
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def bulk_add(self, *lines):
+        return self.client.post('/api/v1/customer/cart/bulk/', {'items': list(lines)}, format='json')
+
+    def test_adds_all_lines_and_returns_cart(self):
+        biryani = create_food(self.restaurant, stock_quantity=5)
+        borhani = create_food(self.restaurant, name='Borhani', price='60.00', stock_quantity=5)
+        fill_cart(self.customer, (biryani, 1))
+
+        response = self.bulk_add(
+            {'food_id': biryani.id, 'quantity': 2},
+            {'food_id': borhani.id, 'quantity': 3, 'addons': ['Extra Mint']},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        quantities = {item['food']['id']: item['quantity'] for item in response.data['items']}
+        self.assertEqual(quantities, {biryani.id: 3, borhani.id: 3})
+        self.assertEqual(StockReservation.objects.count(), 2)
+
+    def test_rejects_whole_batch_when_any_line_fails(self):
+        biryani = create_food(self.restaurant, stock_quantity=5)
+        borhani = create_food(self.restaurant, name='Borhani', price='60.00', stock_quantity=1)
+
+        response = self.bulk_add(
+            {'food_id': biryani.id, 'quantity': 2},
+            {'food_id': borhani.id, 'quantity': 2},
+            {'food_id': 999, 'quantity': 1},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [line['food_id'] for line in response.data['items']], [borhani.id, 999]
+        )
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_query_count_does_not_grow_with_lines(self):
+        foods = [create_food(self.restaurant, name=f'Item {i}') for i in range(12)]
+        fill_cart(self.customer, (foods[0], 1), (foods[1], 1))
+        service = CartService(self.customer)
+
+        def lines(*batch):
+            return [{'food_id': food.id, 'quantity': 1, 'variants': [], 'addons': []} for food in batch]
+
+        # Each batch updates one existing line and inserts the rest
+        with self.assertNumQueries(9) as small:
+            service.add_items(lines(foods[0], foods[2]))
+        with self.assertNumQueries(len(small.captured_queries)):
+            service.add_items(lines(foods[1], *foods[3:]))
+
+
+class CartReadTests(TestCase):
+    # cart, items + foods + categories, addons
+    QUERY_BUDGET = 3
+
+    def setUp(self):
+        self.restaurant = create_restaurant()
+        self.customer = create_customer('customer@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def fill_cart_with(self, count):
+        addons = [
+            Addon.objects.create(name=f'Addon {i}', price=Decimal('10.00'), restaurant=self.restaurant)
+            for i in range(3)
+        ]
+        lines = []
+        for i in range(count):
+            food = create_food(self.restaurant, name=f'Item {i}', price='100.00')
+            food.category = Category.objects.create(name=f'Category {i}')
+            food.save()
+            food.available_addons.set(addons)
+            lines.append((food, 2))
+        fill_cart(self.customer, *lines)
+
+    def test_cart_query_budget_is_fixed(self):
+        self.fill_cart_with(10)
+
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get('/api/v1/customer/cart/')
+
+        self.assertEqual(len(response.data['items']), 10)
+        self.assertEqual(len(response.data['items'][0]['food']['available_addons']), 3)
+
+    def test_totals_are_computed_with_the_items(self):
+        self.fill_cart_with(3)
+
+        response = self.client.get('/api/v1/customer/cart/')
+
+        self.assertEqual(response.data['subtotal'], Decimal('600.00'))
+        self.assertEqual(response.data['delivery_fee'], Decimal('5.00'))
+        self.assertEqual(response.data['total'], Decimal('605.00'))
@@ -1,3 +1,5 @@
+from abc import ABC, abstractmethod
+
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
@@ -5,14 +7,18 @@ from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 from .models import *
 from .serializers import *
+from .idempotency import idempotent
+from .pagination import CreatedAtCursorPagination, LoginTimeCursorPagination
 
 print("🔧 Views.py loaded successfully")  # Debug print
 
@@ -178,6 +184,25 @@ class ProfileView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 # Customer
+DEFAULT_NEARBY_RADIUS_KM = 10
+DEFAULT_MAX_NEARBY_RADIUS_KM = 50
+
+
+def search_radius(request, default=None):
+    """?radius_km= as a number of km, or `default` when it isn't given; ValueError when it's invalid"""
+    value = request.query_params.get('radius_km')
+    if value in (None, ''):
+        return default
+    limit = getattr(settings, 'MAX_NEARBY_RADIUS_KM', DEFAULT_MAX_NEARBY_RADIUS_KM)
+    try:
+        radius = float(value)
+    except ValueError:
+        raise ValueError('radius_km must be a number')
+    if not 0 < radius <= limit:
+        raise ValueError(f'radius_km must be more than 0 and at most {limit}')
+    return radius
+
+
 class HomeView(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
@@ -185,12 +210,22 @@ class HomeView(viewsets.ViewSet):
         # Mock data for Figma home
         banners = [{'id': 1, 'image': 'banner.jpg'}]
         popular_foods = Food.objects.order_by('-id')[:5]
-        nearby_restaurants = Restaurant.objects.filter(is_approved=True)  # Show all approved restaurants
+        nearby_restaurants = Restaurant.objects.filter(is_approved=True)
+        location = customer_location(request)
+        if location:
+            # Nearest first within the radius; without a location, every approved restaurant
+            try:
+                radius = search_radius(request, getattr(settings, 'NEARBY_RADIUS_KM', DEFAULT_NEARBY_RADIUS_KM))
+            except ValueError as e:
+                return Response({'error': str(e)}, status=400)
+            nearby_restaurants = Restaurant.nearby(*location, radius, queryset=nearby_restaurants)
         categories = Category.objects.all()  # Return all categories
         return Response({
             'banners': banners,
             'popular_foods': FoodSerializer(popular_foods, many=True, context={'request': request}).data,
-            'nearby_restaurants': RestaurantSerializer(nearby_restaurants, many=True, context={'request': request}).data,
+            'nearby_restaurants': RestaurantSerializer(nearby_restaurants, many=True, context={
+                'request': request, 'customer_location': location
+            }).data,
             'categories': CategorySerializer(categories, many=True, context={'request': request}).data
         })
 
@@ -199,24 +234,110 @@ class RestaurantViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = RestaurantSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'customer_location': customer_location(self.request)}
+
+    def list(self, request, *args, **kwargs):
+        """?radius_km= (around ?lat=&lng=, or the default address) lists the restaurants in range, nearest first"""
+        try:
+            radius = search_radius(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        if radius is None:
+            return super().list(request, *args, **kwargs)
+
+        location = customer_location(request)
+        if location is None:
+            return Response({'error': 'lat and lng (or a default address) are required with radius_km'}, status=400)
+        restaurants = Restaurant.nearby(*location, radius, queryset=self.filter_queryset(self.get_queryset()))
+        return Response(self.get_serializer(restaurants, many=True).data)
+
+    # Trusts the token's claims instead of loading the user, so a 304 needs no database query
+    @action(detail=True, methods=['get'], authentication_classes=[JWTStatelessUserAuthentication])
+    def menu(self, request, pk=None):
+        """
+        The restaurant's whole menu, grouped by category with addons and
+        stock state, from the cached snapshot (core/menu_service.py). Its ETag
+        is the menu version: If-None-Match with the current one gets a 304.
+        Without a shared cache there is no trustworthy version, so no ETag.
+        """
+        from django.utils.http import parse_etags
+        from .checks import shared_cache
+        from .menu_service import current_version, etag, snapshot, with_absolute_urls
+
+        try:
+            restaurant_id = int(pk)
+        except ValueError:
+            return Response({'error': 'Restaurant not found'}, status=404)
+
+        version, headers = None, {'Cache-Control': 'private, no-cache'}
+        if shared_cache():
+            version = current_version(restaurant_id)
+            headers['ETag'] = etag(restaurant_id, version)
+            if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+            if headers['ETag'] in if_none_match or '*' in if_none_match:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        found = snapshot(restaurant_id, version)
+        if found is None:
+            return Response({'error': 'Restaurant not found'}, status=404)
+        return Response(with_absolute_urls(found[1], request), headers=headers)
+
 class FoodViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Food.objects.all()
     serializer_class = FoodSerializer
     permission_classes = [IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        """
+        Foods filtered by ?category= (ids, comma separated), ?is_veg=,
+        ?min_price=/?max_price=, ?is_available=, ?cuisine= and ?restaurant=,
+        sorted by ?sort= (price, -price, popularity, distance within
+        ?radius_km=), one ?page= of ?page_size= at a time, with facet counts
+        for the other filter values.
+        """
+        from .catalog_service import MAX_PAGE, browse
+
+        try:
+            page = min(max(int(request.query_params.get('page', 1)), 1), MAX_PAGE)
+            page_size = int(request.query_params.get('page_size', getattr(settings, 'API_PAGE_SIZE', 20)))
+        except ValueError:
+            return Response({'error': 'page and page_size must be numbers'}, status=400)
+        page_size = min(max(page_size, 1), getattr(settings, 'API_MAX_PAGE_SIZE', 100))
+
+        # Only a distance sort needs to know where the customer is
+        location = customer_location(request) if request.query_params.get('sort') == 'distance' else None
+        try:
+            radius = search_radius(request, getattr(settings, 'NEARBY_RADIUS_KM', DEFAULT_NEARBY_RADIUS_KM))
+            found = browse(request.query_params, location, page, page_size, radius)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        results = self.get_serializer(found['results'], many=True).data
+        for food, data in zip(found['results'], results):
+            if hasattr(food, 'distance_km'):
+                data['distance_km'] = round(food.distance_km, 2)
+        return Response({
+            'results': results,
+            'count': found['count'],
+            'page': page,
+            'page_size': page_size,
+            'has_next': page * page_size < found['count'],
+            'facets': found['facets']
+        })
+
 class CartViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     def list(self, request):
-        from decimal import Decimal
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        serializer = CartSerializer(cart, context={'request': request})
-        data = serializer.data
-        data['delivery_fee'] = 5.00
-        data['total'] = float(data['subtotal']) + data['delivery_fee']
-        return Response(data)
+        from .cart_service import get_cart
+
+        serializer = CartSerializer(get_cart(request.user), context={'request': request})
+        return Response(serializer.data)
 
     def create(self, request):
+        from .reservation_service import reserve
+
         cart, _ = Cart.objects.get_or_create(user=request.user)
         food = get_object_or_404(Food, id=request.data['food_id'])
         
@@ -225,36 +346,52 @@ class CartViewSet(viewsets.ViewSet):
             return Response({'error': 'This item is currently unavailable'}, status=400)
         
         requested_quantity = request.data.get('quantity', 1)
-        item, created = CartItem.objects.get_or_create(cart=cart, food=food)
-        
-        if created:
-            # New item - check stock availability
-            if food.stock_quantity < requested_quantity:
-                return Response({
-                    'error': f'Only {food.stock_quantity} items available in stock'
-                }, status=400)
-            item.quantity = requested_quantity
-        else:
-            # Existing item - check total quantity against stock
-            total_quantity = item.quantity + requested_quantity
-            if food.stock_quantity < total_quantity:
-                available = max(0, food.stock_quantity - item.quantity)
-                if available <= 0:
-                    return Response({'error': 'No more items available in stock'}, status=400)
+        item = cart.items.filter(food=food).first()
+        in_cart = item.quantity if item else 0
+        
+        # Hold the new total against stock not already held by other carts
+        saved, available = reserve(
+            cart, food, in_cart + requested_quantity, item,
+            variants=request.data.get('variants', []),
+            addons=request.data.get('addons', [])
+        )
+        if saved is None:
+            if item is None:
                 return Response({
-                    'error': f'Only {available} more items can be added to cart'
+                    'error': f'Only {available} items available in stock'
                 }, status=400)
-            item.quantity = total_quantity
-            
-        item.variants = request.data.get('variants', [])
-        item.addons = request.data.get('addons', [])
-        item.save()
-        return Response(CartSerializer(cart).data)
+            remaining = max(0, available - in_cart)
+            if remaining <= 0:
+                return Response({'error': 'No more items available in stock'}, status=400)
+            return Response({
+                'error': f'Only {remaining} more items can be added to cart'
+            }, status=400)
+        
+        from .cart_service import get_cart
+        return Response(CartSerializer(get_cart(request.user), context={'request': request}).data)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Add several items (e.g. a reorder or bundle) to the cart in one request"""
+        from .cart_service import CartService, CartError, get_cart
+
+        serializer = CartBulkSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+
+        try:
+            CartService(request.user).add_items(serializer.validated_data['items'])
+        except CartError as e:
+            return Response({'error': e.message, 'items': e.items}, status=e.status)
+
+        return Response(CartSerializer(get_cart(request.user), context={'request': request}).data)
 
     @action(detail=True, methods=['patch'])
     def update_item(self, request, pk=None):
         """Update cart item quantity"""
-        cart_item = get_object_or_404(CartItem, id=pk, cart__user=request.user)
+        from .reservation_service import reserve
+
+        cart_item = get_object_or_404(CartItem.objects.select_related('cart', 'food'), id=pk, cart__user=request.user)
         quantity = request.data.get('quantity', cart_item.quantity)
         
         if quantity < 1:
@@ -266,13 +403,12 @@ class CartViewSet(viewsets.ViewSet):
         if not food.is_available:
             return Response({'error': 'This item is currently unavailable'}, status=400)
             
-        if food.stock_quantity < quantity:
+        saved, available = reserve(cart_item.cart, food, quantity, cart_item)
+        if saved is None:
             return Response({
-                'error': f'Only {food.stock_quantity} items available in stock'
+                'error': f'Only {available} items available in stock'
             }, status=400)
             
-        cart_item.quantity = quantity
-        cart_item.save()
         return Response(CartItemSerializer(cart_item).data)
     
     @action(detail=True, methods=['delete'])
@@ -291,140 +427,23 @@ class CartViewSet(viewsets.ViewSet):
 class CheckoutView(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def create(self, request):
+        from .checkout_service import CheckoutService, CheckoutError
+
         try:
-            print(f"=== Checkout Debug ===")
-            print(f"User: {request.user}")
-            print(f"Request data: {request.data}")
-            
-            # Check if cart exists
-            try:
-                cart = Cart.objects.get(user=request.user)
-                print(f"Cart found: {cart.id}")
-            except Cart.DoesNotExist:
-                print("Cart does not exist, creating one")
-                cart = Cart.objects.create(user=request.user)
-            
-            # Check if cart has items
-            cart_items = cart.items.all()
-            print(f"Cart items count: {cart_items.count()}")
-            
-            if not cart_items.exists():
-                print("Cart is empty")
-                return Response({'error': 'Empty cart'}, status=400)
-            
-            # Check address - either saved address or current location
-            address_id = request.data.get('address_id')
-            current_location = request.data.get('current_location')
-            address = None
-            
-            if address_id:
-                # Using saved address
-                print(f"Address ID: {address_id}")
-                try:
-                    address = Address.objects.get(id=address_id, user=request.user)
-                    print(f"Address found: {address.title} - {address.address}")
-                except Address.DoesNotExist:
-                    print(f"Address not found or doesn't belong to user")
-                    return Response({'error': 'Invalid address'}, status=400)
-            elif current_location:
-                # Using current location - will be stored in delivery_location field
-                print(f"Using current location: {current_location}")
-                address = None  # No saved address
-            else:
-                print("No address or current location provided")
-                return Response({'error': 'Address or current location required'}, status=400)
-            
-            # Process cart items
-            items = []
-            subtotal = 0
-            restaurant = None
-            
-            for item in cart_items:
-                print(f"Processing item: {item.food.name} x {item.quantity}")
-                items.append({
-                    'food_id': item.food.id, 
-                    'quantity': item.quantity, 
-                    'variants': item.variants or [], 
-                    'addons': item.addons or []
-                })
-                subtotal += item.food.price * item.quantity
-                if not restaurant:
-                    restaurant = item.food.restaurant
-                    print(f"Restaurant: {restaurant.name}")
-            
-            from decimal import Decimal
-            delivery_fee = Decimal('5.00')
-            total = subtotal + delivery_fee
-            payment_method = request.data.get('payment_method', 'cod')
-            
-            print(f"Order details: subtotal={subtotal}, delivery_fee={delivery_fee}, total={total}, payment_method={payment_method}")
-            
-            # Final stock validation before order creation (prevent race conditions)
-            print("=== Final Stock Validation ===")
-            for item in cart_items:
-                food = item.food
-                print(f"Validating stock for {food.name}: requested={item.quantity}, available={food.stock_quantity}")
-                
-                if not food.is_available:
-                    print(f"Item {food.name} is not available")
-                    return Response({'error': f'{food.name} is currently unavailable'}, status=400)
-                
-                if food.stock_quantity < item.quantity:
-                    print(f"Insufficient stock for {food.name}")
-                    return Response({
-                        'error': f'Insufficient stock for {food.name}. Only {food.stock_quantity} available.'
-                    }, status=400)
-            
-            # Create order
-            order_data = {
-                'user': request.user,
-                'restaurant': restaurant,
-                'address': address,
-                'items': items,
-                'subtotal': subtotal,
-                'delivery_fee': delivery_fee,
-                'total': total,
-                'payment_method': payment_method,
-                'note': request.data.get('note', '')
-            }
-            
-            # Add delivery location if using current location
-            if current_location and not address:
-                order_data['delivery_location'] = current_location
-                print(f"Storing delivery location: {current_location}")
-            
-            order = Order.objects.create(**order_data)
-            
-            print(f"Order created: {order.id}")
-            
-            # Reduce stock quantities for ordered items
-            print("=== Reducing Stock ===")
-            for item in cart_items:
-                food = item.food
-                old_stock = food.stock_quantity
-                success = food.reduce_stock(item.quantity)
-                new_stock = food.stock_quantity
-                print(f"Stock reduction for {food.name}: {old_stock} -> {new_stock} (reduced by {item.quantity})")
-                
-                if not success:
-                    print(f"WARNING: Failed to reduce stock for {food.name} - insufficient stock!")
-                    # Note: Order is already created, so we log this as a warning
-                    # In production, you might want to handle this differently
-            
-            # Clear cart
-            cart.items.all().delete()
-            print("Cart cleared")
-            
-            # Create notification
-            Notification.objects.create(user=request.user, message='Order placed!')
-            print("Notification created")
-            
+            order = CheckoutService(request.user).place_order(
+                address_id=request.data.get('address_id'),
+                current_location=request.data.get('current_location'),
+                payment_method=request.data.get('payment_method', 'cod'),
+                note=request.data.get('note', '')
+            )
             return Response({'order_id': order.id, 'status': order.status})
-            
+
+        except CheckoutError as e:
+            return Response({'error': e.message}, status=e.status)
         except Exception as e:
             print(f"Checkout error: {str(e)}")
-            print(f"Error type: {type(e)}")
             import traceback
             traceback.print_exc()
             return Response({'error': f'Checkout failed: {str(e)}'}, status=500)
@@ -439,9 +458,43 @@ class AddressViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderFieldsMixin:
+    """
+    Sparse order payloads: ?fields=id,status,... or ?view=summary on list and
+    detail reads serializes only those fields and loads only the columns and
+    relations they need.
+    """
+    # Keys the view adds to each serialized order itself; ?fields= may ask for them too
+    extra_fields = ()
+
+    def requested_fields(self):
+        if self.request.method != 'GET' or self.action not in ('list', 'retrieve'):
+            return None
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = OrderSerializer.requested_fields(self.request.query_params, self.extra_fields)
+        return self._requested_fields
+
+    def serialized_fields(self):
+        fields = self.requested_fields()
+        return None if fields is None else [name for name in fields if name not in self.extra_fields]
+
+    def wants_field(self, name):
+        fields = self.requested_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.serialized_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.serialized_fields()
+        return queryset if fields is None else OrderSerializer.trim_queryset(queryset, fields)
+
+class OrderViewSet(OrderFieldsMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         return Order.objects.filter(user=self.request.user)
@@ -464,19 +517,28 @@ class OrderViewSet(viewsets.ModelViewSet):
         return Response({'message': 'Rated'})
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def reorder(self, request, pk=None):
+        from .checkout_service import build_order_lines
+
         old_order = self.get_object()
-        new_order = Order.objects.create(
-            user=request.user,
-            restaurant=old_order.restaurant,
-            address=old_order.address,
-            items=old_order.items,
-            subtotal=old_order.subtotal,
-            delivery_fee=old_order.delivery_fee,
-            total=old_order.total,
-            payment_method=old_order.payment_method,
-            note=old_order.note
+        foods = Food.objects.prefetch_related('available_addons').in_bulk(
+            [item['food_id'] for item in old_order.items]
         )
+        # An order is never left without its lines
+        with transaction.atomic():
+            new_order = Order.objects.create(
+                user=request.user,
+                restaurant=old_order.restaurant,
+                address=old_order.address,
+                items=old_order.items,
+                subtotal=old_order.subtotal,
+                delivery_fee=old_order.delivery_fee,
+                total=old_order.total,
+                payment_method=old_order.payment_method,
+                note=old_order.note
+            )
+            OrderLine.objects.bulk_create(build_order_lines(new_order, foods))
         return Response({'order_id': new_order.id})
 
     @action(detail=True, methods=['get'])
@@ -644,6 +706,7 @@ class FavoriteViewSet(viewsets.ModelViewSet):
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
@@ -869,13 +932,14 @@ class MenuItemViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save()
 
-class RestaurantOrderViewSet(viewsets.ReadOnlyModelViewSet):
+class RestaurantOrderViewSet(OrderFieldsMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
-        # Add ordering and limit for better performance
-        queryset = Order.objects.filter(restaurant__owner=self.request.user).order_by('-created_at')
+        # Newest first, one page at a time (see CreatedAtCursorPagination)
+        queryset = Order.objects.filter(restaurant__owner=self.request.user)
         
         # Add status filtering for dashboard efficiency
         status_filter = self.request.query_params.get('status')
@@ -1005,53 +1069,36 @@ class RestaurantAnalyticsView(APIView):
             # Get restaurant owned by current user
             restaurant = Restaurant.objects.get(owner=request.user)
             
-            # Check cache first for faster response
-            from django.core.cache import cache
-            cache_key = f"restaurant_analytics_{restaurant.id}_{request.GET.get('period', 'daily')}"
-            cached_data = cache.get(cache_key)
-            
-            if cached_data:
-                return Response(cached_data)
-            
-            # Get orders for this restaurant (use select_related for better performance)
-            orders = Order.objects.filter(restaurant=restaurant).select_related('restaurant')
-            
-            # Calculate analytics
-            from datetime import date, timedelta, datetime
-            from decimal import Decimal
-            from django.db.models import Sum, Count
-            from django.db.models.functions import TruncDate, TruncMonth, TruncYear
-            
-            today = date.today()
-            
+            # Counters come from the shared, cached metrics service
+            from .metrics_service import RestaurantMetricsService
+            totals = RestaurantMetricsService(restaurant).totals()
+
             # Daily revenue (today)
-            daily_orders = orders.filter(created_at__date=today, status='delivered')
-            daily_revenue = sum(order.total for order in daily_orders)
+            daily_revenue = totals['today_gross']
             
             # Total orders
-            total_orders = orders.count()
+            total_orders = totals['total_orders']
             
             # Order Requests (new orders waiting for restaurant acceptance)
-            order_requests = orders.filter(status='pending').count()
+            order_requests = totals['pending_orders']
             
             # Running orders (orders being actively processed)
-            running_orders = orders.filter(
-                status__in=['preparing', 'ready_for_pickup', 'out_for_delivery']
-            ).count()
+            running_orders = (
+                totals['preparing_orders'] + totals['ready_for_pickup_orders'] + totals['out_for_delivery_orders']
+            )
             
             # Cancelled orders
-            cancelled_orders = orders.filter(status='cancelled').count()
+            cancelled_orders = totals['cancelled_orders']
             
             # Delivered orders
-            delivered_orders = orders.filter(status='delivered').count()
+            delivered_orders = totals['delivered_orders']
             
-            # Reviews
-            reviews = Review.objects.filter(order__restaurant=restaurant)
-            total_reviews = reviews.count()
-            avg_rating = reviews.aggregate(avg_rating=models.Avg('rating'))['avg_rating'] or 0
+            # Reviews (count and average are stored on the restaurant)
+            total_reviews = restaurant.rating_count
+            avg_rating = restaurant.get_average_rating()
             
             # Recent reviews
-            recent_reviews = reviews.order_by('-created_at')[:3]
+            recent_reviews = Review.objects.filter(order__restaurant=restaurant).order_by('-created_at')[:3]
             
             # Chart data based on period
             period = request.GET.get('period', 'daily')
@@ -1065,7 +1112,8 @@ class RestaurantAnalyticsView(APIView):
                 'cancelled_orders': cancelled_orders,
                 'delivered_orders': delivered_orders,
                 'total_reviews': total_reviews,
-                'average_rating': round(float(avg_rating), 1),
+                'average_rating': avg_rating,
+                'rating_histogram': restaurant.get_rating_histogram(),
                 'recent_reviews': ReviewSerializer(recent_reviews, many=True).data,
                 'restaurant_name': restaurant.name,
                 'restaurant_address': restaurant.address,
@@ -1073,9 +1121,6 @@ class RestaurantAnalyticsView(APIView):
                 'chart_data': chart_data
             }
             
-            # Cache for 2 minutes to balance freshness and performance
-            cache.set(cache_key, response_data, 120)
-            
             return Response(response_data)
             
         except Restaurant.DoesNotExist:
@@ -1083,209 +1128,104 @@ class RestaurantAnalyticsView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=500)
     
+    # period -> (granularity, buckets, label for this bucket, label for the previous one,
+    #            label format for older buckets, description, average key)
+    CHART_PERIODS = {
+        'daily': ('day', 7, 'Today', 'Yesterday', '%a', 'Last 7 Days', 'avg_daily'),
+        'weekly': ('week', 8, 'This Week', 'Last Week', '%m/%d', 'Last 8 Weeks', 'avg_weekly'),
+        'monthly': ('month', 12, 'This Month', 'Last Month', '%b %y', 'Last 12 Months', 'avg_monthly'),
+        'yearly': ('year', 5, 'This Year', 'Last Year', '%Y', 'Last 5 Years', 'avg_yearly'),
+    }
+
     def get_chart_data(self, restaurant, period):
         """Generate business-standard chart data based on period"""
-        from datetime import datetime, timedelta, date
-        from django.db.models import Sum
-        from calendar import monthrange
-        
-        orders = Order.objects.filter(restaurant=restaurant, status='delivered')
-        now = datetime.now()
-        
-        if period == 'daily':
-            # Last 7 days (business standard for daily view)
-            labels = []
-            values = []
-            order_counts = []
-            total_revenue = 0
-            
-            for i in range(6, -1, -1):  # 6 days ago to today
-                target_date = now.date() - timedelta(days=i)
-                day_start = datetime.combine(target_date, datetime.min.time())
-                day_end = day_start + timedelta(days=1)
-                
-                day_orders = orders.filter(
-                    created_at__gte=day_start,
-                    created_at__lt=day_end
-                )
-                day_revenue = sum(order.total for order in day_orders)
-                day_count = day_orders.count()
-                
-                # Format label (Mon, Tue, Wed, etc.)
-                if i == 0:
-                    label = "Today"
-                elif i == 1:
-                    label = "Yesterday"
-                else:
-                    label = target_date.strftime('%a')  # Mon, Tue, Wed
-                
-                labels.append(label)
-                values.append(float(day_revenue))
-                order_counts.append(day_count)
-                total_revenue += day_revenue
-            
-            return {
-                'labels': labels,
-                'values': values,
-                'order_counts': order_counts,
-                'period': 'Daily',
-                'period_description': 'Last 7 Days',
-                'total_revenue': float(total_revenue),
-                'max_value': max(values) if values else 0,
-                'avg_daily': float(total_revenue / 7),
-                'total_orders': sum(order_counts),
-                'avg_order_value': float(total_revenue / sum(order_counts)) if sum(order_counts) > 0 else 0,
-                'description': f"Revenue trend over the last 7 days"
-            }
-            
-        elif period == 'weekly':
-            # Last 8 weeks (business standard for weekly view)
-            labels = []
-            values = []
-            order_counts = []
-            total_revenue = 0
-            
-            for i in range(7, -1, -1):  # 7 weeks ago to this week
-                # Calculate week start (Monday) and end (Sunday)
-                days_since_monday = now.weekday()
-                current_week_start = now - timedelta(days=days_since_monday, weeks=i)
-                week_start = current_week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-                week_end = week_start + timedelta(days=7)
-                
-                week_orders = orders.filter(
-                    created_at__gte=week_start,
-                    created_at__lt=week_end
-                )
-                week_revenue = sum(order.total for order in week_orders)
-                week_count = week_orders.count()
-                
-                # Format label
-                if i == 0:
-                    label = "This Week"
-                elif i == 1:
-                    label = "Last Week"
-                else:
-                    label = f"{week_start.strftime('%m/%d')}"
-                
-                labels.append(label)
-                values.append(float(week_revenue))
-                order_counts.append(week_count)
-                total_revenue += week_revenue
-            
-            return {
-                'labels': labels,
-                'values': values,
-                'order_counts': order_counts,
-                'period': 'Weekly',
-                'period_description': 'Last 8 Weeks',
-                'total_revenue': float(total_revenue),
-                'max_value': max(values) if values else 0,
-                'avg_weekly': float(total_revenue / 8),
-                'total_orders': sum(order_counts),
-                'avg_order_value': float(total_revenue / sum(order_counts)) if sum(order_counts) > 0 else 0,
-                'description': f"Revenue trend over the last 8 weeks"
-            }
-            
-        elif period == 'monthly':
-            # Last 12 months (business standard for monthly view)
-            labels = []
-            values = []
-            order_counts = []
-            total_revenue = 0
-            
-            for i in range(11, -1, -1):  # 11 months ago to this month
-                # Calculate month start and end
-                target_date = now.replace(day=1) - timedelta(days=32*i)
-                month_start = target_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                
-                if month_start.month == 12:
-                    month_end = month_start.replace(year=month_start.year + 1, month=1)
-                else:
-                    month_end = month_start.replace(month=month_start.month + 1)
-                
-                month_orders = orders.filter(
-                    created_at__gte=month_start,
-                    created_at__lt=month_end
-                )
-                month_revenue = sum(order.total for order in month_orders)
-                month_count = month_orders.count()
-                
-                # Format label
-                if i == 0:
-                    label = "This Month"
-                elif i == 1:
-                    label = "Last Month"
-                else:
-                    label = month_start.strftime('%b %y')  # Jan 25, Feb 25, etc.
-                
-                labels.append(label)
-                values.append(float(month_revenue))
-                order_counts.append(month_count)
-                total_revenue += month_revenue
-            
-            return {
-                'labels': labels,
-                'values': values,
-                'order_counts': order_counts,
-                'period': 'Monthly',
-                'period_description': 'Last 12 Months',
-                'total_revenue': float(total_revenue),
-                'max_value': max(values) if values else 0,
-                'avg_monthly': float(total_revenue / 12),
-                'total_orders': sum(order_counts),
-                'avg_order_value': float(total_revenue / sum(order_counts)) if sum(order_counts) > 0 else 0,
-                'description': f"Revenue trend over the last 12 months"
-            }
-            
-        elif period == 'yearly':
-            # Last 5 years (business standard for yearly view)
-            labels = []
-            values = []
-            order_counts = []
-            total_revenue = 0
-            
-            current_year = now.year
-            for i in range(4, -1, -1):  # 4 years ago to this year
-                target_year = current_year - i
-                year_start = datetime(target_year, 1, 1)
-                year_end = datetime(target_year + 1, 1, 1)
-                
-                year_orders = orders.filter(
-                    created_at__gte=year_start,
-                    created_at__lt=year_end
-                )
-                year_revenue = sum(order.total for order in year_orders)
-                year_count = year_orders.count()
-                
-                # Format label
-                if i == 0:
-                    label = "This Year"
-                elif i == 1:
-                    label = "Last Year"
-                else:
-                    label = str(target_year)
-                
-                labels.append(label)
-                values.append(float(year_revenue))
-                order_counts.append(year_count)
-                total_revenue += year_revenue
-            
-            return {
-                'labels': labels,
-                'values': values,
-                'order_counts': order_counts,
-                'period': 'Yearly',
-                'period_description': 'Last 5 Years',
-                'total_revenue': float(total_revenue),
-                'max_value': max(values) if values else 0,
-                'avg_yearly': float(total_revenue / 5),
-                'total_orders': sum(order_counts),
-                'avg_order_value': float(total_revenue / sum(order_counts)) if sum(order_counts) > 0 else 0,
-                'description': f"Revenue trend over the last 5 years"
-            }
-        
-        # Default to daily if invalid period
-        return self.get_chart_data(restaurant, 'daily')
+        from .metrics_service import RestaurantMetricsService
+
+        if period not in self.CHART_PERIODS:
+            # Default to daily if invalid period
+            period = 'daily'
+        granularity, count, current_label, previous_label, label_format, description, avg_key = \
+            self.CHART_PERIODS[period]
+
+        series = RestaurantMetricsService(restaurant).series(granularity)[-count:]
+
+        labels = []
+        for i, bucket in enumerate(series):
+            ago = len(series) - 1 - i
+            if ago == 0:
+                labels.append(current_label)
+            elif ago == 1:
+                labels.append(previous_label)
+            else:
+                labels.append(timezone.localtime(bucket['start']).strftime(label_format))
+
+        values = [float(bucket['gross']) for bucket in series]
+        order_counts = [bucket['orders'] for bucket in series]
+        total_revenue = sum(bucket['gross'] for bucket in series)
+        total_orders = sum(order_counts)
+
+        return {
+            'labels': labels,
+            'values': values,
+            'order_counts': order_counts,
+            'period': period.capitalize(),
+            'period_description': description,
+            'total_revenue': float(total_revenue),
+            'max_value': max(values) if values else 0,
+            avg_key: float(total_revenue / count),
+            'total_orders': total_orders,
+            'avg_order_value': float(total_revenue / total_orders) if total_orders > 0 else 0,
+            'description': f"Revenue trend over the {description.lower()}"
+        }
+
+
+class RestaurantItemAnalyticsView(ABC, APIView):
+    """Base for item-level reports computed from OrderLine rows; subclasses implement get_report"""
+    permission_classes = [IsAuthenticated]
+    default_days = 7
+    max_days = 365
+
+    def get(self, request):
+        try:
+            restaurant = Restaurant.objects.get(owner=request.user)
+        except Restaurant.DoesNotExist:
+            return Response({'error': 'Restaurant not found'}, status=404)
+
+        try:
+            days = int(request.query_params.get('days', self.default_days))
+        except ValueError:
+            return Response({'error': 'days must be a number'}, status=400)
+        days = min(max(days, 1), self.max_days)
+
+        return Response({'days': days, 'items': self.get_report(request, restaurant, days)})
+
+    @abstractmethod
+    def get_report(self, request, restaurant, days):
+        """The report's items for `restaurant` over the last `days` days"""
+
+
+class RestaurantTopSellersView(RestaurantItemAnalyticsView):
+    def get_report(self, request, restaurant, days):
+        from .analytics_service import top_sellers
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        return top_sellers(restaurant, days=days, limit=limit)
+
+
+class RestaurantCategoryMixView(RestaurantItemAnalyticsView):
+    default_days = 30
+
+    def get_report(self, request, restaurant, days):
+        from .analytics_service import category_mix
+        return category_mix(restaurant, days=days)
+
+
+class RestaurantItemVelocityView(RestaurantItemAnalyticsView):
+    def get_report(self, request, restaurant, days):
+        from .analytics_service import item_velocity
+        return item_velocity(restaurant, days=days)
 
 
 class RestaurantEarningsView(APIView):
@@ -1298,6 +1238,7 @@ class RestaurantEarningsView(APIView):
             return Response({'error': 'Restaurant not found'}, status=404)
 
         # Get or create earnings record
+        from .rollup_service import DEFAULT_COMMISSION_RATE
         earnings, created = RestaurantEarnings.objects.get_or_create(
             restaurant=restaurant,
             defaults={
@@ -1305,7 +1246,7 @@ class RestaurantEarningsView(APIView):
                 'available_balance': 0,
                 'pending_balance': 0,
                 'total_withdrawn': 0,
-                'commission_rate': 15.00
+                'commission_rate': DEFAULT_COMMISSION_RATE
             }
         )
 
@@ -1315,170 +1256,81 @@ class RestaurantEarningsView(APIView):
             for order in delivered_orders:
                 earnings.add_earnings(order.total)
 
-        # Get additional revenue analytics using the same logic as dashboard
-        from datetime import datetime, timedelta
-        from django.db.models import Sum
-        from decimal import Decimal
-        
-        # Get orders for calculations
-        orders = Order.objects.filter(restaurant=restaurant, status='delivered')
-        now = datetime.now()
-        
+        # Revenue analytics from the shared, cached metrics service (same numbers as the dashboard)
+        from datetime import timedelta
+        from .metrics_service import RestaurantMetricsService
+
+        metrics = RestaurantMetricsService(restaurant)
+
+        def revenue(bucket):
+            return {
+                'gross_revenue': float(bucket['gross']),
+                'commission': float(bucket['commission_total']),
+                'net_revenue': float(bucket['net']),
+                'orders_count': bucket['orders']
+            }
+
+        today = timezone.localdate()
+
         # Daily revenue data (last 7 days)
         daily_data = []
-        for i in range(6, -1, -1):  # 6 days ago to today
-            target_date = now.date() - timedelta(days=i)
-            day_start = datetime.combine(target_date, datetime.min.time())
-            day_end = day_start + timedelta(days=1)
-            
-            day_orders = orders.filter(
-                created_at__gte=day_start,
-                created_at__lt=day_end
-            )
-            day_revenue = sum(order.total for order in day_orders)
-            day_commission = (day_revenue * earnings.commission_rate) / 100
-            day_net_revenue = day_revenue - day_commission
-            
-            if i == 0:
+        days = metrics.series('day')[-7:]
+        for i, bucket in enumerate(days):
+            target_date = timezone.localdate(bucket['start'])
+            ago = len(days) - 1 - i
+            if ago == 0:
                 label = "Today"
-            elif i == 1:
+            elif ago == 1:
                 label = "Yesterday"
             else:
                 label = target_date.strftime('%a')  # Mon, Tue, Wed
-            
-            daily_data.append({
-                'day': label,
-                'date': target_date.strftime('%Y-%m-%d'),
-                'gross_revenue': float(day_revenue),
-                'commission': float(day_commission),
-                'net_revenue': float(day_net_revenue),
-                'orders_count': day_orders.count()
-            })
-        
+            daily_data.append({'day': label, 'date': target_date.strftime('%Y-%m-%d'), **revenue(bucket)})
+
         # Yearly data (last 5 years)
         yearly_data = []
-        current_year = now.year
-        for i in range(4, -1, -1):  # 4 years ago to this year
-            target_year = current_year - i
-            year_start = datetime(target_year, 1, 1)
-            year_end = datetime(target_year + 1, 1, 1)
-            
-            year_orders = orders.filter(
-                created_at__gte=year_start,
-                created_at__lt=year_end
-            )
-            year_revenue = sum(order.total for order in year_orders)
-            year_commission = (year_revenue * earnings.commission_rate) / 100
-            year_net_revenue = year_revenue - year_commission
-            
-            if i == 0:
+        years = metrics.series('year')[-5:]
+        for i, bucket in enumerate(years):
+            target_year = timezone.localdate(bucket['start']).year
+            ago = len(years) - 1 - i
+            if ago == 0:
                 label = "This Year"
-            elif i == 1:
+            elif ago == 1:
                 label = "Last Year"
             else:
                 label = str(target_year)
-            
-            yearly_data.append({
-                'year': label,
-                'year_number': target_year,
-                'gross_revenue': float(year_revenue),
-                'commission': float(year_commission),
-                'net_revenue': float(year_net_revenue),
-                'orders_count': year_orders.count()
-            })
-        
+            yearly_data.append({'year': label, 'year_number': target_year, **revenue(bucket)})
+
         # Daily revenue (today)
-        today = datetime.now().date()
-        today_orders = orders.filter(created_at__date=today)
-        daily_revenue = sum(order.total for order in today_orders)
-        daily_commission = (daily_revenue * earnings.commission_rate) / 100
-        daily_net_revenue = daily_revenue - daily_commission
-        
+        totals = metrics.totals()
+        daily_revenue = totals['today_gross']
+        daily_commission = totals['today_commission']
+        daily_net_revenue = totals['today_net']
+
         # Monthly revenue data (last 6 months including current month)
         monthly_data = []
-        current_date = datetime.now()
-        
-        for i in range(6):
-            if i == 0:
-                # Current month: from 1st of this month to end of today
-                month_start = current_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                month_end = current_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            else:
-                # Previous months: full months
-                # Go back i months
-                year = current_date.year
-                month = current_date.month - i
-                
-                if month <= 0:
-                    month += 12
-                    year -= 1
-                
-                month_start = datetime(year, month, 1, 0, 0, 0, 0)
-                
-                # Get last day of the month
-                if month == 12:
-                    month_end = datetime(year + 1, 1, 1, 0, 0, 0, 0) - timedelta(microseconds=1)
-                else:
-                    month_end = datetime(year, month + 1, 1, 0, 0, 0, 0) - timedelta(microseconds=1)
-            
-            # Get orders for this month
-            month_orders = orders.filter(
-                created_at__gte=month_start,
-                created_at__lte=month_end
-            )
-            month_revenue = sum(order.total for order in month_orders)
-            month_commission = (month_revenue * earnings.commission_rate) / 100
-            month_net_revenue = month_revenue - month_commission
-            
-            monthly_data.insert(0, {  # Insert at beginning to get chronological order
+        for bucket in metrics.series('month')[-6:]:
+            month_start = timezone.localdate(bucket['start'])
+            monthly_data.append({
                 'month': month_start.strftime('%b'),
                 'month_year': month_start.strftime('%b %Y'),
-                'gross_revenue': float(month_revenue),
-                'commission': float(month_commission),
-                'net_revenue': float(month_net_revenue),
-                'orders_count': month_orders.count()
+                **revenue(bucket)
             })
-        
-        # Weekly revenue (last 4 weeks including current week)
+
+        # Weekly revenue (last 4 calendar weeks including current week)
         weekly_data = []
-        current_date = datetime.now()
-        
-        for i in range(4):
-            if i == 0:
-                # Current week: from Monday of this week to end of today
-                days_since_monday = current_date.weekday()
-                week_start = current_date - timedelta(days=days_since_monday)
-                week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-                week_end = current_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            else:
-                # Previous weeks: full 7-day periods
-                week_end_date = current_date - timedelta(days=7 * i)
-                week_start_date = week_end_date - timedelta(days=6)  # 7 days total
-                
-                week_start = week_start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                week_end = week_end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            week_orders = orders.filter(
-                created_at__gte=week_start,
-                created_at__lte=week_end
-            )
-            week_revenue = sum(order.total for order in week_orders)
-            week_commission = (week_revenue * earnings.commission_rate) / 100
-            week_net_revenue = week_revenue - week_commission
-            
-            weekly_data.insert(0, {
-                'week': f"Week {4-i}",
+        for i, bucket in enumerate(metrics.series('week')[-4:]):
+            week_start = timezone.localdate(bucket['start'])
+            week_end = min(week_start + timedelta(days=6), today)
+            weekly_data.append({
+                'week': f"Week {i + 1}",
                 'week_period': f"{week_start.strftime('%m/%d')} - {week_end.strftime('%m/%d')}",
-                'gross_revenue': float(week_revenue),
-                'commission': float(week_commission),
-                'net_revenue': float(week_net_revenue),
-                'orders_count': week_orders.count()
+                **revenue(bucket)
             })
-        
+
         # Total statistics
-        total_orders = orders.count()
-        total_gross_revenue = sum(order.total for order in orders)
-        total_commission = (total_gross_revenue * earnings.commission_rate) / 100
+        total_orders = totals['delivered_orders']
+        total_gross_revenue = totals['gross']
+        total_commission = totals['commission_total']
         
         # Average order value
         avg_order_value = total_gross_revenue / total_orders if total_orders > 0 else 0
@@ -1523,6 +1375,7 @@ class RestaurantWithdrawalsView(APIView):
         serializer = WithdrawalRequestSerializer(withdrawals, many=True)
         return Response(serializer.data)
 
+    @idempotent
     def post(self, request):
         try:
             restaurant = Restaurant.objects.get(owner=request.user)
@@ -1632,21 +1485,11 @@ class RiderLocationView(APIView):
     
     def calculate_eta(self, rider_lat, rider_lng, dest_lat, dest_lng):
         """Calculate estimated time of arrival"""
-        import math
-        
-        # Calculate distance using Haversine formula
-        R = 6371  # Earth's radius in km
-        dLat = math.radians(dest_lat - rider_lat)
-        dLng = math.radians(dest_lng - rider_lng)
-        a = (math.sin(dLat/2) * math.sin(dLat/2) +
-             math.cos(math.radians(rider_lat)) * math.cos(math.radians(dest_lat)) *
-             math.sin(dLng/2) * math.sin(dLng/2))
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        distance = R * c
+        from .geo import distance_km, travel_minutes
         
         # Assume average speed of 25 km/h for delivery
-        time_hours = distance / 25
-        time_minutes = int(time_hours * 60)
+        distance = distance_km(float(rider_lat), float(rider_lng), dest_lat, dest_lng)
+        time_minutes = int(travel_minutes(distance, 25))
         
         if time_minutes < 1:
             return "1 min"
@@ -1674,32 +1517,49 @@ class RiderProfileView(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=400)
 
-class RiderAvailableOrderViewSet(viewsets.ReadOnlyModelViewSet):
+class RiderAvailableOrderViewSet(OrderFieldsMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    # Kilometres from the rider to the pickup, and what the rider earns for the trip
+    extra_fields = ('distance', 'rider_payout')
 
     def get_queryset(self):
         if self.request.user.role != 'rider':
             return Order.objects.none()
         
         # Get orders that are ready for pickup and don't have a rider assigned
-        available_orders = Order.objects.filter(
+        return Order.objects.filter(
             status='ready_for_pickup',
             rider__isnull=True
-        ).select_related('restaurant', 'user', 'address').order_by('-created_at')
-        
-        # Add distance calculation if rider location is available
-        try:
-            rider_location = RiderLocation.objects.get(rider=self.request.user)
-            # In a real app, you'd calculate distance here
-            # For now, we'll add mock distance data
-            for order in available_orders:
-                order.distance = 2.5  # Mock distance in km
-                order.delivery_fee = 50  # Mock delivery fee
-        except RiderLocation.DoesNotExist:
-            pass
-            
-        return available_orders
+        ).select_related('restaurant', 'user', 'address').annotate(
+            # Annotations survive ?fields= trimming, so distances never need the restaurant loaded
+            pickup_lat=models.F('restaurant__lat'),
+            pickup_lng=models.F('restaurant__lng')
+        ).order_by('-created_at')
+
+    def list(self, request, *args, **kwargs):
+        from .geo import distances_km
+        from .rider_service import payout_per_delivery
+
+        orders = list(self.filter_queryset(self.get_queryset()))
+        data = self.get_serializer(orders, many=True).data
+
+        if self.wants_field('rider_payout'):
+            payout = float(payout_per_delivery())
+            for item in data:
+                item['rider_payout'] = payout
+
+        # Distance from the rider to every pickup, in one vectorized call
+        location = None
+        if self.wants_field('distance'):
+            location = RiderLocation.objects.filter(rider=request.user).values_list('lat', 'lng').first()
+        if location and orders:
+            distances = distances_km(
+                *location, [order.pickup_lat for order in orders], [order.pickup_lng for order in orders]
+            )
+            for item, distance in zip(data, distances):
+                item['distance'] = round(float(distance), 1)
+        return Response(data)
 
     @action(detail=True, methods=['post'])
     def accept(self, request, pk=None):
@@ -1957,14 +1817,15 @@ class RiderOrderUpdateView(APIView):
         except RiderLocation.DoesNotExist:
             return Response({'error': 'Location not available'}, status=404)
 
-class RiderOrderHistoryViewSet(viewsets.ReadOnlyModelViewSet):
+class RiderOrderHistoryViewSet(OrderFieldsMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         if self.request.user.role != 'rider':
             return Order.objects.none()
-        return Order.objects.filter(rider=self.request.user).order_by('-created_at')
+        return Order.objects.filter(rider=self.request.user)
 
 class RiderEarningsView(APIView):
     permission_classes = [IsAuthenticated]
@@ -1973,39 +1834,9 @@ class RiderEarningsView(APIView):
         if request.user.role != 'rider':
             return Response({'error': 'Access denied'}, status=403)
         
-        from datetime import date, timedelta
-        from django.db.models import Sum, Count, Avg
-        
-        # Get rider's completed orders
-        completed_orders = Order.objects.filter(rider=request.user, status='delivered')
-        
-        # Today's earnings
-        today = date.today()
-        today_orders = completed_orders.filter(created_at__date=today)
-        today_earnings = today_orders.count() * 50  # ৳50 per delivery
-        today_trips = today_orders.count()
-        
-        # Total stats
-        total_trips = completed_orders.count()
-        total_earnings = total_trips * 50  # ৳50 per delivery
-        
-        # Average rating (mock for now)
-        average_rating = 4.8
-        
-        # Weekly earnings (last 7 days)
-        week_start = today - timedelta(days=6)
-        weekly_orders = completed_orders.filter(created_at__date__gte=week_start)
-        weekly_earnings = weekly_orders.count() * 50
-        
-        return Response({
-            'today_earnings': today_earnings,
-            'today_trips': today_trips,
-            'total_earnings': total_earnings,
-            'total_trips': total_trips,
-            'weekly_earnings': weekly_earnings,
-            'average_rating': average_rating,
-            'earnings_per_trip': 50
-        })
+        # Everything comes from one aggregate over the rider's daily payout rollup
+        from .rider_service import earnings_summary
+        return Response(earnings_summary(request.user))
 
 class RiderOrderViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -2103,14 +1934,73 @@ class AdminDashboardView(APIView):
     def get(self, request):
         if request.user.role != 'admin':
             return Response({'error': 'Access denied'}, status=403)
-        # Mock for Figma dashboard
-        revenue = 1280
-        orders = 75
-        cancelled = 65
-        deliveries = 357
-        charts = {'pie': {'orders': 81, 'growth': 22, 'revenue': 62}, 'line': [100, 200, 300], 'bar': [80, 60, 40], 'map': {'customers': 100}}
+
+        from django.db.models import Count, Q
+        from .metrics_service import PlatformMetricsService
+
+        # Order metrics come from incrementally maintained counters and rollups
+        metrics = PlatformMetricsService()
+        totals = metrics.totals()
+        charts = {
+            'daily': metrics.chart('day'),
+            'weekly': metrics.chart('week'),
+            'monthly': metrics.chart('month')
+        }
+
+        users = User.objects.aggregate(
+            total=Count('id'),
+            active_riders=Count('id', filter=Q(role='rider', is_online=True))
+        )
+        restaurants = Restaurant.objects.aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(is_approved=False))
+        )
+
+        this_month, last_month = charts['monthly']['revenue'][-1], charts['monthly']['revenue'][-2]
+        monthly_growth = round((this_month - last_month) / last_month * 100, 1) if last_month else 0
+
+        recent_orders = [
+            {
+                'id': order['id'],
+                'total': float(order['total']),
+                'time': timezone.localtime(order['created_at']).strftime('%b %d, %H:%M')
+            }
+            for order in Order.objects.order_by('-created_at').values('id', 'total', 'created_at')[:5]
+        ]
+        recent_users = [
+            {
+                'name': f"{user.first_name} {user.last_name}".strip() or user.email,
+                'role': user.role,
+                'time': timezone.localtime(user.date_joined).strftime('%b %d, %H:%M')
+            }
+            for user in User.objects.order_by('-date_joined')[:5]
+        ]
         reviews = Review.objects.all()[:3]
-        return Response({'revenue': revenue, 'orders': orders, 'cancelled': cancelled, 'deliveries': deliveries, 'charts': charts, 'reviews': ReviewSerializer(reviews, many=True).data})
+
+        return Response({
+            'revenue': float(totals.gross_revenue),
+            'commission': float(totals.commission),
+            'orders': totals.total_orders,
+            'cancelled': totals.cancelled_orders,
+            'deliveries': totals.delivered_orders,
+            'charts': charts,
+            'reviews': ReviewSerializer(reviews, many=True).data,
+
+            # Fields used by the admin dashboard page
+            'totalUsers': users['total'],
+            'totalRestaurants': restaurants['total'],
+            'totalOrders': totals.total_orders,
+            'totalRevenue': float(totals.gross_revenue),
+            'pendingRestaurants': restaurants['pending'],
+            'activeRiders': users['active_riders'],
+            'recentOrders': recent_orders,
+            'recentUsers': recent_users,
+            'platformStats': {
+                'dailyOrders': charts['daily']['orders'][-1],
+                'weeklyRevenue': charts['weekly']['revenue'][-1],
+                'monthlyGrowth': monthly_growth
+            }
+        })
 
 class AdminUserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
@@ -2131,13 +2021,14 @@ class AdminRestaurantViewSet(viewsets.ModelViewSet):
     def approve(self, request, pk=None):
         restaurant = self.get_object()
         restaurant.is_approved = True
-        restaurant.save()
+        restaurant.save(update_fields=['is_approved'])
         return Response({'message': 'Approved'})
 
-class AdminOrderViewSet(viewsets.ModelViewSet):
+class AdminOrderViewSet(OrderFieldsMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     queryset = Order.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
 class AdminReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
@@ -2146,24 +2037,42 @@ class AdminReviewViewSet(viewsets.ModelViewSet):
 
 class AdminRevenueView(APIView):
     permission_classes = [IsAuthenticated]
+    PERIODS = {'daily': 'day', 'weekly': 'week', 'monthly': 'month'}
 
     def get(self, request):
-        # Mock for Figma
-        charts = {'line': [100, 200, 300, 400]}
-        return Response({'charts': charts})
+        if request.user.role != 'admin':
+            return Response({'error': 'Access denied'}, status=403)
+
+        from .metrics_service import PlatformMetricsService
+
+        period = request.GET.get('period', 'monthly')
+        if period not in self.PERIODS:
+            period = 'monthly'
+
+        metrics = PlatformMetricsService()
+        totals = metrics.totals()
+        chart = metrics.chart(self.PERIODS[period])
+        return Response({
+            'period': period,
+            'charts': {'line': chart['revenue'], **chart},
+            'total_revenue': float(totals.gross_revenue),
+            'total_commission': float(totals.commission),
+            'cancelled_revenue': float(totals.cancelled_revenue)
+        })
 
 
 class LoginLogViewSet(viewsets.ReadOnlyModelViewSet):
     """API endpoint for viewing login logs (admin only)"""
     serializer_class = LoginLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = LoginTimeCursorPagination
     
     def get_queryset(self):
         # Only allow admin users to view login logs
         if self.request.user.role != 'admin':
             return LoginLog.objects.none()
         
-        queryset = LoginLog.objects.select_related('user').order_by('-login_time')
+        queryset = LoginLog.objects.select_related('user')
         
         # Filter by user if specified
         user_id = self.request.query_params.get('user_id')
@@ -1,7 +1,7 @@
 import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 
-import api from "../services/api";
+import api, { liveLocationParams } from "../services/api";
 import AIChatBot from "../components/ProfessionalAIChat";
 // category icons from assets
 import catAll from "../assets/cat-all.png";
@@ -34,7 +34,7 @@ export default function HomeScreen() {
     const fetchData = async () => {
       try {
         // Fetch home data
-        const homeResponse = await api.get("customer/home/");
+        const homeResponse = await api.get("customer/home/", { params: liveLocationParams() });
         
         // Transform backend categories
         const backendCategories = homeResponse.data.categories.map(c => ({
@@ -155,13 +155,13 @@ export default function HomeScreen() {
       } else {
         // Fetch all foods to see which restaurants have items in this category
         try {
-          const foodsResponse = await api.get('customer/food/');
           const selectedCategory = categories.find(c => c.label === activeCategory);
           
-          // Find foods that belong to the selected category
-          const foodsInCategory = foodsResponse.data.filter(food => 
-            food.category === selectedCategory?.id
-          );
+          // Foods that belong to the selected category, filtered by the server
+          const foodsResponse = await api.get('customer/food/', {
+            params: { category: selectedCategory?.id, page_size: 100 }
+          });
+          const foodsInCategory = foodsResponse.data.results || foodsResponse.data;
           
           // Get unique restaurant IDs from those foods
           const restaurantIds = [...new Set(foodsInCategory.map(food => food.restaurant))];
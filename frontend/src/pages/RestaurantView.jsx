@@ -31,9 +31,9 @@ export default function RestaurantView() {
         const restaurantResponse = await api.get(`customer/restaurants/${restaurant.id}/`);
         setRestaurantDetails(restaurantResponse.data);
 
-        // Fetch all foods and filter by restaurant
-        const foodsResponse = await api.get('customer/food/');
-        const restaurantFoods = foodsResponse.data.filter(food => food.restaurant === restaurant.id);
+        // Fetch this restaurant's whole menu (revalidated with its ETag)
+        const menuResponse = await api.get(`customer/restaurants/${restaurant.id}/menu/`);
+        const restaurantFoods = menuResponse.data.categories.flatMap(category => category.items);
         setFoodItems(restaurantFoods);
 
         // Extract unique categories from foods
@@ -394,7 +394,7 @@ export default function RiderDashboard() {
                           {order.restaurant_name}
                         </div>
                         <div style={{ fontSize: "0.7rem", color: ORANGE, fontWeight: 700 }}>
-                          ৳{order.delivery_fee} • {order.distance}km
+                          ৳{order.rider_payout} • {order.distance}km
                         </div>
                       </div>
                       
@@ -23,7 +23,7 @@ export default function RiderOrders() {
       }
 
       const response = await api.get('/rider/orders/history/');
-      setOrders(response.data || []);
+      setOrders(response.data.results || response.data || []);
     } catch (error) {
       console.error("Error fetching orders:", error);
     }
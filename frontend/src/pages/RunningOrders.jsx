@@ -25,9 +25,14 @@ export default function RunningOrders() {
         return;
       }
 
-      // Fetch active orders only (more efficient)
-      const response = await api.get('/restaurant/orders/?status=active');
-      const allOrders = response.data;
+      // Fetch active orders only (more efficient), following the cursor until the last page
+      const allOrders = [];
+      let url = '/restaurant/orders/?status=active&page_size=100';
+      while (url) {
+        const response = await api.get(url);
+        allOrders.push(...(response.data.results || response.data));
+        url = response.data.next || null;
+      }
       
       // Filter running orders (pending, preparing, ready_for_pickup)
       const runningOrders = allOrders.filter(order => 
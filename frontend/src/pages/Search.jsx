@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
-import api from "../services/api";
+import api, { liveLocationParams } from "../services/api";
 
 const DARK_TEXT = "#222";
 
@@ -33,7 +33,7 @@ export default function Search() {
 
   const performSearch = async (searchTerm) => {
     try {
-      const response = await api.get(`/customer/search/?q=${searchTerm}`);
+      const response = await api.get("/customer/search/", { params: { q: searchTerm, ...liveLocationParams() } });
       setResults(response.data.restaurants);
 
       // Add to recent searches if results found
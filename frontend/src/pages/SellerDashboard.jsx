@@ -82,8 +82,8 @@ export default function SellerDashboard() {
         api.get('/customer/food/', {
           params: { 
             restaurant: analytics.restaurant_id || 1, // Use restaurant ID from analytics
-            ordering: '-id', // Simple ordering instead of orders_count
-            limit: 2 // Limit to just 2 items
+            sort: 'popularity', // Most units sold recently
+            page_size: 2 // Limit to just 2 items
           }
         }).catch(() => ({ data: [] })) // Graceful fallback
       ]);
@@ -26,7 +26,7 @@ export default function SellerMessages() {
 
       // Fetch restaurant orders to get real chat conversations
       const ordersResponse = await api.get('/restaurant/orders/');
-      const orders = ordersResponse.data;
+      const orders = ordersResponse.data.results || ordersResponse.data;
       
       // Get real chat messages for each order
       const conversationsMap = {};
@@ -29,7 +29,7 @@ export default function SellerNotifications() {
         api.get('/restaurant/reviews/')
       ]);
       
-      const orders = ordersResponse.data;
+      const orders = ordersResponse.data.results || ordersResponse.data;
       const reviews = reviewsResponse.data;
       
       const notificationsList = [];
@@ -46,4 +46,10 @@ api.interceptors.response.use(
   }
 );
 
+// Live location picked on the location screen, as ?lat=&lng= params (skips the server's address lookup)
+export const liveLocationParams = () => {
+  const location = JSON.parse(sessionStorage.getItem("currentSessionLocation") || "null");
+  return location?.lat && location?.lng ? { lat: location.lat, lng: location.lng } : {};
+};
+
 export default api;
\ No newline at end of file
@@ -12,7 +12,7 @@ timeout /t 2 /nobreak >nul
 
 REM Start Django backend server
 echo 📡 Starting Django Backend Server on port 8000...
-start "Django Backend - http://127.0.0.1:8000/" cmd /k "cd /d %~dp0 && python manage.py runserver 127.0.0.1:8000"
+start "Django Backend - http://127.0.0.1:8000/" cmd /k "cd /d %~dp0 && python manage.py createcachetable && python manage.py runserver 127.0.0.1:8000"
 
 REM Wait for Django to start
 timeout /t 5 /nobreak >nul
@@ -21,6 +21,7 @@ Write-Host "📡 Starting Django Backend Server..." -ForegroundColor Cyan
 if (Test-Port 8000) {
     Write-Host "⚠️  Port 8000 is already in use. Django server might already be running." -ForegroundColor Yellow
 } else {
+    python manage.py createcachetable
     Start-Process -FilePath "python" -ArgumentList "manage.py", "runserver" -WindowStyle Normal
     Write-Host "✅ Django server started" -ForegroundColor Green
 }
@@ -18,6 +18,7 @@ echo "📡 Starting Django Backend Server..."
 if check_port 8000; then
     echo "⚠️  Port 8000 is already in use. Django server might already be running."
 else
+    python manage.py createcachetable  # shared cache table; a no-op once it exists
     python manage.py runserver &
     DJANGO_PID=$!
     echo "✅ Django server started (PID: $DJANGO_PID)"